@@ -1,4 +1,4 @@
-import{i as Bt,B as gn,a as fn,b as bn,j as Tr,d as $,U as Qt,z as xn,r as yn,f as Sn,Q as wn,e as Cn,$ as _n,c as Lt,g as S,h as kn,C as In,k as At,u as Tt,l as H,m as r,H as _,n as e,T as d,o as vn,p as v,s as Dn,q as f,t as Ze,J as zn,v as y,w as Mr,A as Mt,x as Un,y as En,M as ce,D as de,E as he,F as ue,G as pe,I as we,K as Qe,L as Nr,N as Rn,O as mt,P as me,R as L,S as B,V as Pr,W as re,X as E,Y as ye,Z as V,_ as Ne,a0 as Pe,a1 as P,a2 as bt,a3 as lt,a4 as Ln,a5 as Te,a6 as He,a7 as An,a8 as Fr,a9 as Wr,aa as ut,ab as It,ac as Tn,ad as $e,ae as vt,af as lr,ag as Mn,ah as Or,ai as Hr,aj as jr,ak as Se,al as Nn,am as Pn,an as Fn,ao as Wn,ap as On,aq as qt,ar as Br,as as $r,at as ie,au as cr,av as Hn,aw as jn,ax as Bn,ay as $t,az as $n,aA as Vn,aB as Gn,aC as Yn,aD as Zn,aE as Qn,aF as Dt,aG as qn,aH as Xn,aI as Jn,aJ as Kn,aK as eo,aL as xt,aM as Vr,aN as yt,aO as N,aP as Xt,aQ as to,aR as Ve,aS as Ge,aT as Vt,aU as Ye,aV as ro,aW as Ie,aX as ve,aY as De,aZ as ze,a_ as Ue,a$ as Ee,b0 as dr,b1 as no,b2 as zt,b3 as pt,b4 as Jt,b5 as oo,b6 as so,b7 as ao,b8 as Gr,b9 as io,ba as gt,bb as Ut,bc as Yr,bd as lo,be as co,bf as Zr,bg as We,bh as ho,bi as uo,bj as po,bk as Kt,bl as Pt,bm as hr,bn as Qr,bo as mo,bp as go,bq as ur,br as fo,bs as pr,bt as qr,bu as bo,bv as Xr,bw as xo,bx as yo,by as Jr,bz as So,bA as wo,bB as Kr,bC as en,bD as tn,bE as q,bF as Co,bG as rn,bH as Ft,bI as _o,bJ as ko,bK as Io,bL as vo,bM as Do,bN as zo,bO as nn,bP as Uo,bQ as mr,bR as gr,bS as Be,bT as Le,bU as fr,bV as be,bW as br,bX as Eo,bY as Ro,bZ as Lo,b_ as Ao,b$ as To,c0 as Mo,c1 as No,c2 as Po,c3 as Fo,c4 as Wo,c5 as Oo,c6 as Ho,c7 as jo,c8 as Bo,c9 as $o,ca as Vo,cb as Go}from"./vendor.3f3f0bc0.js";(function(){const n=document.createElement("link").relList;if(n&&n.supports&&n.supports("modulepreload"))return;for(const a of document.querySelectorAll('link[rel="modulepreload"]'))s(a);new MutationObserver(a=>{for(const i of a)if(i.type==="childList")for(const l of i.addedNodes)l.tagName==="LINK"&&l.rel==="modulepreload"&&s(l)}).observe(document,{childList:!0,subtree:!0});function o(a){const i={};return a.integrity&&(i.integrity=a.integrity),a.referrerpolicy&&(i.referrerPolicy=a.referrerpolicy),a.crossorigin==="use-credentials"?i.credentials="include":a.crossorigin==="anonymous"?i.credentials="omit":i.credentials="same-origin",i}function s(a){if(a.ep)return;a.ep=!0;const i=o(a);fetch(a.href,i)}})();Bt.use(gn).use(fn).use(bn).init({debug:{}.NODE_ENV==="development",returnNull:!1,fallbackLng:"en",interpolation:{escapeValue:!1},react:{useSuspense:!1},load:"languageOnly",detection:{caches:["localStorage","sessionStorage","cookie"]},backend:{loadPath:Tr(["/","statics/locales/{{lng}}.json"])}},function(t,n){$.locale(Bt.language)});Bt.on("languageChanged",t=>{$.locale(t)});Qt("zh-cn",xn);Qt("ru",yn);Qt("fa",Sn);const Gt=new wn,on=t=>{const n=document.querySelector('meta[name="theme-color"]');n==null||n.setAttribute("content",t=="dark"?"#1A202C":"#3B81F6")},Yo=Cn({shadows:{outline:"0 0 0 2px var(--chakra-colors-primary-200)"},fonts:{body:"Inter,-apple-system,BlinkMacSystemFont,Segoe UI,Roboto,Oxygen,Ubuntu,Cantarell,Fira Sans,Droid Sans,Helvetica Neue,sans-serif"},colors:{"light-border":"#d2d2d4",primary:{50:"#9cb7f2",100:"#88a9ef",200:"#749aec",300:"#618ce9",400:"#4d7de7",500:"#396fe4",600:"#3364cd",700:"#2e59b6",800:"#284ea0",900:"#224389"},gray:{750:"#222C3B"}},components:{Alert:{baseStyle:{container:{borderRadius:"6px",fontSize:"sm"}}},Select:{baseStyle:{field:{_dark:{borderColor:"gray.600",borderRadius:"6px"},_light:{borderRadius:"6px"}}}},FormHelperText:{baseStyle:{fontSize:"xs"}},FormLabel:{baseStyle:{fontSize:"sm",fontWeight:"medium",mb:"1",_dark:{color:"gray.300"}}},Input:{baseStyle:{addon:{_dark:{borderColor:"gray.600",_placeholder:{color:"gray.500"}}},field:{_focusVisible:{boxShadow:"none",borderColor:"primary.200",outlineColor:"primary.200"},_dark:{borderColor:"gray.600",_disabled:{color:"gray.400",borderColor:"gray.500"},_placeholder:{color:"gray.500"}}}}},Table:{baseStyle:{table:{borderCollapse:"separate",borderSpacing:0},thead:{borderBottomColor:"light-border"},th:{background:"#F9FAFB",borderColor:"light-border !important",borderBottomColor:"light-border !important",borderTop:"1px solid ",borderTopColor:"light-border !important",_first:{borderLeft:"1px solid",borderColor:"light-border !important"},_last:{borderRight:"1px solid",borderColor:"light-border !important"},_dark:{borderColor:"gray.600 !important",background:"gray.750"}},td:{transition:"all .1s ease-out",borderColor:"light-border",borderBottomColor:"light-border !important",_first:{borderLeft:"1px solid",borderColor:"light-border",_dark:{borderColor:"gray.600"}},_last:{borderRight:"1px solid",borderColor:"light-border",_dark:{borderColor:"gray.600"}},_dark:{borderColor:"gray.600",borderBottomColor:"gray.600 !important"}},tr:{"&.interactive":{cursor:"pointer",_hover:{"& > td":{bg:"gray.200"},_dark:{"& > td":{bg:"gray.750"}}}},_last:{"& > td":{_first:{borderBottomLeftRadius:"8px"},_last:{borderBottomRightRadius:"8px"}}}}}}}});const Et=()=>localStorage.getItem("token"),Zo=t=>{localStorage.setItem("token",t)},Qo=()=>{localStorage.removeItem("token")},qo=_n.create({baseURL:"/api/"}),Xo=(t,n={})=>(Et()&&(n.headers={...(n==null?void 0:n.headers)||{},Authorization:`Bearer ${Et()}`}),qo(t,n)),O=Xo,Jo=Lt(t=>({isLoading:!0,isPostLoading:!1,version:null,started:!1,logs_websocket:null,config:"",fetchCoreSettings:()=>{t({isLoading:!0}),Promise.all([O("/core").then(({version:n,started:o,logs_websocket:s})=>t({version:n,started:o,logs_websocket:s})),O("/core/config").then(n=>t({config:n}))]).finally(()=>t({isLoading:!1}))},updateConfig:n=>(t({isPostLoading:!0}),O("/core/config",{method:"PUT",body:n}).finally(()=>{t({isPostLoading:!1})})),restartCore:()=>O("/core/restart",{method:"POST"})}));function ae(t,n=2,o=!1){if(!+t)return"0 B";const s=1024,a=n<0?0:n,i=["B","KB","MB","GB","TB","PB","EB","ZB","YB"],l=Math.floor(Math.log(t)/Math.log(s));return o?[parseFloat((t/Math.pow(s,l)).toFixed(a)),i[l]]:`${parseFloat((t/Math.pow(s,l)).toFixed(a))} ${i[l]}`}const xr=t=>{if(t!==null)return t.toString().replace(/\B(?=(\d{3})+(?!\d))/g,",")},Ko=S(kn,{baseStyle:{w:5,h:5,position:"relative",zIndex:"2"}}),es=S(In,{baseStyle:{w:5,h:5,position:"relative",zIndex:"2"}}),ts=S(At,{baseStyle:{w:5,h:5,position:"relative",zIndex:"2"}}),Wt=({title:t,content:n,icon:o})=>r(vn,{p:6,borderWidth:"1px",borderColor:"light-border",bg:"#F9FAFB",_dark:{borderColor:"gray.600",bg:"gray.750"},borderStyle:"solid",boxShadow:"none",borderRadius:"12px",width:"full",display:"flex",justifyContent:"space-between",flexDirection:"row",children:[r(_,{alignItems:"center",columnGap:"4",children:[e(v,{p:"2",position:"relative",color:"white",_before:{content:'""',position:"absolute",top:0,left:0,bg:"primary.400",display:"block",w:"full",h:"full",borderRadius:"5px",opacity:".5",z:"1"},_after:{content:'""',position:"absolute",top:"-5px",left:"-5px",bg:"primary.400",display:"block",w:"calc(100% + 10px)",h:"calc(100% + 10px)",borderRadius:"8px",opacity:".4",z:"1"},children:o}),e(d,{color:"gray.600",_dark:{color:"gray.300"},fontWeight:"medium",textTransform:"capitalize",fontSize:"sm",children:t})]}),e(v,{fontSize:"3xl",fontWeight:"semibold",mt:"2",children:n})]}),Yt="statistics-query-key",rs=t=>{const{version:n}=z(),{data:o}=Tt({queryKey:Yt,queryFn:()=>O("/system"),refetchInterval:5e3,onSuccess:({version:a})=>{n!==a&&z.setState({version:a})}}),{t:s}=H();return r(_,{justifyContent:"space-between",gap:0,columnGap:{lg:4,md:0},rowGap:{lg:0,base:4},display:"flex",flexDirection:{lg:"row",base:"column"},...t,children:[e(Wt,{title:s("activeUsers"),content:o&&r(_,{alignItems:"flex-end",children:[e(d,{children:xr(o.users_active)}),r(d,{fontWeight:"normal",fontSize:"lg",as:"span",display:"inline-block",pb:"5px",children:["/ ",xr(o.total_user)]})]}),icon:e(Ko,{})}),e(Wt,{title:s("dataUsage"),content:o&&ae(o.incoming_bandwidth+o.outgoing_bandwidth),icon:e(es,{})}),e(Wt,{title:s("memoryUsage"),content:o&&r(_,{alignItems:"flex-end",children:[e(d,{children:ae(o.mem_used,1,!0)[0]}),r(d,{fontWeight:"normal",fontSize:"lg",as:"span",display:"inline-block",pb:"5px",children:[ae(o.mem_used,1,!0)[1]," /"," ",ae(o.mem_total,1)]})]}),icon:e(ts,{})})]})},sn="marzban-num-users-per-page",yr=10,ns=()=>{const t=localStorage.getItem(sn)||yr.toString();return parseInt(t)||yr},os=t=>localStorage.setItem(sn,t),ss=t=>{for(const n in t)t[n]||delete t[n];return z.setState({loading:!0}),O("/users",{query:t}).then(n=>(z.setState({users:n}),n)).finally(()=>{z.setState({loading:!1})})},as=()=>O("/inbounds").then(t=>{z.setState({inbounds:new Map(Object.entries(t))})}).finally(()=>{z.setState({loading:!1})}),z=Lt(Dn((t,n)=>({version:null,editingUser:null,deletingUser:null,isCreatingNewUser:!1,QRcodeLinks:null,subscribeUrl:null,users:{users:[],total:0},loading:!0,isResetingAllUsage:!1,isEditingHosts:!1,isEditingNodes:!1,isShowingNodesUsage:!1,resetUsageUser:null,revokeSubscriptionUser:null,filters:{username:"",limit:ns(),sort:"-created_at"},inbounds:new Map,isEditingCore:!1,refetchUsers:()=>{ss(n().filters)},resetAllUsage:()=>O("/users/reset",{method:"POST"}).then(()=>{n().onResetAllUsage(!1),n().refetchUsers()}),onResetAllUsage:o=>t({isResetingAllUsage:o}),onCreateUser:o=>t({isCreatingNewUser:o}),onEditingUser:o=>{t({editingUser:o})},onDeletingUser:o=>{t({deletingUser:o})},onFilterChange:o=>{t({filters:{...n().filters,...o}}),n().refetchUsers()},setQRCode:o=>{t({QRcodeLinks:o})},deleteUser:o=>(t({editingUser:null}),O(`/user/${o.username}`,{method:"DELETE"}).then(()=>{t({deletingUser:null}),n().refetchUsers(),Gt.invalidateQueries(Yt)})),createUser:o=>O("/user",{method:"POST",body:o}).then(()=>{t({editingUser:null}),n().refetchUsers(),Gt.invalidateQueries(Yt)}),editUser:o=>O(`/user/${o.username}`,{method:"PUT",body:o}).then(()=>{n().onEditingUser(null),n().refetchUsers()}),fetchUserUsage:(o,s)=>{for(const a in s)s[a]||delete s[a];return O(`/user/${o.username}/usage`,{method:"GET",query:s})},onEditingHosts:o=>{t({isEditingHosts:o})},onEditingNodes:o=>{t({isEditingNodes:o})},onShowingNodesUsage:o=>{t({isShowingNodesUsage:o})},setSubLink:o=>{t({subscribeUrl:o})},resetDataUsage:o=>O(`/user/${o.username}/reset`,{method:"POST"}).then(()=>{t({resetUsageUser:null}),n().refetchUsers()}),revokeSubscription:o=>O(`/user/${o.username}/revoke_sub`,{method:"POST"}).then(s=>{t({revokeSubscriptionUser:null,editingUser:s}),n().refetchUsers()})}))),ge=({children:t,color:n})=>e(v,{position:"relative",width:"36px",height:"36px",display:"flex",justifyContent:"center",alignItems:"center",_before:{content:'""',display:"block",position:"absolute",top:"0",left:"0",width:"calc(100%)",height:"calc(100%)",bg:`${n}.400`,opacity:".5",borderRadius:"5px",zIndex:"1",_dark:{bg:`${n}.400`}},_after:{content:'""',display:"block",position:"absolute",top:"0",left:"0",width:"calc(100% + 10px)",height:"calc(100% + 10px)",transform:"translate(-5px, -5px)",bg:`${n}.400`,opacity:".4",borderRadius:"8px",zIndex:"1",_dark:{bg:`${n}.400`}},children:e(d,{color:`${n}.500`,_dark:{color:`${n}.900`},position:"relative",zIndex:"2",children:t})});window.ace.define("ace/theme/nord_dark",["require","exports","module","ace/lib/dom"],(t,n,o)=>{n.isDark=!0,n.cssClass="ace-nord-dark",t("../lib/dom").importCssString(n.cssText,n.cssClass)});window.ace.define("ace/theme/dawn",["require","exports","module","ace/lib/dom"],(t,n,o)=>{n.isDark=!1,n.cssClass="ace-dawn",t("../lib/dom").importCssString(n.cssText,n.cssClass)});const is=f.exports.forwardRef(({json:t,onChange:n,mode:o="code"},s)=>{const{colorMode:a}=Ze(),i={mode:o,onChangeText:n,statusBar:!1,mainMenuBar:!1,theme:a==="dark"?"ace/theme/nord_dark":"ace/theme/dawn"},l=f.exports.useRef(null),p=f.exports.useRef(null);return f.exports.useEffect(()=>(p.current=new zn(l.current,i),()=>{p.current&&p.current.destroy()}),[]),f.exports.useEffect(()=>{p.current&&p.current.update(t)},[t]),e(v,{ref:s,border:"1px solid",borderColor:"gray.300",_dark:{borderColor:"gray.500"},borderRadius:5,h:"full",children:e(v,{height:"full",ref:l})})}),an=y.object({name:y.string().min(1),address:y.string().min(1),port:y.number().min(1).or(y.string().transform(t=>parseFloat(t))),api_port:y.number().min(1).or(y.string().transform(t=>parseFloat(t))),xray_version:y.string().nullable().optional(),id:y.number().nullable().optional(),status:y.enum(["connected","connecting","error","disabled"]).nullable().optional(),message:y.string().nullable().optional(),add_as_new_host:y.boolean().optional(),usage_coefficient:y.number().or(y.string().transform(t=>parseFloat(t)))}),ls=()=>({name:"",address:"",port:62050,api_port:62051,xray_version:"",usage_coefficient:1}),ft="fetch-nodes-query-key",ln=()=>{const{isEditingNodes:t}=z();return Tt({queryKey:ft,queryFn:St.getState().fetchNodes,refetchInterval:t?3e3:void 0,refetchOnWindowFocus:!1})},St=Lt((t,n)=>({nodes:[],addNode(o){return O("/node",{method:"POST",body:o})},fetchNodes(){return O("/nodes")},fetchNodesUsage(o){return O("/nodes/usage",{query:o})},updateNode(o){return O(`/node/${o.id}`,{method:"PUT",body:o})},setDeletingNode(o){t({deletingNode:o})},reconnectNode(o){return O(`/node/${o.id}/reconnect`,{method:"POST"})},deleteNode:()=>{var o;return O(`/node/${(o=n().deletingNode)==null?void 0:o.id}`,{method:"DELETE"})}})),Sr=500,cs=S(Mr,{baseStyle:{w:5,h:5}}),ds=S(Mt,{baseStyle:{w:4,h:4}}),hs=S(Un,{baseStyle:{w:4,h:4}}),us=S(En,{baseStyle:{w:3,h:3}}),ps=t=>({[lt.ReadyState.CONNECTING]:"connecting",[lt.ReadyState.OPEN]:"connected",[lt.ReadyState.CLOSING]:"closed",[lt.ReadyState.CLOSED]:"closed",[lt.ReadyState.UNINSTANTIATED]:"closed"})[t],ms=t=>{try{let n=new URL("/api/".startsWith("/")?window.location.origin+"/api/":"/api/");return(n.protocol==="https:"?"wss://":"ws://")+Tr([n.host+n.pathname,t?`/node/${t}/logs`:"/core/logs"])+"?interval=1&token="+Et()}catch(n){return console.error("Unable to generate websocket url"),console.error(n),null}};let Fe=[];const gs=()=>{const{colorMode:t}=Ze(),{data:n}=ln(),o=!1,[s,a]=f.exports.useState(""),i=(R,K)=>{R!==s&&(R==="host"?(a(""),A([])):(a(R),A([])))},{isEditingCore:l}=z(),{fetchCoreSettings:p,updateConfig:g,isLoading:w,config:x,isPostLoading:b,version:h,restartCore:m}=Jo(),I=f.exports.useRef(null),[C,A]=f.exports.useState([]),{t:u}=H(),c=we(),F=Qe({defaultValues:{config:x||{}}});f.exports.useEffect(()=>{x&&F.setValue("config",x)},[x]),f.exports.useEffect(()=>{l&&p()},[l]);const j=f.exports.useRef(!0),D=f.exports.useCallback(Nr(R=>{var le,J,_e;const K=Math.abs((((le=I.current)==null?void 0:le.scrollTop)||0)-(((J=I.current)==null?void 0:J.scrollHeight)||0)+(((_e=I.current)==null?void 0:_e.offsetHeight)||0))<10;I.current&&K?j.current=!0:j.current=!1,R.length<40&&A(R)},300),[]),{readyState:M}=Rn(ms(s),{onMessage:R=>{Fe.push(R.data),Fe.length>Sr&&(Fe=Fe.splice(0,Fe.length-Sr)),D([...Fe])},shouldReconnect:()=>!0,reconnectAttempts:10,reconnectInterval:1e3});f.exports.useEffect(()=>{var R;I.current&&j.current&&(I.current.scrollTop=(R=I.current)==null?void 0:R.scrollHeight)},[C]),f.exports.useEffect(()=>()=>{Fe=[]},[]);const Y=ps(M.toString()),{mutate:Z,isLoading:Q}=mt(m),ne=({config:R})=>{g(R).then(()=>{c({title:u("core.successMessage"),status:"success",isClosable:!0,position:"top",duration:3e3})}).catch(K=>{let le=u("core.generalErrorMessage");typeof K.response._data.detail=="object"&&(le=K.response._data.detail[Object.keys(K.response._data.detail)[0]]),typeof K.response._data.detail=="string"&&(le=K.response._data.detail),c({title:le,status:"error",isClosable:!0,position:"top",duration:3e3})})},oe=f.exports.useRef(null),[U,W]=f.exports.useState(!1),X=()=>{var R;document.fullscreenElement?(document.exitFullscreen(),W(!1)):((R=oe.current)==null||R.requestFullscreen(),W(!0))};return r("form",{onSubmit:F.handleSubmit(ne),children:[r(me,{children:[r(L,{children:[r(_,{justifyContent:"space-between",alignItems:"flex-start",children:[r(B,{children:[u("core.configuration")," ",w&&e(Pr,{isIndeterminate:!0,size:"15px"})]}),e(_,{gap:0,children:e(re,{label:"Xray Version",placement:"top",children:e(E,{height:"100%",textTransform:"lowercase",children:h&&`v${h}`})})})]}),r(v,{position:"relative",ref:oe,minHeight:"300px",children:[e(ye,{control:F.control,name:"config",render:({field:R})=>e(is,{json:x,onChange:R.onChange})}),e(V,{size:"xs","aria-label":"full screen",variant:"ghost",position:"absolute",top:"2",right:"4",onClick:X,children:U?e(us,{}):e(hs,{})})]})]}),r(L,{mt:"4",children:[r(_,{justifyContent:"space-between",style:{paddingBottom:"1rem"},children:[r(_,{children:[(n==null?void 0:n[0])&&r(Ne,{size:"sm",style:{width:"auto"},disabled:o,bg:"transparent",_dark:{bg:"transparent"},sx:{option:{backgroundColor:t==="dark"?"#222C3B":"white"}},onChange:R=>i(R.currentTarget.value,R.currentTarget.selectedOptions[0].text),children:[e("option",{value:"host",defaultChecked:!0,children:"Master"},"host"),n&&n.map(R=>e("option",{value:String(R.id),children:u(R.name)},R.address))]}),e(B,{className:"w-au",children:u("core.logs")})]}),e(d,{as:B,children:u(`core.socket.${Y}`)})]}),e(v,{border:"1px solid",borderColor:"gray.300",bg:"#F9F9F9",_dark:{borderColor:"gray.500",bg:"#2e3440"},borderRadius:5,minHeight:"200px",maxHeight:"250px",p:2,overflowY:"auto",ref:I,children:C.map((R,K)=>e(d,{fontSize:"xs",opacity:.8,whiteSpace:"pre-line",children:R},K))})]})]}),e(Pe,{children:r(_,{w:"full",justifyContent:"space-between",children:[e(_,{children:e(v,{children:e(P,{size:"sm",leftIcon:e(ds,{className:bt({"animate-spin":Q})}),onClick:()=>Z(),children:u(Q?"core.restarting":"core.restartCore")})})}),e(_,{children:e(P,{size:"sm",variant:"solid",colorScheme:"primary",px:"5",type:"submit",isDisabled:w||b,isLoading:b,children:u("core.save")})})]})})]})},fs=()=>{const{isEditingCore:t}=z(),n=z.setState.bind(null,{isEditingCore:!1}),{t:o}=H();return r(ce,{isOpen:t,onClose:n,size:"3xl",children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",w:"full",children:[e(ue,{pt:6,children:r(_,{gap:2,children:[e(ge,{color:"primary",children:e(cs,{color:"white"})}),e(d,{fontWeight:"semibold",fontSize:"lg",children:o("core.title")})]})}),e(pe,{mt:3}),e(gs,{})]})]})},wt=S(Ln,{baseStyle:{w:5,h:5}}),bs=()=>{const[t,n]=f.exports.useState(!1),{deletingUser:o,onDeletingUser:s,deleteUser:a}=z(),{t:i}=H(),l=we(),p=()=>{s(null)},g=()=>{o&&(n(!0),a(o).then(()=>{l({title:i("deleteUser.deleteSuccess",{username:o.username}),status:"success",isClosable:!0,position:"top",duration:3e3})}).then(p).finally(n.bind(null,!1)))};return r(ce,{isCentered:!0,isOpen:!!o,onClose:p,size:"sm",children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",children:[e(ue,{pt:6,children:e(ge,{color:"red",children:e(wt,{})})}),e(pe,{mt:3}),r(me,{children:[e(d,{fontWeight:"semibold",fontSize:"lg",children:i("deleteUser.title")}),o&&e(d,{mt:1,fontSize:"sm",_dark:{color:"gray.400"},color:"gray.600",children:e(Te,{components:{b:e("b",{})},children:i("deleteUser.prompt",{username:o.username})})})]}),r(Pe,{display:"flex",children:[e(P,{size:"sm",onClick:p,mr:3,w:"full",variant:"outline",children:i("cancel")}),e(P,{size:"sm",w:"full",colorScheme:"red",onClick:g,leftIcon:t?e(He,{size:"xs"}):void 0,children:i("delete")})]})]})]})},er={baseStyle:{w:4,h:4}},xs=S(An,er),ys=S(Fr,er),tr=S(Mt,er),Ss=Nr(t=>{z.getState().onFilterChange({...z.getState().filters,offset:0,search:t})},300),ws=({...t})=>{const{loading:n,filters:o,onFilterChange:s,refetchUsers:a,onCreateUser:i}=z(),{t:l}=H(),[p,g]=f.exports.useState(""),w=b=>{g(b.target.value),Ss(b.target.value)},x=()=>{g(""),s({...o,offset:0,search:""})};return r(Wr,{id:"filters",templateColumns:{lg:"repeat(3, 1fr)",md:"repeat(4, 1fr)",base:"repeat(1, 1fr)"},position:"sticky",top:0,mx:"-6",px:"6",rowGap:4,gap:{lg:4,base:0},bg:"var(--chakra-colors-chakra-body-bg)",py:4,zIndex:"docked",...t,children:[e(ut,{colSpan:{base:1,md:2,lg:1},order:{base:2,md:1},children:r(It,{children:[e(Tn,{pointerEvents:"none",children:e(xs,{})}),e($e,{placeholder:l("search"),value:p,borderColor:"light-border",onChange:w}),r(vt,{children:[n&&e(He,{size:"xs"}),o.search&&o.search.length>0&&e(V,{onClick:x,"aria-label":"clear",size:"xs",variant:"ghost",children:e(ys,{})})]})]})}),e(ut,{colSpan:2,order:{base:1,md:2},children:r(_,{justifyContent:"flex-end",alignItems:"center",h:"full",children:[e(V,{"aria-label":"refresh users",disabled:n,onClick:a,size:"sm",variant:"outline",children:e(tr,{className:bt({"animate-spin":n})})}),e(P,{colorScheme:"primary",size:"sm",onClick:()=>i(!0),px:5,children:l("createUser")})]})})]})},cn="https://github.com/Gozargah/Marzban",Cs="https://github.com/Gozargah",_s="https://github.com/Gozargah/Marzban#donation",dn=t=>{const{version:n}=z();return e(_,{w:"full",py:"0",position:"relative",...t,children:r(d,{display:"inline-block",flexGrow:1,textAlign:"center",color:"gray.500",fontSize:"xs",children:[e(lr,{color:"blue.400",href:cn,children:"Marzban"}),n?` (v${n}), `:", ","Made with \u2764\uFE0F in"," ",e(lr,{color:"blue.400",href:Cs,children:"Gozargah"})]})})},ks=S(Mn,{baseStyle:{w:4,h:4}}),hn=({actions:t})=>{const{i18n:n}=H();var o=s=>{n.changeLanguage(s)};return r(Or,{placement:"bottom-end",children:[e(Hr,{as:V,size:"sm",variant:"outline",icon:e(ks,{}),position:"relative"}),r(jr,{minW:"100px",zIndex:9999,children:[e(Se,{maxW:"100px",fontSize:"sm",onClick:()=>o("en"),children:"English"}),e(Se,{maxW:"100px",fontSize:"sm",onClick:()=>o("fa"),children:"\u0641\u0627\u0631\u0633\u06CC"}),e(Se,{maxW:"100px",fontSize:"sm",onClick:()=>o("zh-cn"),children:"\u7B80\u4F53\u4E2D\u6587"}),e(Se,{maxW:"100px",fontSize:"sm",onClick:()=>o("ru"),children:"\u0420\u0443\u0441\u0441\u043A\u0438\u0439"})]})]})},Is=async()=>await O("/admin"),vs=()=>{const{data:t,isError:n,isLoading:o,isSuccess:s,error:a}=Tt({queryFn:()=>Is()});return{userData:t||{discord_webook:"",is_sudo:!1,telegram_id:"",username:""},getUserIsPending:o,getUserIsSuccess:s,getUserIsError:n,getUserError:a}},Ce={baseStyle:{w:4,h:4}},Ds=S(Nn,Ce),zs=S(Pn,Ce),Us=S(Mr,Ce),Es=S(Fn,Ce),Rs=S(Wn,Ce),Ls=S(On,Ce),As=S(qt,Ce),Ts=S(Br,Ce),Ms=S(At,Ce),Ns=S($r,Ce),wr=S(v,{baseStyle:{bg:"yellow.500",w:"2",h:"2",rounded:"full",position:"absolute"}}),un="marzban-menu-notification",Ps=()=>{const t=localStorage.getItem(un);if(!t)return!0;try{return t&&jn(parseInt(t))?Bn(new Date,new Date(parseInt(t)))>=7:!0}catch{return!0}},Fs=({actions:t})=>{const{userData:n,getUserIsSuccess:o,getUserIsPending:s}=vs(),a=()=>!s&&o?n.is_sudo:!1,{onEditingHosts:i,onResetAllUsage:l,onEditingNodes:p,onShowingNodesUsage:g}=z(),{t:w}=H(),{colorMode:x,toggleColorMode:b}=Ze(),[h,m]=f.exports.useState(Ps()),I=x==="dark"?"dark_dimmed":x,C=()=>{localStorage.setItem(un,new Date().getTime().toString()),m(!1)};return r(_,{gap:2,justifyContent:"space-between",__css:{"& .menuList":{direction:"ltr"}},position:"relative",children:[e(d,{as:"h1",fontWeight:"semibold",fontSize:"2xl",children:w("users")}),h&&e(wr,{top:"0",right:"0",zIndex:9999}),e(v,{overflow:"auto",css:{direction:"rtl"},children:r(_,{alignItems:"center",children:[r(Or,{children:[e(Hr,{as:V,size:"sm",variant:"outline",icon:e(ie,{children:e(Es,{})}),position:"relative"}),r(jr,{minW:"170px",zIndex:99999,className:"menuList",children:[a()&&r(ie,{children:[e(Se,{maxW:"170px",fontSize:"sm",icon:e(As,{}),onClick:i.bind(null,!0),children:w("header.hostSettings")}),e(Se,{maxW:"170px",fontSize:"sm",icon:e(Ts,{}),onClick:p.bind(null,!0),children:w("header.nodeSettings")}),e(Se,{maxW:"170px",fontSize:"sm",icon:e(Ms,{}),onClick:g.bind(null,!0),children:w("header.nodesUsage")}),e(Se,{maxW:"170px",fontSize:"sm",icon:e(Ns,{}),onClick:l.bind(null,!0),children:w("resetAllUsage")})]}),e(cr,{to:_s,target:"_blank",children:r(Se,{maxW:"170px",fontSize:"sm",icon:e(Ls,{}),position:"relative",onClick:C,children:[w("header.donation")," ",h&&e(wr,{top:"3",right:"2"})]})}),e(cr,{to:"/login",children:e(Se,{maxW:"170px",fontSize:"sm",icon:e(Rs,{}),children:w("header.logout")})})]})]}),a()&&e(V,{size:"sm",variant:"outline","aria-label":"core settings",onClick:()=>{z.setState({isEditingCore:!0})},children:e(Us,{})}),e(hn,{}),e(V,{size:"sm",variant:"outline","aria-label":"switch theme",onClick:()=>{on(x=="dark"?"light":"dark"),b()},children:x==="light"?e(Ds,{}):e(zs,{})}),e(v,{css:{direction:"ltr"},display:"flex",alignItems:"center",pr:"2",__css:{"&  span":{display:"inline-flex"}},children:e(Hn,{href:cn,"data-color-scheme":`no-preference: ${I}; light: ${I}; dark: ${I};`,"data-size":"large","data-show-count":"true","aria-label":"Star Marzban on GitHub",children:"Star"})})]})})]})},Ws=[{title:"Inbound's default",value:"inbound_default"},{title:"TLS",value:"tls"},{title:"None",value:"none"}],Os=[{title:"",value:""},{title:"h3",value:"h3"},{title:"h2",value:"h2"},{title:"http/1.1",value:"http/1.1"},{title:"h3,h2,http/1.1",value:"h3,h2,http/1.1"},{title:"h3,h2",value:"h3,h2"},{title:"h2,http/1.1",value:"h2,http/1.1"}],Hs=[{title:"",value:""},...["chrome","firefox","safari","ios","android","edge","360","qq","random","randomized"].map(t=>({title:t,value:t}))],js=[{title:"none",value:""},{title:"xtls-rprx-vision",value:"xtls-rprx-vision"}],Bs=["aes-128-gcm","aes-256-gcm","chacha20-ietf-poly1305"],$s=Lt(t=>({isLoading:!1,isPostLoading:!1,hosts:{},fetchHosts:()=>{t({isLoading:!0}),O("/hosts").then(n=>t({hosts:n})).finally(()=>t({isLoading:!1}))},setHosts:n=>(t({isPostLoading:!0}),O("/hosts",{method:"PUT",body:n}).finally(()=>{t({isPostLoading:!1})}))}));const Vs=S(Fr,{baseStyle:{w:4,h:4}}),Me=$t.forwardRef(({disabled:t,step:n,label:o,className:s,startAdornment:a,endAdornment:i,type:l="text",placeholder:p,onChange:g,onBlur:w,name:x,value:b,onClick:h,error:m,clearable:I=!1,...C},A)=>{const u=()=>{g&&g({target:{value:"",name:x}})},{size:c="md"}=C,F=l=="number"?qn:$e,j=l=="number"?$n:$t.Fragment,D=l=="number"?{keepWithinRange:!0,precision:5,format:M=>isNaN(parseFloat(String(M)))||Number(parseFloat(String(M)).toFixed(5))===0?M:Number(parseFloat(String(M)).toFixed(5)),min:0,step:n,name:x,type:l,placeholder:p,onChange:M=>{g&&g(M)},onBlur:w,value:b,onClick:h,disabled:t,flexGrow:1,size:c}:{};return r(L,{isInvalid:!!m,children:[o&&e(B,{children:o}),r(It,{size:c,w:"full",rounded:"md",_focusWithin:{outline:"2px solid",outlineColor:"primary.200"},bg:t?"gray.100":"transparent",_dark:{bg:t?"gray.600":"transparent"},children:[a&&e(Vn,{children:a}),r(j,{...D,children:[e(F,{name:x,ref:A,step:n,className:bt(s),type:l,placeholder:p,onChange:g,onBlur:w,value:b,onClick:h,disabled:t,flexGrow:1,_focusVisible:{outline:"none",borderTopColor:"transparent",borderRightColor:"transparent",borderBottomColor:"transparent"},_disabled:{cursor:"not-allowed"},...C,roundedLeft:a?"0":"md",roundedRight:i?"0":"md"}),l=="number"&&e(ie,{children:r(Gn,{children:[e(Yn,{}),e(Zn,{})]})})]}),i&&e(Qn,{borderLeftRadius:0,borderRightRadius:"6px",bg:"transparent",children:i}),I&&b&&b.length&&e(vt,{borderLeftRadius:0,borderRightRadius:"6px",bg:"transparent",onClick:u,cursor:"pointer",children:e(Vs,{})})]}),!!m&&e(Dt,{children:m})]})}),Gs=S(Xn,{baseStyle:{w:5,h:5}}),Ys=S(Jn,{baseStyle:{w:5,h:5}}),Zs=S(Kn,{baseStyle:{w:5,h:5}}),Ot=S(Ne,{baseStyle:{bg:"white",_dark:{bg:"gray.700"}}}),Ae=S(Me,{baseStyle:{bg:"white",_dark:{bg:"gray.700"}}}),Qs=S(qt,{baseStyle:{w:5,h:5}}),Re=S(eo,{baseStyle:{w:4,h:4,color:"gray.400",cursor:"pointer"}}),qs=y.record(y.string().min(1),y.array(y.object({remark:y.string().min(1,"Remark is required"),address:y.string().min(1,"Address is required"),port:y.string().or(y.number()).nullable().transform(t=>typeof t=="number"?t:t!==null&&!isNaN(parseInt(t))?Number(parseInt(t)):null),path:y.string().nullable(),sni:y.string().nullable(),host:y.string().nullable(),mux_enable:y.boolean().default(!1),allowinsecure:y.boolean().nullable().default(!1),is_disabled:y.boolean().default(!0),fragment_setting:y.string().nullable(),noise_setting:y.string().nullable(),random_user_agent:y.boolean().default(!1),security:y.string(),alpn:y.string(),fingerprint:y.string()}))),xe=S(Dt,{baseStyle:{color:"red.400",display:"block",textAlign:"left",w:"100%"}}),Xs=({hostKey:t,isOpen:n,toggleAccordion:o})=>{const{inbounds:s}=z(),a=[...s.values()].flat().filter(u=>u.tag===t)[0],i=Xt(),{fields:l,append:p,remove:g,insert:w,move:x}=to({control:i.control,name:t}),{errors:b}=i.formState,{t:h}=H(),m=b[t],I=()=>{p({host:"",sni:"",port:null,path:null,address:"",remark:"",mux_enable:!1,allowinsecure:!1,is_disabled:!1,fragment_setting:"",noise_setting:"",random_user_agent:!1,security:"inbound_default",alpn:"",fingerprint:""})},C=u=>{if(u<0||u>=l.length)return;const c=l[u];w(u+1,c)};f.exports.useEffect(()=>{m&&!n&&o()},[m]);const A=(u,c)=>{c==="up"&&u>0?x(u,u-1):c==="down"&&u<l.length-1&&x(u,u+1)};return r(Ve,{border:"1px solid",_dark:{borderColor:"gray.600"},_light:{borderColor:"gray.200"},borderRadius:"4px",p:1,w:"full",children:[r(Ge,{px:2,borderRadius:"3px",onClick:o,children:[e(d,{as:"span",fontWeight:"medium",fontSize:"sm",flex:"1",textAlign:"left",color:"gray.700",_dark:{color:"gray.300"},children:t}),e(Vt,{})]}),e(Ye,{px:2,pb:2,children:r(N,{gap:3,children:[l.map((u,c)=>{var F,j,D,M,Y,Z,Q,ne,oe,U,W,X,R,K,le,J,_e,_t,Xe,kt,Je,Ke,et,tt,rt,k,T,ee,se,fe,ke,G,nt,ot,st,at,it,je,or,sr,ar;return e(ro.div,{layout:!0,initial:!1,animate:{opacity:1},exit:{opacity:0},transition:{layout:{type:"spring",stiffness:500,damping:30},opacity:{duration:.1}},id:u.id,whileDrag:{scale:1.05,zIndex:10},style:{width:"100%"},children:r(N,{id:u.id,border:"1px solid",_dark:{borderColor:"gray.600",bg:"#273142"},_light:{borderColor:"gray.200",bg:"#fcfbfb"},p:2,w:"full",borderRadius:"4px",children:[e(_,{w:"100%",alignItems:"flex-start",children:r(L,{position:"relative",zIndex:10,isInvalid:!!(m&&((F=m[c])==null?void 0:F.remark)),children:[r(It,{children:[e(Ae,{...i.register(t+"."+c+".remark"),size:"sm",borderRadius:"4px",placeholder:"Remark"}),e(vt,{children:r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(v,{mt:"-8px",children:e(Re,{})})}),e(De,{children:r(ze,{children:[e(Ue,{}),e(Ee,{}),e(dr,{children:r(v,{fontSize:"xs",children:[e(d,{pr:"20px",children:h("hostsDialog.desc")}),r(d,{children:[r(E,{children:["{","SERVER_IP","}"]})," ",h("hostsDialog.currentServer")]}),r(d,{mt:1,children:[r(E,{children:["{","SERVER_IPV6","}"]})," ",h("hostsDialog.currentServerv6")]}),r(d,{mt:1,children:[r(E,{children:["{","USERNAME","}"]})," ",h("hostsDialog.username")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_USAGE","}"]})," ",h("hostsDialog.dataUsage")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_LEFT","}"]})," ",h("hostsDialog.remainingData")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_LIMIT","}"]})," ",h("hostsDialog.dataLimit")]}),r(d,{mt:1,children:[r(E,{children:["{","DAYS_LEFT","}"]})," ",h("hostsDialog.remainingDays")]}),r(d,{mt:1,children:[r(E,{children:["{","EXPIRE_DATE","}"]})," ",h("hostsDialog.expireDate")]}),r(d,{mt:1,children:[r(E,{children:["{","JALALI_EXPIRE_DATE","}"]})," ",h("hostsDialog.jalaliExpireDate")]}),r(d,{mt:1,children:[r(E,{children:["{","TIME_LEFT","}"]})," ",h("hostsDialog.remainingTime")]}),r(d,{mt:1,children:[r(E,{children:["{","STATUS_TEXT","}"]})," ",h("hostsDialog.statusText")]}),r(d,{mt:1,children:[r(E,{children:["{","STATUS_EMOJI","}"]})," ",h("hostsDialog.statusEmoji")]}),r(d,{mt:1,children:[r(E,{children:["{","PROTOCOL","}"]})," ",h("hostsDialog.proxyProtocol")]}),r(d,{mt:1,children:[r(E,{children:["{","TRANSPORT","}"]})," ",h("hostsDialog.proxyMethod")]})]})})]})})]})})]}),m&&((j=m[c])==null?void 0:j.remark)&&e(xe,{children:(M=(D=m[c])==null?void 0:D.remark)==null?void 0:M.message})]})}),r(L,{isInvalid:!!(m&&((Y=m[c])==null?void 0:Y.address)),children:[r(It,{children:[e(Ae,{size:"sm",borderRadius:"4px",placeholder:"Address (e.g. example.com)",...i.register(t+"."+c+".address")}),e(vt,{children:r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(v,{mt:"-8px",children:e(Re,{})})}),e(De,{children:r(ze,{children:[e(Ue,{}),e(Ee,{}),e(dr,{children:r(v,{fontSize:"xs",children:[e(d,{pr:"20px",children:h("hostsDialog.desc")}),r(d,{children:[r(E,{children:["{","SERVER_IP","}"]})," ",h("hostsDialog.currentServer")]}),r(d,{mt:1,children:[r(E,{children:["{","SERVER_IPV6","}"]})," ",h("hostsDialog.currentServerv6")]}),r(d,{mt:1,children:[r(E,{children:["{","USERNAME","}"]})," ",h("hostsDialog.username")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_USAGE","}"]})," ",h("hostsDialog.dataUsage")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_LEFT","}"]})," ",h("hostsDialog.remainingData")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_LIMIT","}"]})," ",h("hostsDialog.dataLimit")]}),r(d,{mt:1,children:[r(E,{children:["{","DAYS_LEFT","}"]})," ",h("hostsDialog.remainingDays")]}),r(d,{mt:1,children:[r(E,{children:["{","EXPIRE_DATE","}"]})," ",h("hostsDialog.expireDate")]}),r(d,{mt:1,children:[r(E,{children:["{","JALALI_EXPIRE_DATE","}"]})," ",h("hostsDialog.jalaliExpireDate")]}),r(d,{mt:1,children:[r(E,{children:["{","TIME_LEFT","}"]})," ",h("hostsDialog.remainingTime")]}),r(d,{mt:1,children:[r(E,{children:["{","STATUS_TEXT","}"]})," ",h("hostsDialog.statusText")]}),r(d,{mt:1,children:[r(E,{children:["{","STATUS_EMOJI","}"]})," ",h("hostsDialog.statusEmoji")]}),r(d,{mt:1,children:[r(E,{children:["{","PROTOCOL","}"]})," ",h("hostsDialog.proxyProtocol")]}),r(d,{mt:1,children:[r(E,{children:["{","TRANSPORT","}"]})," ",h("hostsDialog.proxyMethod")]})]})})]})})]})})]}),m&&((Z=m[c])==null?void 0:Z.address)&&e(xe,{children:(ne=(Q=m[c])==null?void 0:Q.address)==null?void 0:ne.message})]}),e(yt,{w:"full",allowToggle:!0,children:r(Ve,{border:"0",children:[r("div",{style:{display:"flex",alignItems:"center"},children:[r(Ge,{display:"flex",px:0,py:1,borderRadius:3,_hover:{bg:"transparent"},children:[r(d,{flex:"3",align:"start",fontSize:"xs",color:"gray.600",_dark:{color:"gray.500"},pl:1,children:[h("hostsDialog.advancedOptions"),e(Vt,{fontSize:"sm",ml:1})]}),r(no,{flex:"1",px:"0",display:"contents",children:[e(ye,{control:i.control,name:`${t}.${c}.is_disabled`,render:({field:te})=>e(zt,{mx:"1.5",colorScheme:"primary",...te,value:void 0,isChecked:!te.value,onChange:ir=>{console.log(ir.target.checked),te.onChange(!ir.target.checked)}})}),e(re,{label:"Delete",placement:"top",children:e(V,{"aria-label":"Delete",size:"sm",colorScheme:"red",variant:"ghost",onClick:g.bind(null,c),children:e(wt,{})})})]})]}),e(re,{label:"Dublicate",placement:"top",children:e(V,{"aria-label":"Dublicate",size:"sm",colorScheme:"white",variant:"ghost",onClick:()=>C(c),children:e(Gs,{})})}),c<l.length-1&&e(re,{label:"Move Down",placement:"top",children:e(V,{"aria-label":"DownIcon",size:"sm",colorScheme:"white",variant:"ghost",onClick:()=>A(c,"down"),children:e(Zs,{})})}),c>0&&e(re,{label:"Move Up",placement:"top",children:e(V,{"aria-label":"UpIcon",size:"sm",colorScheme:"white",variant:"ghost",onClick:()=>A(c,"up"),children:e(Ys,{})})})]}),e(Ye,{w:"full",p:1,children:r(N,{w:"full",borderRadius:"4px",children:[r(L,{isInvalid:!!(m&&((oe=m[c])==null?void 0:oe.port)),children:[r(B,{display:"flex",pb:1,alignItems:"center",justifyContent:"space-between",gap:1,m:"0",children:[e("span",{children:h("hostsDialog.port")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.port.info")})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:String(a.port||"8080"),type:"number",...i.register(t+"."+c+".port")})]}),r(L,{isInvalid:!!(m&&((U=m[c])==null?void 0:U.sni)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.sni")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.sni.info")}),e(d,{fontSize:"xs",mt:"2",children:e(Te,{i18nKey:"hostsDialog.host.wildcard",components:{badge:e(E,{})}})}),e(d,{fontSize:"xs",children:e(Te,{i18nKey:"hostsDialog.host.multiHost",components:{badge:e(E,{})}})})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"SNI (e.g. example.com)",...i.register(t+"."+c+".sni")}),m&&((W=m[c])==null?void 0:W.sni)&&e(xe,{children:(R=(X=m[c])==null?void 0:X.sni)==null?void 0:R.message})]}),r(L,{isInvalid:!!(m&&((K=m[c])==null?void 0:K.host)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.host")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.host.info")}),e(d,{fontSize:"xs",mt:"2",children:e(Te,{i18nKey:"hostsDialog.host.wildcard",components:{badge:e(E,{})}})}),e(d,{fontSize:"xs",children:e(Te,{i18nKey:"hostsDialog.host.multiHost",components:{badge:e(E,{})}})})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"Host (e.g. example.com)",...i.register(t+"."+c+".host")}),m&&((le=m[c])==null?void 0:le.host)&&e(xe,{children:(_e=(J=m[c])==null?void 0:J.host)==null?void 0:_e.message})]}),r(L,{isInvalid:!!(m&&((_t=m[c])==null?void 0:_t.path)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.path")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.path.info")})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"path (e.g. /vless)",...i.register(t+"."+c+".path")}),m&&((Xe=m[c])==null?void 0:Xe.path)&&e(xe,{children:(Je=(kt=m[c])==null?void 0:kt.path)==null?void 0:Je.message})]}),r(L,{height:"66px",children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.security")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.security.info")})]})})]})]}),e(Ot,{size:"sm",...i.register(t+"."+c+".security"),children:Ws.map(te=>e("option",{value:te.value,children:te.title},te.value))})]}),r(L,{height:"66px",children:[e(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:e("span",{children:h("hostsDialog.alpn")})}),e(Ot,{size:"sm",...i.register(t+"."+c+".alpn"),children:Os.map(te=>e("option",{value:te.value,children:te.title},te.value))})]}),r(L,{height:"66px",children:[e(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:e("span",{children:h("hostsDialog.fingerprint")})}),e(Ot,{size:"sm",...i.register(t+"."+c+".fingerprint"),children:Hs.map(te=>e("option",{value:te.value,children:te.title},te.value))})]}),r(L,{isInvalid:!!(m&&((Ke=m[c])==null?void 0:Ke.fragment_setting)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.fragment")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.fragment.info")}),e(d,{fontSize:"xs",pr:5,pt:2,pb:1,children:h("hostsDialog.fragment.info.examples")}),e(d,{fontSize:"xs",pr:5,children:"100-200,10-20,tlshello"}),e(d,{fontSize:"xs",pr:5,children:"100-200,10-20,1-3"}),e(d,{fontSize:"xs",pr:5,pt:"3",children:h("hostsDialog.fragment.info.attention")})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"Fragment settings by pattern",...i.register(t+"."+c+".fragment_setting")}),m&&((et=m[c])==null?void 0:et.fragment_setting)&&e(xe,{children:(rt=(tt=m[c])==null?void 0:tt.fragment_setting)==null?void 0:rt.message})]}),r(L,{isInvalid:!!(m&&((k=m[c])==null?void 0:k.noise_setting)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.noise")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.noise.info")}),e(d,{fontSize:"xs",pr:5,pt:2,pb:1,children:h("hostsDialog.noise.info.examples")}),e(d,{fontSize:"xs",pr:5,children:"rand:10-20,10-20"}),e(d,{fontSize:"xs",pr:5,children:"rand:10-20,10-20&base64:7nQBAAABAAAAAAAABnQtcmluZwZtc2VkZ2UDbmV0AAABAAE=,10-25"}),e(d,{fontSize:"xs",pr:5,pt:"3",children:h("hostsDialog.noise.info.attention")})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"Noise settings by pattern",...i.register(t+"."+c+".noise_setting")}),m&&((T=m[c])==null?void 0:T.noise_setting)&&e(xe,{children:(se=(ee=m[c])==null?void 0:ee.noise_setting)==null?void 0:se.message})]}),e(L,{isInvalid:!!(m&&((fe=m[c])==null?void 0:fe.allowinsecure)),children:r(pt,{...i.register(t+"."+c+".allowinsecure"),name:t+"."+c+".allowinsecure",children:[e(B,{children:h("hostsDialog.allowinsecure")}),m&&((ke=m[c])==null?void 0:ke.allowinsecure)&&e(xe,{children:(nt=(G=m[c])==null?void 0:G.allowinsecure)==null?void 0:nt.message})]})}),r(L,{isInvalid:!!(m&&((ot=m[c])==null?void 0:ot.mux_enable)),children:[e(pt,{...i.register(t+"."+c+".mux_enable"),children:e(B,{children:h("hostsDialog.muxEnable")})}),m&&((st=m[c])==null?void 0:st.mux_enable)&&e(xe,{children:(it=(at=m[c])==null?void 0:at.mux_enable)==null?void 0:it.message})]}),r(L,{isInvalid:!!(m&&((je=m[c])==null?void 0:je.random_user_agent)),children:[e(pt,{...i.register(t+"."+c+".random_user_agent"),children:e(B,{children:h("hostsDialog.randomUserAgent")})}),m&&((or=m[c])==null?void 0:or.random_user_agent)&&e(xe,{children:(ar=(sr=m[c])==null?void 0:sr.random_user_agent)==null?void 0:ar.message})]})]},c)})]})})]},u.id)},u.id)}),e(P,{variant:"outline",w:"full",size:"sm",color:"",fontWeight:"normal",onClick:I,children:h("hostsDialog.addHost")})]})})]})},Js=()=>{const{isEditingHosts:t,onEditingHosts:n,refetchUsers:o,inbounds:s}=z(),{isLoading:a,hosts:i,fetchHosts:l,isPostLoading:p,setHosts:g}=$s(),w=we(),{t:x}=H(),[b,h]=f.exports.useState({});f.exports.useEffect(()=>{t&&l()},[t]);const m=Qe({resolver:xt(qs)});f.exports.useEffect(()=>{i&&t&&m.reset(i)},[i]);const I=()=>{h({}),n(!1)},C=u=>{g(u).then(()=>{w({title:x("hostsDialog.savedSuccess"),status:"success",isClosable:!0,position:"top",duration:3e3}),o()}).catch(c=>{var F,j,D,M,Y;(((F=c==null?void 0:c.response)==null?void 0:F.status)===409||((j=c==null?void 0:c.response)==null?void 0:j.status)===400)&&w({title:(M=(D=c.response)==null?void 0:D._data)==null?void 0:M.detail,status:"error",isClosable:!0,position:"top",duration:3e3}),((Y=c==null?void 0:c.response)==null?void 0:Y.status)===422&&Object.keys(c.response._data.detail).forEach(Z=>{w({title:c.response._data.detail[Z]+" ("+Z+")",status:"error",isClosable:!0,position:"top",duration:3e3})})})},A=u=>{b[String(u)]?delete b[String(u)]:b[String(u)]={},h({...b})};return r(ce,{isOpen:t,onClose:I,children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",w:"fit-content",maxW:"3xl",children:[e(ue,{pt:6,children:e(ge,{color:"primary",children:e(Qs,{color:"white"})})}),e(pe,{mt:3}),e(me,{w:"440px",pb:3,pt:3,children:e(Vr,{...m,children:r("form",{onSubmit:m.handleSubmit(C),children:[e(d,{mb:3,opacity:.8,fontSize:"sm",children:x("hostsDialog.title")}),a&&x("hostsDialog.loading"),!a&&i&&(Object.keys(i).length>0?e(yt,{w:"full",allowToggle:!0,allowMultiple:!0,index:Object.keys(b).map(u=>parseInt(u)),children:e(N,{w:"full",children:Object.keys(i).map((u,c)=>e(Xs,{toggleAccordion:()=>A(c),isOpen:b[String(c)],hostKey:u},u))})}):"No inbound found. Please check your Xray config file."),e(_,{justifyContent:"flex-end",py:2,children:e(P,{variant:"solid",mt:"2",type:"submit",colorScheme:"primary",size:"sm",px:5,isLoading:p,disabled:p,children:x("hostsDialog.apply")})})]})})})]})]})},rr=(t,n,o)=>{if(t.response&&t.response._data){if(typeof t.response._data.detail=="string")return n({title:t.response._data.detail,status:"error",isClosable:!0,position:"top",duration:3e3});if(typeof t.response._data.detail=="object"&&o){Object.keys(t.response._data.detail).forEach(s=>o.setError(s,{message:t.response._data.detail[s]}));return}}return n({title:"Something went wrong!",status:"error",isClosable:!0,position:"top",duration:3e3})},nr=(t,n)=>n({title:t,status:"success",isClosable:!0,position:"top",duration:3e3}),Ks=({deleteCallback:t})=>{const{deleteNode:n,deletingNode:o,setDeletingNode:s}=St(),{t:a}=H(),i=we(),l=Jt(),p=()=>{s(null)},{isLoading:g,mutate:w}=mt(n,{onSuccess:()=>{nr(a("deleteNode.deleteSuccess",{name:o&&o.name}),i),s(null),l.invalidateQueries(ft),t&&t()},onError:x=>{rr(x,i)}});return r(ce,{isCentered:!0,isOpen:!!o,onClose:p,size:"sm",children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",children:[e(ue,{pt:6,children:e(ge,{color:"red",children:e(wt,{})})}),e(pe,{mt:3}),r(me,{children:[e(d,{fontWeight:"semibold",fontSize:"lg",children:a("deleteNode.title")}),o&&e(d,{mt:1,fontSize:"sm",_dark:{color:"gray.400"},color:"gray.600",children:e(Te,{components:{b:e("b",{})},children:a("deleteNode.prompt",{name:o.name})})})]}),r(Pe,{display:"flex",children:[e(P,{size:"sm",onClick:p,mr:3,w:"full",variant:"outline",children:a("cancel")}),e(P,{size:"sm",w:"full",colorScheme:"red",onClick:()=>w(),leftIcon:g?e(He,{size:"xs"}):void 0,children:a("delete")})]})]})]})},Ct={baseStyle:{strokeWidth:"2px",w:4,h:4}},Cr=S(oo,Ct),ea=S(so,Ct),_r=S(ao,Ct),kr=S(Gr,Ct),ta=S(Gr,Ct),Zt=[{title:"No",value:"no_reset"},{title:"Daily",value:"day"},{title:"Weekly",value:"week"},{title:"Monthly",value:"month"},{title:"Annually",value:"year"}],Oe={active:{statusColor:"green",bandWidthColor:"primary",icon:Cr},connected:{statusColor:"green",bandWidthColor:"primary",icon:Cr},disabled:{statusColor:"gray",bandWidthColor:"gray",icon:ea},expired:{statusColor:"orange",bandWidthColor:"orange",icon:kr},on_hold:{statusColor:"purple",bandWidthColor:"purple",icon:ta},connecting:{statusColor:"orange",bandWidthColor:"orange",icon:kr},limited:{statusColor:"red",bandWidthColor:"red",icon:_r},error:{statusColor:"red",bandWidthColor:"red",icon:_r}},Nt=t=>{let n={status:"",time:""};if(t){$(t*1e3).utc().isAfter($().utc())?n.status="expires":n.status="expired";const o=[],s=$.duration($(t*1e3).utc().diff($()));s.years()!=0&&o.push(Math.abs(s.years())+" year"+(Math.abs(s.years())!=1?"s":"")),s.months()!=0&&o.push(Math.abs(s.months())+" month"+(Math.abs(s.months())!=1?"s":"")),s.days()!=0&&o.push(Math.abs(s.days())+" day"+(Math.abs(s.days())!=1?"s":"")),o.length===0&&(s.hours()!=0&&o.push(Math.abs(s.hours())+" hour"+(Math.abs(s.hours())!=1?"s":"")),s.minutes()!=0&&o.push(Math.abs(s.minutes())+" min"+(Math.abs(s.minutes())!=1?"s":""))),n.time=o.join(", ")}return n},ra=({expiryDate:t,status:n,compact:o=!1,showDetail:s=!0,extraText:a})=>{const{t:i}=H(),l=Nt(t),p=Oe[n].icon;return r(ie,{children:[r(E,{colorScheme:Oe[n].statusColor,rounded:"full",display:"inline-flex",px:3,py:1,columnGap:o?1:2,alignItems:"center",children:[e(p,{w:o?3:4}),s&&r(d,{textTransform:"capitalize",fontSize:o?".7rem":".875rem",lineHeight:o?"1rem":"1.25rem",fontWeight:"medium",letterSpacing:"tighter",children:[n&&i(`nodeModal.status.${n}`),a&&`: ${a}`]})]}),s&&t&&e(d,{display:"inline-block",fontSize:"xs",fontWeight:"medium",ml:"2",color:"gray.600",_dark:{color:"gray.400"},children:i(l.status,{time:l.time})})]})},ct=S(Me,{baseStyle:{bg:"white",_dark:{bg:"gray.700"}}}),na=S(Br,{baseStyle:{w:5,h:5}}),oa=S(io,{baseStyle:{w:5,h:5,strokeWidth:2}}),sa=({toggleAccordion:t,node:n})=>{const{updateNode:o,reconnectNode:s,setDeletingNode:a}=St(),{t:i}=H(),l=Jt(),p=we(),g=Qe({defaultValues:n,resolver:xt(an)}),w=a.bind(null,n),{isLoading:x,mutate:b}=mt(o,{onSuccess:()=>{nr("Node updated successfully",p),l.invalidateQueries(ft)},onError:C=>{rr(C,p,g)}}),{isLoading:h,mutate:m}=mt(s.bind(null,n),{onSuccess:()=>{l.invalidateQueries(ft)}}),I=h?"connecting":n.status?n.status:"error";return r(Ve,{border:"1px solid",_dark:{borderColor:"gray.600"},_light:{borderColor:"gray.200"},borderRadius:"4px",p:1,w:"full",children:[r(Ge,{px:2,borderRadius:"3px",onClick:t,children:[r(_,{w:"full",justifyContent:"space-between",pr:2,children:[e(d,{as:"span",fontWeight:"medium",fontSize:"sm",flex:"1",textAlign:"left",color:"gray.700",_dark:{color:"gray.300"},children:n.name}),r(_,{children:[n.xray_version&&e(E,{colorScheme:"blue",rounded:"full",display:"inline-flex",px:3,py:1,children:r(d,{textTransform:"capitalize",fontSize:"0.7rem",fontWeight:"medium",letterSpacing:"tighter",children:["Xray ",n.xray_version]})}),n.status&&e(ra,{status:I,compact:!0})]})]}),e(Vt,{})]}),r(Ye,{px:2,pb:2,children:[e(N,{pb:3,alignItems:"flex-start",children:I==="error"&&e(gt,{status:"error",size:"xs",children:r(v,{children:[r(_,{w:"full",children:[e(Ut,{w:4}),e(d,{marginInlineEnd:0,children:n.message})]}),e(_,{justifyContent:"flex-end",w:"full",children:e(P,{size:"sm","aria-label":"reconnect node",leftIcon:e(tr,{}),onClick:()=>m(),disabled:h,children:i(h?"nodes.reconnecting":"nodes.reconnect")})})]})})}),e(pn,{form:g,mutate:b,isLoading:x,submitBtnText:i("nodes.editNode"),btnLeftAdornment:e(re,{label:i("delete"),placement:"top",children:e(V,{colorScheme:"red",variant:"ghost",size:"sm","aria-label":"delete node",onClick:w,children:e(wt,{})})})})]})]})},aa=({toggleAccordion:t,resetAccordions:n})=>{const o=we(),{t:s}=H(),a=Jt(),{addNode:i}=St(),l=Qe({resolver:xt(an),defaultValues:{...ls(),add_as_new_host:!1}}),{isLoading:p,mutate:g}=mt(i,{onSuccess:()=>{nr(s("nodes.addNodeSuccess",{name:l.getValues("name")}),o),a.invalidateQueries(ft),l.reset(),n()},onError:w=>{rr(w,o,l)}});return r(Ve,{border:"1px solid",_dark:{borderColor:"gray.600"},_light:{borderColor:"gray.200"},borderRadius:"4px",p:1,w:"full",children:[e(Ge,{px:2,borderRadius:"3px",onClick:t,children:r(d,{as:"span",fontWeight:"medium",fontSize:"sm",flex:"1",textAlign:"left",color:"gray.700",_dark:{color:"gray.300"},display:"flex",gap:1,children:[e(oa,{display:"inline-block"})," ",e("span",{children:s("nodes.addNewMarzbanNode")})]})}),e(Ye,{px:2,py:4,children:e(pn,{form:l,mutate:g,isLoading:p,submitBtnText:s("nodes.addNode"),btnProps:{variant:"solid"},addAsHost:!0})})]})},pn=({form:t,mutate:n,isLoading:o,submitBtnText:s,btnProps:a={},btnLeftAdornment:i,addAsHost:l=!1})=>{var m,I,C,A,u,c,F,j,D,M,Y,Z,Q,ne,oe;const{t:p}=H(),[g,w]=f.exports.useState(!1),{data:x,isLoading:b}=Tt({queryKey:"node-settings",queryFn:()=>O("/node/settings")});function h(U){if(document.body.createTextRange){const W=document.body.createTextRange();W.moveToElementText(U),W.select()}else if(window.getSelection){const W=window.getSelection(),X=document.createRange();X.selectNodeContents(U),W.removeAllRanges(),W.addRange(X)}else console.warn("Could not select text in node: Unsupported browser.")}return e("form",{onSubmit:t.handleSubmit(U=>n(U)),children:r(N,{children:[x&&x.certificate&&e(gt,{status:"info",alignItems:"start",children:r(Yr,{display:"flex",flexDirection:"column",overflow:"hidden",children:[e("span",{children:p("nodes.connection-hint")}),r(_,{justify:"end",py:2,children:[e(P,{as:"a",colorScheme:"primary",size:"xs",download:"ssl_client_cert.pem",href:URL.createObjectURL(new Blob([x.certificate],{type:"text/plain"})),children:p("nodes.download-certificate")}),e(re,{placement:"top",label:p("nodes.show-certificate"),children:e(V,{"aria-label":p("nodes.show-certificate"),onClick:w.bind(null,!g),colorScheme:"whiteAlpha",color:"primary",size:"xs",children:g?e(co,{width:"15px"}):e(lo,{width:"15px"})})})]}),e(Zr,{in:g,animateOpacity:!0,children:e(d,{bg:"rgba(255,255,255,.5)",_dark:{bg:"rgba(255,255,255,.2)"},rounded:"md",p:"2",lineHeight:"1.2",fontSize:"10px",fontFamily:"Courier",whiteSpace:"pre",overflow:"auto",onClick:U=>{h(U.target)},children:x.certificate})})]})}),r(_,{w:"full",children:[e(L,{children:e(ct,{label:p("nodes.nodeName"),size:"sm",placeholder:"Marzban-S2",...t.register("name"),error:(C=(I=(m=t.formState)==null?void 0:m.errors)==null?void 0:I.name)==null?void 0:C.message})}),e(_,{px:1,children:e(ye,{name:"status",control:t.control,render:({field:U})=>e(re,{placement:"top",label:`${p("usersTable.status")}: `+(U.value!=="disabled"?p("active"):p("disabled")),textTransform:"capitalize",children:e(v,{mt:"6",children:e(zt,{colorScheme:"primary",isChecked:U.value!=="disabled",onChange:W=>{W.target.checked?U.onChange("connecting"):U.onChange("disabled")}})})},U.value)})})]}),e(_,{alignItems:"flex-start",w:"100%",children:e(v,{w:"100%",children:e(ct,{label:p("nodes.nodeAddress"),size:"sm",placeholder:"51.20.12.13",...t.register("address"),error:(c=(u=(A=t.formState)==null?void 0:A.errors)==null?void 0:u.address)==null?void 0:c.message})})}),r(_,{alignItems:"flex-start",w:"100%",children:[e(v,{children:e(ct,{label:p("nodes.nodePort"),size:"sm",placeholder:"62050",...t.register("port"),error:(D=(j=(F=t.formState)==null?void 0:F.errors)==null?void 0:j.port)==null?void 0:D.message})}),e(v,{children:e(ct,{label:p("nodes.nodeAPIPort"),size:"sm",placeholder:"62051",...t.register("api_port"),error:(Z=(Y=(M=t.formState)==null?void 0:M.errors)==null?void 0:Y.api_port)==null?void 0:Z.message})}),e(v,{children:e(ct,{label:p("nodes.usageCoefficient"),size:"sm",placeholder:"1",...t.register("usage_coefficient"),error:(oe=(ne=(Q=t.formState)==null?void 0:Q.errors)==null?void 0:ne.usage_coefficient)==null?void 0:oe.message})})]}),l&&e(L,{py:1,children:e(pt,{...t.register("add_as_new_host"),children:e(B,{m:0,children:p("nodes.addHostForEveryInbound")})})}),r(_,{w:"full",children:[i,e(P,{flexGrow:1,type:"submit",colorScheme:"primary",size:"sm",px:5,w:"full",isLoading:o,...a,children:s})]})]})})},ia=()=>{const{isEditingNodes:t,onEditingNodes:n}=z(),{t:o}=H(),[s,a]=f.exports.useState({}),{data:i,isLoading:l}=ln(),p=()=>{a({}),n(!1)},g=w=>{s[String(w)]?delete s[String(w)]:s[String(w)]={},a({...s})};return r(ie,{children:[r(ce,{isOpen:t,onClose:p,children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",w:"fit-content",maxW:"3xl",children:[e(ue,{pt:6,children:e(ge,{color:"primary",children:e(na,{color:"white"})})}),e(pe,{mt:3}),r(me,{w:"440px",pb:6,pt:3,children:[e(d,{mb:3,opacity:.8,fontSize:"sm",children:o("nodes.title")}),l&&"loading...",e(yt,{w:"full",allowToggle:!0,index:Object.keys(s).map(w=>parseInt(w)),children:r(N,{w:"full",children:[!l&&i&&i.map((w,x)=>e(sa,{toggleAccordion:()=>g(x),node:w},w.name)),e(aa,{toggleAccordion:()=>g((i||[]).length),resetAccordions:()=>a({})})]})})]})]})]}),e(Ks,{deleteCallback:()=>a({})})]})};function la(t){const n=360/t,o=90,s=47,a=[];for(let i=0;i<t;i++){const l=i*n%360+140,p=ca(l,o,s);a.push(p)}return a}function ca(t,n,o){t/=360,n/=100,o/=100;let s,a,i;if(n===0)s=a=i=o;else{const p=(x,b,h)=>(h<0&&(h+=1),h>1&&(h-=1),h<.16666666666666666?x+(b-x)*6*h:h<.5?b:h<.6666666666666666?x+(b-x)*(.6666666666666666-h)*6:x),g=o<.5?o*(1+n):o+n-o*n,w=2*o-g;s=Math.round(p(w,g,t+1/3)*255),a=Math.round(p(w,g,t)*255),i=Math.round(p(w,g,t-1/3)*255)}const l=p=>{const g=p.toString(16);return g.length===1?"0"+g:g};return`#${l(s)}${l(a)}${l(i)}`}const Ir=({border:t,...n})=>{const{getInputProps:o,getRadioProps:s}=bo(n),a=We({base:"xs",md:"sm"});return r(v,{as:"label",children:[e("input",{...o()}),e(v,{...s(),minW:"48px",w:"full",h:"full",textAlign:"center",cursor:"pointer",fontSize:a,borderWidth:t?"1px":"0px",borderRadius:"md",_checked:{bg:"primary.500",color:"white",borderColor:"primary.500"},_focus:{boxShadow:"outline"},px:3,py:1,children:n.children})]})},mn=({onChange:t,defaultValue:n,...o})=>{const{t:s,i18n:a}=H();Ze();const i=We({base:["7h","1d","3d","1w"],md:["7h","1d","3d","1w","1m","3m"]}),l={h:"hour",d:"day",w:"week",m:"month",y:"year"},p=We({base:[{title:"hours",options:["1h","3h","6h","12h"]},{title:"days",options:["1d","2d","3d","4d"]},{title:"weeks",options:["1w","2w","3w","4w"]},{title:"months",options:["1m","2m","3m","6m"]}],md:[{title:"hours",options:["1h","2h","3h","6h","8h","12h"]},{title:"days",options:["1d","2d","3d","4d","5d","6d"]},{title:"weeks",options:["1w","2w","3w","4w"]},{title:"months",options:["1m","2m","3m","6m","8m"]}]}),{getRootProps:g,getRadioProps:w,setValue:x}=ho({name:"filter",defaultValue:n,onChange:U=>{if(U==="custom")return;m(),i.indexOf(U)>=0?(A(s("userDialog.custom")),c(!1)):(A(s("userDialog.custom")+` (${U})`),c(!0));const W=Number(U.substring(0,U.length-1)),X=l[U[U.length-1]];t(U,{start:$().utc().subtract(W,X).format("YYYY-MM-DDTHH:00:00")})}}),{isOpen:b,onOpen:h,onClose:m}=uo(),I=f.exports.useRef(null);po({ref:I,handler:m});const[C,A]=f.exports.useState(s("userDialog.custom")),[u,c]=f.exports.useState(!1),[F,j]=f.exports.useState(0),D=We({base:1,md:2}),M=We({base:"xs",md:"sm"}),[Y,Z]=f.exports.useState(null),[Q,ne]=f.exports.useState(null),oe=U=>{const[W,X]=U;Q&&!X?(Z(null),ne(null)):(Z(W),ne(X),W&&X&&(m(),t("custom",{start:$(W).format("YYYY-MM-DDT00:00:00"),end:$(X).format("YYYY-MM-DDT23:59:59")})))};return r(N,{...o,children:[F==0&&r(Kt,{...g(),gap:0,display:"flex",borderWidth:"1px",borderRadius:"md",minW:{base:"320px",md:"400px"},children:[i.map(U=>e(Ir,{...w({value:U}),children:U},U)),e(v,{onClick:()=>{Z(null),ne(null),h()},cursor:"pointer",borderRadius:"md",w:"full",fontSize:M,px:3,py:1,bg:u?"primary.500":"unset",color:u?"white":"unset",borderColor:u?"primary.500":"unset",children:r(_,{children:[e(d,{children:C}),e(Pt,{as:hr,boxSize:"18px"})]})})]}),F==1&&r(_,{onClick:h,cursor:"pointer",fontSize:M,borderRadius:"md",px:3,py:1,minW:{base:"320px",md:"400px"},borderWidth:"1px",children:[e(d,{w:"full",color:Y?"unset":"gray.500",children:Y?$(Y).format("YYYY-MM-DD (00:00)"):s("userDialog.startDate")}),e(Pt,{as:Qr,boxSize:"18px"}),e(d,{w:"full",color:Q?"unset":"gray.500",children:Q?$(Q).format("YYYY-MM-DD (23:59)"):s("userDialog.endDate")}),e(Pt,{as:hr,boxSize:"18px"})]}),e(N,{ref:I,marginTop:"40px !important",borderRadius:"md",borderWidth:"1px",position:"absolute",zIndex:"1",backgroundColor:"white",_dark:{backgroundColor:"gray.700"},display:b?"unset":"none",children:r(mo,{onChange:U=>j(U),children:[r(go,{children:[e(ur,{fontSize:M,children:s("userDialog.relative")}),e(ur,{fontSize:M,children:s("userDialog.absolute")})]}),r(fo,{children:[e(pr,{children:p.map(U=>e(N,{alignItems:"start",pl:2,pr:2,children:r(_,{justifyItems:"flex-start",mb:4,children:[e(d,{fontSize:M,minW:"60px",children:s("userDialog."+U.title)}),U.options.map(W=>e(Ir,{border:!0,...w({value:W}),children:W},W+".custom"))]})},U.title))}),e(pr,{className:"datepicker-panel",children:e(N,{children:e(qr,{locale:a.language.toLocaleLowerCase(),selected:Y,onChange:oe,startDate:Y,endDate:Q,selectsRange:!0,maxDate:new Date,monthsShown:D,peekNextMonth:!1,inline:!0})})})]})]})})]})};function Rt(t,n,o=[],s=[]){const a=ae(o.reduce((i,l)=>i+=l,0));return{series:o,options:{labels:s,chart:{width:"100%",height:"100%",type:"donut",animations:{enabled:!1}},title:{text:`${n}${a}`,align:"center",style:{fontWeight:"var(--chakra-fontWeights-medium)",color:t==="dark"?"var(--chakra-colors-gray-300)":void 0}},legend:{position:"bottom",labels:{colors:t==="dark"?"#CBD5E0":void 0,useSeriesColors:!1}},stroke:{width:1,colors:void 0},dataLabels:{formatter:(i,{seriesIndex:l,w:p})=>ae(p.config.series[l],1)},tooltip:{custom:({series:i,seriesIndex:l,dataPointIndex:p,w:g})=>{const w=ae(i[l],1),x=Math.max(i.reduce((h,m)=>h+=m),1),b=Math.round(i[l]/x*1e3)/10+"%";return`
+import{i as Bt,B as gn,a as fn,b as bn,j as Tr,d as $,U as Qt,z as xn,r as yn,f as Sn,Q as wn,e as Cn,$ as _n,c as Lt,g as S,h as kn,C as In,k as At,u as Tt,l as H,m as r,H as _,n as e,T as d,o as vn,p as v,s as Dn,q as f,t as Ze,J as zn,v as y,w as Mr,A as Mt,x as Un,y as En,M as ce,D as de,E as he,F as ue,G as pe,I as we,K as Qe,L as Nr,N as Rn,O as mt,P as me,R as L,S as B,V as Pr,W as re,X as E,Y as ye,Z as V,_ as Ne,a0 as Pe,a1 as P,a2 as bt,a3 as lt,a4 as Ln,a5 as Te,a6 as He,a7 as An,a8 as Fr,a9 as Wr,aa as ut,ab as It,ac as Tn,ad as $e,ae as vt,af as lr,ag as Mn,ah as Or,ai as Hr,aj as jr,ak as Se,al as Nn,am as Pn,an as Fn,ao as Wn,ap as On,aq as qt,ar as Br,as as $r,at as ie,au as cr,av as Hn,aw as jn,ax as Bn,ay as $t,az as $n,aA as Vn,aB as Gn,aC as Yn,aD as Zn,aE as Qn,aF as Dt,aG as qn,aH as Xn,aI as Jn,aJ as Kn,aK as eo,aL as xt,aM as Vr,aN as yt,aO as N,aP as Xt,aQ as to,aR as Ve,aS as Ge,aT as Vt,aU as Ye,aV as ro,aW as Ie,aX as ve,aY as De,aZ as ze,a_ as Ue,a$ as Ee,b0 as dr,b1 as no,b2 as zt,b3 as pt,b4 as Jt,b5 as oo,b6 as so,b7 as ao,b8 as Gr,b9 as io,ba as gt,bb as Ut,bc as Yr,bd as lo,be as co,bf as Zr,bg as We,bh as ho,bi as uo,bj as po,bk as Kt,bl as Pt,bm as hr,bn as Qr,bo as mo,bp as go,bq as ur,br as fo,bs as pr,bt as qr,bu as bo,bv as Xr,bw as xo,bx as yo,by as Jr,bz as So,bA as wo,bB as Kr,bC as en,bD as tn,bE as q,bF as Co,bG as rn,bH as Ft,bI as _o,bJ as ko,bK as Io,bL as vo,bM as Do,bN as zo,bO as nn,bP as Uo,bQ as mr,bR as gr,bS as Be,bT as Le,bU as fr,bV as be,bW as br,bX as Eo,bY as Ro,bZ as Lo,b_ as Ao,b$ as To,c0 as Mo,c1 as No,c2 as Po,c3 as Fo,c4 as Wo,c5 as Oo,c6 as Ho,c7 as jo,c8 as Bo,c9 as $o,ca as Vo,cb as Go}from"./vendor.3f3f0bc0.js";(function(){const n=document.createElement("link").relList;if(n&&n.supports&&n.supports("modulepreload"))return;for(const a of document.querySelectorAll('link[rel="modulepreload"]'))s(a);new MutationObserver(a=>{for(const i of a)if(i.type==="childList")for(const l of i.addedNodes)l.tagName==="LINK"&&l.rel==="modulepreload"&&s(l)}).observe(document,{childList:!0,subtree:!0});function o(a){const i={};return a.integrity&&(i.integrity=a.integrity),a.referrerpolicy&&(i.referrerPolicy=a.referrerpolicy),a.crossorigin==="use-credentials"?i.credentials="include":a.crossorigin==="anonymous"?i.credentials="omit":i.credentials="same-origin",i}function s(a){if(a.ep)return;a.ep=!0;const i=o(a);fetch(a.href,i)}})();Bt.use(gn).use(fn).use(bn).init({debug:{}.NODE_ENV==="development",returnNull:!1,fallbackLng:"en",interpolation:{escapeValue:!1},react:{useSuspense:!1},load:"languageOnly",detection:{caches:["localStorage","sessionStorage","cookie"]},backend:{loadPath:Tr(["/","statics/locales/{{lng}}.json"])}},function(t,n){$.locale(Bt.language)});Bt.on("languageChanged",t=>{$.locale(t)});Qt("zh-cn",xn);Qt("ru",yn);Qt("fa",Sn);const Gt=new wn,on=t=>{const n=document.querySelector('meta[name="theme-color"]');n==null||n.setAttribute("content",t=="dark"?"#1A202C":"#3B81F6")},Yo=Cn({shadows:{outline:"0 0 0 2px var(--chakra-colors-primary-200)"},fonts:{body:"Inter,-apple-system,BlinkMacSystemFont,Segoe UI,Roboto,Oxygen,Ubuntu,Cantarell,Fira Sans,Droid Sans,Helvetica Neue,sans-serif"},colors:{"light-border":"#d2d2d4",primary:{50:"#9cb7f2",100:"#88a9ef",200:"#749aec",300:"#618ce9",400:"#4d7de7",500:"#396fe4",600:"#3364cd",700:"#2e59b6",800:"#284ea0",900:"#224389"},gray:{750:"#222C3B"}},components:{Alert:{baseStyle:{container:{borderRadius:"6px",fontSize:"sm"}}},Select:{baseStyle:{field:{_dark:{borderColor:"gray.600",borderRadius:"6px"},_light:{borderRadius:"6px"}}}},FormHelperText:{baseStyle:{fontSize:"xs"}},FormLabel:{baseStyle:{fontSize:"sm",fontWeight:"medium",mb:"1",_dark:{color:"gray.300"}}},Input:{baseStyle:{addon:{_dark:{borderColor:"gray.600",_placeholder:{color:"gray.500"}}},field:{_focusVisible:{boxShadow:"none",borderColor:"primary.200",outlineColor:"primary.200"},_dark:{borderColor:"gray.600",_disabled:{color:"gray.400",borderColor:"gray.500"},_placeholder:{color:"gray.500"}}}}},Table:{baseStyle:{table:{borderCollapse:"separate",borderSpacing:0},thead:{borderBottomColor:"light-border"},th:{background:"#F9FAFB",borderColor:"light-border !important",borderBottomColor:"light-border !important",borderTop:"1px solid ",borderTopColor:"light-border !important",_first:{borderLeft:"1px solid",borderColor:"light-border !important"},_last:{borderRight:"1px solid",borderColor:"light-border !important"},_dark:{borderColor:"gray.600 !important",background:"gray.750"}},td:{transition:"all .1s ease-out",borderColor:"light-border",borderBottomColor:"light-border !important",_first:{borderLeft:"1px solid",borderColor:"light-border",_dark:{borderColor:"gray.600"}},_last:{borderRight:"1px solid",borderColor:"light-border",_dark:{borderColor:"gray.600"}},_dark:{borderColor:"gray.600",borderBottomColor:"gray.600 !important"}},tr:{"&.interactive":{cursor:"pointer",_hover:{"& > td":{bg:"gray.200"},_dark:{"& > td":{bg:"gray.750"}}}},_last:{"& > td":{_first:{borderBottomLeftRadius:"8px"},_last:{borderBottomRightRadius:"8px"}}}}}}}});const Et=()=>localStorage.getItem("token"),Zo=t=>{localStorage.setItem("token",t)},Qo=()=>{localStorage.removeItem("token")},qo=_n.create({baseURL:"/api/"}),Xo=(t,n={})=>(Et()&&(n.headers={...(n==null?void 0:n.headers)||{},Authorization:`Bearer ${Et()}`}),qo(t,n)),O=Xo,Jo=Lt(t=>({isLoading:!0,isPostLoading:!1,version:null,started:!1,logs_websocket:null,config:"",fetchCoreSettings:()=>{t({isLoading:!0}),Promise.all([O("/core").then(({version:n,started:o,logs_websocket:s})=>t({version:n,started:o,logs_websocket:s})),O("/core/config").then(n=>t({config:n}))]).finally(()=>t({isLoading:!1}))},updateConfig:n=>(t({isPostLoading:!0}),O("/core/config",{method:"PUT",body:n}).finally(()=>{t({isPostLoading:!1})})),restartCore:()=>O("/core/restart",{method:"POST"})}));function ae(t,n=2,o=!1){if(!+t)return"0 B";const s=1024,a=n<0?0:n,i=["B","KB","MB","GB","TB","PB","EB","ZB","YB"],l=Math.floor(Math.log(t)/Math.log(s));return o?[parseFloat((t/Math.pow(s,l)).toFixed(a)),i[l]]:`${parseFloat((t/Math.pow(s,l)).toFixed(a))} ${i[l]}`}const xr=t=>{if(t!==null)return t.toString().replace(/\B(?=(\d{3})+(?!\d))/g,",")},Ko=S(kn,{baseStyle:{w:5,h:5,position:"relative",zIndex:"2"}}),es=S(In,{baseStyle:{w:5,h:5,position:"relative",zIndex:"2"}}),ts=S(At,{baseStyle:{w:5,h:5,position:"relative",zIndex:"2"}}),Wt=({title:t,content:n,icon:o})=>r(vn,{p:6,borderWidth:"1px",borderColor:"light-border",bg:"#F9FAFB",_dark:{borderColor:"gray.600",bg:"gray.750"},borderStyle:"solid",boxShadow:"none",borderRadius:"12px",width:"full",display:"flex",justifyContent:"space-between",flexDirection:"row",children:[r(_,{alignItems:"center",columnGap:"4",children:[e(v,{p:"2",position:"relative",color:"white",_before:{content:'""',position:"absolute",top:0,left:0,bg:"primary.400",display:"block",w:"full",h:"full",borderRadius:"5px",opacity:".5",z:"1"},_after:{content:'""',position:"absolute",top:"-5px",left:"-5px",bg:"primary.400",display:"block",w:"calc(100% + 10px)",h:"calc(100% + 10px)",borderRadius:"8px",opacity:".4",z:"1"},children:o}),e(d,{color:"gray.600",_dark:{color:"gray.300"},fontWeight:"medium",textTransform:"capitalize",fontSize:"sm",children:t})]}),e(v,{fontSize:"3xl",fontWeight:"semibold",mt:"2",children:n})]}),Yt="statistics-query-key",rs=t=>{const{version:n}=z(),{data:o}=Tt({queryKey:Yt,queryFn:()=>O("/system"),refetchInterval:5e3,onSuccess:({version:a})=>{n!==a&&z.setState({version:a})}}),{t:s}=H();return r(_,{justifyContent:"space-between",gap:0,columnGap:{lg:4,md:0},rowGap:{lg:0,base:4},display:"flex",flexDirection:{lg:"row",base:"column"},...t,children:[e(Wt,{title:s("activeUsers"),content:o&&r(_,{alignItems:"flex-end",children:[e(d,{children:xr(o.users_active)}),r(d,{fontWeight:"normal",fontSize:"lg",as:"span",display:"inline-block",pb:"5px",children:["/ ",xr(o.total_user)]})]}),icon:e(Ko,{})}),e(Wt,{title:s("dataUsage"),content:o&&ae(o.incoming_bandwidth+o.outgoing_bandwidth),icon:e(es,{})}),e(Wt,{title:s("memoryUsage"),content:o&&r(_,{alignItems:"flex-end",children:[e(d,{children:ae(o.mem_used,1,!0)[0]}),r(d,{fontWeight:"normal",fontSize:"lg",as:"span",display:"inline-block",pb:"5px",children:[ae(o.mem_used,1,!0)[1]," /"," ",ae(o.mem_total,1)]})]}),icon:e(ts,{})})]})},sn="marzban-num-users-per-page",yr=10,ns=()=>{const t=localStorage.getItem(sn)||yr.toString();return parseInt(t)||yr},os=t=>localStorage.setItem(sn,t),ss=t=>{for(const n in t)t[n]||delete t[n];return z.setState({loading:!0}),O("/users",{query:{...t,include:["links","subscription_url"]}}).then(n=>(z.setState({users:n}),n)).finally(()=>{z.setState({loading:!1})})},as=()=>O("/inbounds").then(t=>{z.setState({inbounds:new Map(Object.entries(t))})}).finally(()=>{z.setState({loading:!1})}),z=Lt(Dn((t,n)=>({version:null,editingUser:null,deletingUser:null,isCreatingNewUser:!1,QRcodeLinks:null,subscribeUrl:null,users:{users:[],total:0},loading:!0,isResetingAllUsage:!1,isEditingHosts:!1,isEditingNodes:!1,isShowingNodesUsage:!1,resetUsageUser:null,revokeSubscriptionUser:null,filters:{username:"",limit:ns(),sort:"-created_at"},inbounds:new Map,isEditingCore:!1,refetchUsers:()=>{ss(n().filters)},resetAllUsage:()=>O("/users/reset",{method:"POST"}).then(()=>{n().onResetAllUsage(!1),n().refetchUsers()}),onResetAllUsage:o=>t({isResetingAllUsage:o}),onCreateUser:o=>t({isCreatingNewUser:o}),onEditingUser:o=>{t({editingUser:o})},onDeletingUser:o=>{t({deletingUser:o})},onFilterChange:o=>{t({filters:{...n().filters,...o}}),n().refetchUsers()},setQRCode:o=>{t({QRcodeLinks:o})},deleteUser:o=>(t({editingUser:null}),O(`/user/${o.username}`,{method:"DELETE"}).then(()=>{t({deletingUser:null}),n().refetchUsers(),Gt.invalidateQueries(Yt)})),createUser:o=>O("/user",{method:"POST",body:o}).then(()=>{t({editingUser:null}),n().refetchUsers(),Gt.invalidateQueries(Yt)}),editUser:o=>O(`/user/${o.username}`,{method:"PUT",body:o}).then(()=>{n().onEditingUser(null),n().refetchUsers()}),fetchUserUsage:(o,s)=>{for(const a in s)s[a]||delete s[a];return O(`/user/${o.username}/usage`,{method:"GET",query:s})},onEditingHosts:o=>{t({isEditingHosts:o})},onEditingNodes:o=>{t({isEditingNodes:o})},onShowingNodesUsage:o=>{t({isShowingNodesUsage:o})},setSubLink:o=>{t({subscribeUrl:o})},resetDataUsage:o=>O(`/user/${o.username}/reset`,{method:"POST"}).then(()=>{t({resetUsageUser:null}),n().refetchUsers()}),revokeSubscription:o=>O(`/user/${o.username}/revoke_sub`,{method:"POST"}).then(s=>{t({revokeSubscriptionUser:null,editingUser:s}),n().refetchUsers()})}))),ge=({children:t,color:n})=>e(v,{position:"relative",width:"36px",height:"36px",display:"flex",justifyContent:"center",alignItems:"center",_before:{content:'""',display:"block",position:"absolute",top:"0",left:"0",width:"calc(100%)",height:"calc(100%)",bg:`${n}.400`,opacity:".5",borderRadius:"5px",zIndex:"1",_dark:{bg:`${n}.400`}},_after:{content:'""',display:"block",position:"absolute",top:"0",left:"0",width:"calc(100% + 10px)",height:"calc(100% + 10px)",transform:"translate(-5px, -5px)",bg:`${n}.400`,opacity:".4",borderRadius:"8px",zIndex:"1",_dark:{bg:`${n}.400`}},children:e(d,{color:`${n}.500`,_dark:{color:`${n}.900`},position:"relative",zIndex:"2",children:t})});window.ace.define("ace/theme/nord_dark",["require","exports","module","ace/lib/dom"],(t,n,o)=>{n.isDark=!0,n.cssClass="ace-nord-dark",t("../lib/dom").importCssString(n.cssText,n.cssClass)});window.ace.define("ace/theme/dawn",["require","exports","module","ace/lib/dom"],(t,n,o)=>{n.isDark=!1,n.cssClass="ace-dawn",t("../lib/dom").importCssString(n.cssText,n.cssClass)});const is=f.exports.forwardRef(({json:t,onChange:n,mode:o="code"},s)=>{const{colorMode:a}=Ze(),i={mode:o,onChangeText:n,statusBar:!1,mainMenuBar:!1,theme:a==="dark"?"ace/theme/nord_dark":"ace/theme/dawn"},l=f.exports.useRef(null),p=f.exports.useRef(null);return f.exports.useEffect(()=>(p.current=new zn(l.current,i),()=>{p.current&&p.current.destroy()}),[]),f.exports.useEffect(()=>{p.current&&p.current.update(t)},[t]),e(v,{ref:s,border:"1px solid",borderColor:"gray.300",_dark:{borderColor:"gray.500"},borderRadius:5,h:"full",children:e(v,{height:"full",ref:l})})}),an=y.object({name:y.string().min(1),address:y.string().min(1),port:y.number().min(1).or(y.string().transform(t=>parseFloat(t))),api_port:y.number().min(1).or(y.string().transform(t=>parseFloat(t))),xray_version:y.string().nullable().optional(),id:y.number().nullable().optional(),status:y.enum(["connected","connecting","error","disabled"]).nullable().optional(),message:y.string().nullable().optional(),add_as_new_host:y.boolean().optional(),usage_coefficient:y.number().or(y.string().transform(t=>parseFloat(t)))}),ls=()=>({name:"",address:"",port:62050,api_port:62051,xray_version:"",usage_coefficient:1}),ft="fetch-nodes-query-key",ln=()=>{const{isEditingNodes:t}=z();return Tt({queryKey:ft,queryFn:St.getState().fetchNodes,refetchInterval:t?3e3:void 0,refetchOnWindowFocus:!1})},St=Lt((t,n)=>({nodes:[],addNode(o){return O("/node",{method:"POST",body:o})},fetchNodes(){return O("/nodes")},fetchNodesUsage(o){return O("/nodes/usage",{query:o})},updateNode(o){return O(`/node/${o.id}`,{method:"PUT",body:o})},setDeletingNode(o){t({deletingNode:o})},reconnectNode(o){return O(`/node/${o.id}/reconnect`,{method:"POST"})},deleteNode:()=>{var o;return O(`/node/${(o=n().deletingNode)==null?void 0:o.id}`,{method:"DELETE"})}})),Sr=500,cs=S(Mr,{baseStyle:{w:5,h:5}}),ds=S(Mt,{baseStyle:{w:4,h:4}}),hs=S(Un,{baseStyle:{w:4,h:4}}),us=S(En,{baseStyle:{w:3,h:3}}),ps=t=>({[lt.ReadyState.CONNECTING]:"connecting",[lt.ReadyState.OPEN]:"connected",[lt.ReadyState.CLOSING]:"closed",[lt.ReadyState.CLOSED]:"closed",[lt.ReadyState.UNINSTANTIATED]:"closed"})[t],ms=t=>{try{let n=new URL("/api/".startsWith("/")?window.location.origin+"/api/":"/api/");return(n.protocol==="https:"?"wss://":"ws://")+Tr([n.host+n.pathname,t?`/node/${t}/logs`:"/core/logs"])+"?interval=1&token="+Et()}catch(n){return console.error("Unable to generate websocket url"),console.error(n),null}};let Fe=[];const gs=()=>{const{colorMode:t}=Ze(),{data:n}=ln(),o=!1,[s,a]=f.exports.useState(""),i=(R,K)=>{R!==s&&(R==="host"?(a(""),A([])):(a(R),A([])))},{isEditingCore:l}=z(),{fetchCoreSettings:p,updateConfig:g,isLoading:w,config:x,isPostLoading:b,version:h,restartCore:m}=Jo(),I=f.exports.useRef(null),[C,A]=f.exports.useState([]),{t:u}=H(),c=we(),F=Qe({defaultValues:{config:x||{}}});f.exports.useEffect(()=>{x&&F.setValue("config",x)},[x]),f.exports.useEffect(()=>{l&&p()},[l]);const j=f.exports.useRef(!0),D=f.exports.useCallback(Nr(R=>{var le,J,_e;const K=Math.abs((((le=I.current)==null?void 0:le.scrollTop)||0)-(((J=I.current)==null?void 0:J.scrollHeight)||0)+(((_e=I.current)==null?void 0:_e.offsetHeight)||0))<10;I.current&&K?j.current=!0:j.current=!1,R.length<40&&A(R)},300),[]),{readyState:M}=Rn(ms(s),{onMessage:R=>{Fe.push(R.data),Fe.length>Sr&&(Fe=Fe.splice(0,Fe.length-Sr)),D([...Fe])},shouldReconnect:()=>!0,reconnectAttempts:10,reconnectInterval:1e3});f.exports.useEffect(()=>{var R;I.current&&j.current&&(I.current.scrollTop=(R=I.current)==null?void 0:R.scrollHeight)},[C]),f.exports.useEffect(()=>()=>{Fe=[]},[]);const Y=ps(M.toString()),{mutate:Z,isLoading:Q}=mt(m),ne=({config:R})=>{g(R).then(()=>{c({title:u("core.successMessage"),status:"success",isClosable:!0,position:"top",duration:3e3})}).catch(K=>{let le=u("core.generalErrorMessage");typeof K.response._data.detail=="object"&&(le=K.response._data.detail[Object.keys(K.response._data.detail)[0]]),typeof K.response._data.detail=="string"&&(le=K.response._data.detail),c({title:le,status:"error",isClosable:!0,position:"top",duration:3e3})})},oe=f.exports.useRef(null),[U,W]=f.exports.useState(!1),X=()=>{var R;document.fullscreenElement?(document.exitFullscreen(),W(!1)):((R=oe.current)==null||R.requestFullscreen(),W(!0))};return r("form",{onSubmit:F.handleSubmit(ne),children:[r(me,{children:[r(L,{children:[r(_,{justifyContent:"space-between",alignItems:"flex-start",children:[r(B,{children:[u("core.configuration")," ",w&&e(Pr,{isIndeterminate:!0,size:"15px"})]}),e(_,{gap:0,children:e(re,{label:"Xray Version",placement:"top",children:e(E,{height:"100%",textTransform:"lowercase",children:h&&`v${h}`})})})]}),r(v,{position:"relative",ref:oe,minHeight:"300px",children:[e(ye,{control:F.control,name:"config",render:({field:R})=>e(is,{json:x,onChange:R.onChange})}),e(V,{size:"xs","aria-label":"full screen",variant:"ghost",position:"absolute",top:"2",right:"4",onClick:X,children:U?e(us,{}):e(hs,{})})]})]}),r(L,{mt:"4",children:[r(_,{justifyContent:"space-between",style:{paddingBottom:"1rem"},children:[r(_,{children:[(n==null?void 0:n[0])&&r(Ne,{size:"sm",style:{width:"auto"},disabled:o,bg:"transparent",_dark:{bg:"transparent"},sx:{option:{backgroundColor:t==="dark"?"#222C3B":"white"}},onChange:R=>i(R.currentTarget.value,R.currentTarget.selectedOptions[0].text),children:[e("option",{value:"host",defaultChecked:!0,children:"Master"},"host"),n&&n.map(R=>e("option",{value:String(R.id),children:u(R.name)},R.address))]}),e(B,{className:"w-au",children:u("core.logs")})]}),e(d,{as:B,children:u(`core.socket.${Y}`)})]}),e(v,{border:"1px solid",borderColor:"gray.300",bg:"#F9F9F9",_dark:{borderColor:"gray.500",bg:"#2e3440"},borderRadius:5,minHeight:"200px",maxHeight:"250px",p:2,overflowY:"auto",ref:I,children:C.map((R,K)=>e(d,{fontSize:"xs",opacity:.8,whiteSpace:"pre-line",children:R},K))})]})]}),e(Pe,{children:r(_,{w:"full",justifyContent:"space-between",children:[e(_,{children:e(v,{children:e(P,{size:"sm",leftIcon:e(ds,{className:bt({"animate-spin":Q})}),onClick:()=>Z(),children:u(Q?"core.restarting":"core.restartCore")})})}),e(_,{children:e(P,{size:"sm",variant:"solid",colorScheme:"primary",px:"5",type:"submit",isDisabled:w||b,isLoading:b,children:u("core.save")})})]})})]})},fs=()=>{const{isEditingCore:t}=z(),n=z.setState.bind(null,{isEditingCore:!1}),{t:o}=H();return r(ce,{isOpen:t,onClose:n,size:"3xl",children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",w:"full",children:[e(ue,{pt:6,children:r(_,{gap:2,children:[e(ge,{color:"primary",children:e(cs,{color:"white"})}),e(d,{fontWeight:"semibold",fontSize:"lg",children:o("core.title")})]})}),e(pe,{mt:3}),e(gs,{})]})]})},wt=S(Ln,{baseStyle:{w:5,h:5}}),bs=()=>{const[t,n]=f.exports.useState(!1),{deletingUser:o,onDeletingUser:s,deleteUser:a}=z(),{t:i}=H(),l=we(),p=()=>{s(null)},g=()=>{o&&(n(!0),a(o).then(()=>{l({title:i("deleteUser.deleteSuccess",{username:o.username}),status:"success",isClosable:!0,position:"top",duration:3e3})}).then(p).finally(n.bind(null,!1)))};return r(ce,{isCentered:!0,isOpen:!!o,onClose:p,size:"sm",children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",children:[e(ue,{pt:6,children:e(ge,{color:"red",children:e(wt,{})})}),e(pe,{mt:3}),r(me,{children:[e(d,{fontWeight:"semibold",fontSize:"lg",children:i("deleteUser.title")}),o&&e(d,{mt:1,fontSize:"sm",_dark:{color:"gray.400"},color:"gray.600",children:e(Te,{components:{b:e("b",{})},children:i("deleteUser.prompt",{username:o.username})})})]}),r(Pe,{display:"flex",children:[e(P,{size:"sm",onClick:p,mr:3,w:"full",variant:"outline",children:i("cancel")}),e(P,{size:"sm",w:"full",colorScheme:"red",onClick:g,leftIcon:t?e(He,{size:"xs"}):void 0,children:i("delete")})]})]})]})},er={baseStyle:{w:4,h:4}},xs=S(An,er),ys=S(Fr,er),tr=S(Mt,er),Ss=Nr(t=>{z.getState().onFilterChange({...z.getState().filters,offset:0,search:t})},300),ws=({...t})=>{const{loading:n,filters:o,onFilterChange:s,refetchUsers:a,onCreateUser:i}=z(),{t:l}=H(),[p,g]=f.exports.useState(""),w=b=>{g(b.target.value),Ss(b.target.value)},x=()=>{g(""),s({...o,offset:0,search:""})};return r(Wr,{id:"filters",templateColumns:{lg:"repeat(3, 1fr)",md:"repeat(4, 1fr)",base:"repeat(1, 1fr)"},position:"sticky",top:0,mx:"-6",px:"6",rowGap:4,gap:{lg:4,base:0},bg:"var(--chakra-colors-chakra-body-bg)",py:4,zIndex:"docked",...t,children:[e(ut,{colSpan:{base:1,md:2,lg:1},order:{base:2,md:1},children:r(It,{children:[e(Tn,{pointerEvents:"none",children:e(xs,{})}),e($e,{placeholder:l("search"),value:p,borderColor:"light-border",onChange:w}),r(vt,{children:[n&&e(He,{size:"xs"}),o.search&&o.search.length>0&&e(V,{onClick:x,"aria-label":"clear",size:"xs",variant:"ghost",children:e(ys,{})})]})]})}),e(ut,{colSpan:2,order:{base:1,md:2},children:r(_,{justifyContent:"flex-end",alignItems:"center",h:"full",children:[e(V,{"aria-label":"refresh users",disabled:n,onClick:a,size:"sm",variant:"outline",children:e(tr,{className:bt({"animate-spin":n})})}),e(P,{colorScheme:"primary",size:"sm",onClick:()=>i(!0),px:5,children:l("createUser")})]})})]})},cn="https://github.com/Gozargah/Marzban",Cs="https://github.com/Gozargah",_s="https://github.com/Gozargah/Marzban#donation",dn=t=>{const{version:n}=z();return e(_,{w:"full",py:"0",position:"relative",...t,children:r(d,{display:"inline-block",flexGrow:1,textAlign:"center",color:"gray.500",fontSize:"xs",children:[e(lr,{color:"blue.400",href:cn,children:"Marzban"}),n?` (v${n}), `:", ","Made with \u2764\uFE0F in"," ",e(lr,{color:"blue.400",href:Cs,children:"Gozargah"})]})})},ks=S(Mn,{baseStyle:{w:4,h:4}}),hn=({actions:t})=>{const{i18n:n}=H();var o=s=>{n.changeLanguage(s)};return r(Or,{placement:"bottom-end",children:[e(Hr,{as:V,size:"sm",variant:"outline",icon:e(ks,{}),position:"relative"}),r(jr,{minW:"100px",zIndex:9999,children:[e(Se,{maxW:"100px",fontSize:"sm",onClick:()=>o("en"),children:"English"}),e(Se,{maxW:"100px",fontSize:"sm",onClick:()=>o("fa"),children:"\u0641\u0627\u0631\u0633\u06CC"}),e(Se,{maxW:"100px",fontSize:"sm",onClick:()=>o("zh-cn"),children:"\u7B80\u4F53\u4E2D\u6587"}),e(Se,{maxW:"100px",fontSize:"sm",onClick:()=>o("ru"),children:"\u0420\u0443\u0441\u0441\u043A\u0438\u0439"})]})]})},Is=async()=>await O("/admin"),vs=()=>{const{data:t,isError:n,isLoading:o,isSuccess:s,error:a}=Tt({queryFn:()=>Is()});return{userData:t||{discord_webook:"",is_sudo:!1,telegram_id:"",username:""},getUserIsPending:o,getUserIsSuccess:s,getUserIsError:n,getUserError:a}},Ce={baseStyle:{w:4,h:4}},Ds=S(Nn,Ce),zs=S(Pn,Ce),Us=S(Mr,Ce),Es=S(Fn,Ce),Rs=S(Wn,Ce),Ls=S(On,Ce),As=S(qt,Ce),Ts=S(Br,Ce),Ms=S(At,Ce),Ns=S($r,Ce),wr=S(v,{baseStyle:{bg:"yellow.500",w:"2",h:"2",rounded:"full",position:"absolute"}}),un="marzban-menu-notification",Ps=()=>{const t=localStorage.getItem(un);if(!t)return!0;try{return t&&jn(parseInt(t))?Bn(new Date,new Date(parseInt(t)))>=7:!0}catch{return!0}},Fs=({actions:t})=>{const{userData:n,getUserIsSuccess:o,getUserIsPending:s}=vs(),a=()=>!s&&o?n.is_sudo:!1,{onEditingHosts:i,onResetAllUsage:l,onEditingNodes:p,onShowingNodesUsage:g}=z(),{t:w}=H(),{colorMode:x,toggleColorMode:b}=Ze(),[h,m]=f.exports.useState(Ps()),I=x==="dark"?"dark_dimmed":x,C=()=>{localStorage.setItem(un,new Date().getTime().toString()),m(!1)};return r(_,{gap:2,justifyContent:"space-between",__css:{"& .menuList":{direction:"ltr"}},position:"relative",children:[e(d,{as:"h1",fontWeight:"semibold",fontSize:"2xl",children:w("users")}),h&&e(wr,{top:"0",right:"0",zIndex:9999}),e(v,{overflow:"auto",css:{direction:"rtl"},children:r(_,{alignItems:"center",children:[r(Or,{children:[e(Hr,{as:V,size:"sm",variant:"outline",icon:e(ie,{children:e(Es,{})}),position:"relative"}),r(jr,{minW:"170px",zIndex:99999,className:"menuList",children:[a()&&r(ie,{children:[e(Se,{maxW:"170px",fontSize:"sm",icon:e(As,{}),onClick:i.bind(null,!0),children:w("header.hostSettings")}),e(Se,{maxW:"170px",fontSize:"sm",icon:e(Ts,{}),onClick:p.bind(null,!0),children:w("header.nodeSettings")}),e(Se,{maxW:"170px",fontSize:"sm",icon:e(Ms,{}),onClick:g.bind(null,!0),children:w("header.nodesUsage")}),e(Se,{maxW:"170px",fontSize:"sm",icon:e(Ns,{}),onClick:l.bind(null,!0),children:w("resetAllUsage")})]}),e(cr,{to:_s,target:"_blank",children:r(Se,{maxW:"170px",fontSize:"sm",icon:e(Ls,{}),position:"relative",onClick:C,children:[w("header.donation")," ",h&&e(wr,{top:"3",right:"2"})]})}),e(cr,{to:"/login",children:e(Se,{maxW:"170px",fontSize:"sm",icon:e(Rs,{}),children:w("header.logout")})})]})]}),a()&&e(V,{size:"sm",variant:"outline","aria-label":"core settings",onClick:()=>{z.setState({isEditingCore:!0})},children:e(Us,{})}),e(hn,{}),e(V,{size:"sm",variant:"outline","aria-label":"switch theme",onClick:()=>{on(x=="dark"?"light":"dark"),b()},children:x==="light"?e(Ds,{}):e(zs,{})}),e(v,{css:{direction:"ltr"},display:"flex",alignItems:"center",pr:"2",__css:{"&  span":{display:"inline-flex"}},children:e(Hn,{href:cn,"data-color-scheme":`no-preference: ${I}; light: ${I}; dark: ${I};`,"data-size":"large","data-show-count":"true","aria-label":"Star Marzban on GitHub",children:"Star"})})]})})]})},Ws=[{title:"Inbound's default",value:"inbound_default"},{title:"TLS",value:"tls"},{title:"None",value:"none"}],Os=[{title:"",value:""},{title:"h3",value:"h3"},{title:"h2",value:"h2"},{title:"http/1.1",value:"http/1.1"},{title:"h3,h2,http/1.1",value:"h3,h2,http/1.1"},{title:"h3,h2",value:"h3,h2"},{title:"h2,http/1.1",value:"h2,http/1.1"}],Hs=[{title:"",value:""},...["chrome","firefox","safari","ios","android","edge","360","qq","random","randomized"].map(t=>({title:t,value:t}))],js=[{title:"none",value:""},{title:"xtls-rprx-vision",value:"xtls-rprx-vision"}],Bs=["aes-128-gcm","aes-256-gcm","chacha20-ietf-poly1305"],$s=Lt(t=>({isLoading:!1,isPostLoading:!1,hosts:{},fetchHosts:()=>{t({isLoading:!0}),O("/hosts").then(n=>t({hosts:n})).finally(()=>t({isLoading:!1}))},setHosts:n=>(t({isPostLoading:!0}),O("/hosts",{method:"PUT",body:n}).finally(()=>{t({isPostLoading:!1})}))}));const Vs=S(Fr,{baseStyle:{w:4,h:4}}),Me=$t.forwardRef(({disabled:t,step:n,label:o,className:s,startAdornment:a,endAdornment:i,type:l="text",placeholder:p,onChange:g,onBlur:w,name:x,value:b,onClick:h,error:m,clearable:I=!1,...C},A)=>{const u=()=>{g&&g({target:{value:"",name:x}})},{size:c="md"}=C,F=l=="number"?qn:$e,j=l=="number"?$n:$t.Fragment,D=l=="number"?{keepWithinRange:!0,precision:5,format:M=>isNaN(parseFloat(String(M)))||Number(parseFloat(String(M)).toFixed(5))===0?M:Number(parseFloat(String(M)).toFixed(5)),min:0,step:n,name:x,type:l,placeholder:p,onChange:M=>{g&&g(M)},onBlur:w,value:b,onClick:h,disabled:t,flexGrow:1,size:c}:{};return r(L,{isInvalid:!!m,children:[o&&e(B,{children:o}),r(It,{size:c,w:"full",rounded:"md",_focusWithin:{outline:"2px solid",outlineColor:"primary.200"},bg:t?"gray.100":"transparent",_dark:{bg:t?"gray.600":"transparent"},children:[a&&e(Vn,{children:a}),r(j,{...D,children:[e(F,{name:x,ref:A,step:n,className:bt(s),type:l,placeholder:p,onChange:g,onBlur:w,value:b,onClick:h,disabled:t,flexGrow:1,_focusVisible:{outline:"none",borderTopColor:"transparent",borderRightColor:"transparent",borderBottomColor:"transparent"},_disabled:{cursor:"not-allowed"},...C,roundedLeft:a?"0":"md",roundedRight:i?"0":"md"}),l=="number"&&e(ie,{children:r(Gn,{children:[e(Yn,{}),e(Zn,{})]})})]}),i&&e(Qn,{borderLeftRadius:0,borderRightRadius:"6px",bg:"transparent",children:i}),I&&b&&b.length&&e(vt,{borderLeftRadius:0,borderRightRadius:"6px",bg:"transparent",onClick:u,cursor:"pointer",children:e(Vs,{})})]}),!!m&&e(Dt,{children:m})]})}),Gs=S(Xn,{baseStyle:{w:5,h:5}}),Ys=S(Jn,{baseStyle:{w:5,h:5}}),Zs=S(Kn,{baseStyle:{w:5,h:5}}),Ot=S(Ne,{baseStyle:{bg:"white",_dark:{bg:"gray.700"}}}),Ae=S(Me,{baseStyle:{bg:"white",_dark:{bg:"gray.700"}}}),Qs=S(qt,{baseStyle:{w:5,h:5}}),Re=S(eo,{baseStyle:{w:4,h:4,color:"gray.400",cursor:"pointer"}}),qs=y.record(y.string().min(1),y.array(y.object({remark:y.string().min(1,"Remark is required"),address:y.string().min(1,"Address is required"),port:y.string().or(y.number()).nullable().transform(t=>typeof t=="number"?t:t!==null&&!isNaN(parseInt(t))?Number(parseInt(t)):null),path:y.string().nullable(),sni:y.string().nullable(),host:y.string().nullable(),mux_enable:y.boolean().default(!1),allowinsecure:y.boolean().nullable().default(!1),is_disabled:y.boolean().default(!0),fragment_setting:y.string().nullable(),noise_setting:y.string().nullable(),random_user_agent:y.boolean().default(!1),security:y.string(),alpn:y.string(),fingerprint:y.string()}))),xe=S(Dt,{baseStyle:{color:"red.400",display:"block",textAlign:"left",w:"100%"}}),Xs=({hostKey:t,isOpen:n,toggleAccordion:o})=>{const{inbounds:s}=z(),a=[...s.values()].flat().filter(u=>u.tag===t)[0],i=Xt(),{fields:l,append:p,remove:g,insert:w,move:x}=to({control:i.control,name:t}),{errors:b}=i.formState,{t:h}=H(),m=b[t],I=()=>{p({host:"",sni:"",port:null,path:null,address:"",remark:"",mux_enable:!1,allowinsecure:!1,is_disabled:!1,fragment_setting:"",noise_setting:"",random_user_agent:!1,security:"inbound_default",alpn:"",fingerprint:""})},C=u=>{if(u<0||u>=l.length)return;const c=l[u];w(u+1,c)};f.exports.useEffect(()=>{m&&!n&&o()},[m]);const A=(u,c)=>{c==="up"&&u>0?x(u,u-1):c==="down"&&u<l.length-1&&x(u,u+1)};return r(Ve,{border:"1px solid",_dark:{borderColor:"gray.600"},_light:{borderColor:"gray.200"},borderRadius:"4px",p:1,w:"full",children:[r(Ge,{px:2,borderRadius:"3px",onClick:o,children:[e(d,{as:"span",fontWeight:"medium",fontSize:"sm",flex:"1",textAlign:"left",color:"gray.700",_dark:{color:"gray.300"},children:t}),e(Vt,{})]}),e(Ye,{px:2,pb:2,children:r(N,{gap:3,children:[l.map((u,c)=>{var F,j,D,M,Y,Z,Q,ne,oe,U,W,X,R,K,le,J,_e,_t,Xe,kt,Je,Ke,et,tt,rt,k,T,ee,se,fe,ke,G,nt,ot,st,at,it,je,or,sr,ar;return e(ro.div,{layout:!0,initial:!1,animate:{opacity:1},exit:{opacity:0},transition:{layout:{type:"spring",stiffness:500,damping:30},opacity:{duration:.1}},id:u.id,whileDrag:{scale:1.05,zIndex:10},style:{width:"100%"},children:r(N,{id:u.id,border:"1px solid",_dark:{borderColor:"gray.600",bg:"#273142"},_light:{borderColor:"gray.200",bg:"#fcfbfb"},p:2,w:"full",borderRadius:"4px",children:[e(_,{w:"100%",alignItems:"flex-start",children:r(L,{position:"relative",zIndex:10,isInvalid:!!(m&&((F=m[c])==null?void 0:F.remark)),children:[r(It,{children:[e(Ae,{...i.register(t+"."+c+".remark"),size:"sm",borderRadius:"4px",placeholder:"Remark"}),e(vt,{children:r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(v,{mt:"-8px",children:e(Re,{})})}),e(De,{children:r(ze,{children:[e(Ue,{}),e(Ee,{}),e(dr,{children:r(v,{fontSize:"xs",children:[e(d,{pr:"20px",children:h("hostsDialog.desc")}),r(d,{children:[r(E,{children:["{","SERVER_IP","}"]})," ",h("hostsDialog.currentServer")]}),r(d,{mt:1,children:[r(E,{children:["{","SERVER_IPV6","}"]})," ",h("hostsDialog.currentServerv6")]}),r(d,{mt:1,children:[r(E,{children:["{","USERNAME","}"]})," ",h("hostsDialog.username")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_USAGE","}"]})," ",h("hostsDialog.dataUsage")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_LEFT","}"]})," ",h("hostsDialog.remainingData")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_LIMIT","}"]})," ",h("hostsDialog.dataLimit")]}),r(d,{mt:1,children:[r(E,{children:["{","DAYS_LEFT","}"]})," ",h("hostsDialog.remainingDays")]}),r(d,{mt:1,children:[r(E,{children:["{","EXPIRE_DATE","}"]})," ",h("hostsDialog.expireDate")]}),r(d,{mt:1,children:[r(E,{children:["{","JALALI_EXPIRE_DATE","}"]})," ",h("hostsDialog.jalaliExpireDate")]}),r(d,{mt:1,children:[r(E,{children:["{","TIME_LEFT","}"]})," ",h("hostsDialog.remainingTime")]}),r(d,{mt:1,children:[r(E,{children:["{","STATUS_TEXT","}"]})," ",h("hostsDialog.statusText")]}),r(d,{mt:1,children:[r(E,{children:["{","STATUS_EMOJI","}"]})," ",h("hostsDialog.statusEmoji")]}),r(d,{mt:1,children:[r(E,{children:["{","PROTOCOL","}"]})," ",h("hostsDialog.proxyProtocol")]}),r(d,{mt:1,children:[r(E,{children:["{","TRANSPORT","}"]})," ",h("hostsDialog.proxyMethod")]})]})})]})})]})})]}),m&&((j=m[c])==null?void 0:j.remark)&&e(xe,{children:(M=(D=m[c])==null?void 0:D.remark)==null?void 0:M.message})]})}),r(L,{isInvalid:!!(m&&((Y=m[c])==null?void 0:Y.address)),children:[r(It,{children:[e(Ae,{size:"sm",borderRadius:"4px",placeholder:"Address (e.g. example.com)",...i.register(t+"."+c+".address")}),e(vt,{children:r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(v,{mt:"-8px",children:e(Re,{})})}),e(De,{children:r(ze,{children:[e(Ue,{}),e(Ee,{}),e(dr,{children:r(v,{fontSize:"xs",children:[e(d,{pr:"20px",children:h("hostsDialog.desc")}),r(d,{children:[r(E,{children:["{","SERVER_IP","}"]})," ",h("hostsDialog.currentServer")]}),r(d,{mt:1,children:[r(E,{children:["{","SERVER_IPV6","}"]})," ",h("hostsDialog.currentServerv6")]}),r(d,{mt:1,children:[r(E,{children:["{","USERNAME","}"]})," ",h("hostsDialog.username")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_USAGE","}"]})," ",h("hostsDialog.dataUsage")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_LEFT","}"]})," ",h("hostsDialog.remainingData")]}),r(d,{mt:1,children:[r(E,{children:["{","DATA_LIMIT","}"]})," ",h("hostsDialog.dataLimit")]}),r(d,{mt:1,children:[r(E,{children:["{","DAYS_LEFT","}"]})," ",h("hostsDialog.remainingDays")]}),r(d,{mt:1,children:[r(E,{children:["{","EXPIRE_DATE","}"]})," ",h("hostsDialog.expireDate")]}),r(d,{mt:1,children:[r(E,{children:["{","JALALI_EXPIRE_DATE","}"]})," ",h("hostsDialog.jalaliExpireDate")]}),r(d,{mt:1,children:[r(E,{children:["{","TIME_LEFT","}"]})," ",h("hostsDialog.remainingTime")]}),r(d,{mt:1,children:[r(E,{children:["{","STATUS_TEXT","}"]})," ",h("hostsDialog.statusText")]}),r(d,{mt:1,children:[r(E,{children:["{","STATUS_EMOJI","}"]})," ",h("hostsDialog.statusEmoji")]}),r(d,{mt:1,children:[r(E,{children:["{","PROTOCOL","}"]})," ",h("hostsDialog.proxyProtocol")]}),r(d,{mt:1,children:[r(E,{children:["{","TRANSPORT","}"]})," ",h("hostsDialog.proxyMethod")]})]})})]})})]})})]}),m&&((Z=m[c])==null?void 0:Z.address)&&e(xe,{children:(ne=(Q=m[c])==null?void 0:Q.address)==null?void 0:ne.message})]}),e(yt,{w:"full",allowToggle:!0,children:r(Ve,{border:"0",children:[r("div",{style:{display:"flex",alignItems:"center"},children:[r(Ge,{display:"flex",px:0,py:1,borderRadius:3,_hover:{bg:"transparent"},children:[r(d,{flex:"3",align:"start",fontSize:"xs",color:"gray.600",_dark:{color:"gray.500"},pl:1,children:[h("hostsDialog.advancedOptions"),e(Vt,{fontSize:"sm",ml:1})]}),r(no,{flex:"1",px:"0",display:"contents",children:[e(ye,{control:i.control,name:`${t}.${c}.is_disabled`,render:({field:te})=>e(zt,{mx:"1.5",colorScheme:"primary",...te,value:void 0,isChecked:!te.value,onChange:ir=>{console.log(ir.target.checked),te.onChange(!ir.target.checked)}})}),e(re,{label:"Delete",placement:"top",children:e(V,{"aria-label":"Delete",size:"sm",colorScheme:"red",variant:"ghost",onClick:g.bind(null,c),children:e(wt,{})})})]})]}),e(re,{label:"Dublicate",placement:"top",children:e(V,{"aria-label":"Dublicate",size:"sm",colorScheme:"white",variant:"ghost",onClick:()=>C(c),children:e(Gs,{})})}),c<l.length-1&&e(re,{label:"Move Down",placement:"top",children:e(V,{"aria-label":"DownIcon",size:"sm",colorScheme:"white",variant:"ghost",onClick:()=>A(c,"down"),children:e(Zs,{})})}),c>0&&e(re,{label:"Move Up",placement:"top",children:e(V,{"aria-label":"UpIcon",size:"sm",colorScheme:"white",variant:"ghost",onClick:()=>A(c,"up"),children:e(Ys,{})})})]}),e(Ye,{w:"full",p:1,children:r(N,{w:"full",borderRadius:"4px",children:[r(L,{isInvalid:!!(m&&((oe=m[c])==null?void 0:oe.port)),children:[r(B,{display:"flex",pb:1,alignItems:"center",justifyContent:"space-between",gap:1,m:"0",children:[e("span",{children:h("hostsDialog.port")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.port.info")})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:String(a.port||"8080"),type:"number",...i.register(t+"."+c+".port")})]}),r(L,{isInvalid:!!(m&&((U=m[c])==null?void 0:U.sni)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.sni")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.sni.info")}),e(d,{fontSize:"xs",mt:"2",children:e(Te,{i18nKey:"hostsDialog.host.wildcard",components:{badge:e(E,{})}})}),e(d,{fontSize:"xs",children:e(Te,{i18nKey:"hostsDialog.host.multiHost",components:{badge:e(E,{})}})})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"SNI (e.g. example.com)",...i.register(t+"."+c+".sni")}),m&&((W=m[c])==null?void 0:W.sni)&&e(xe,{children:(R=(X=m[c])==null?void 0:X.sni)==null?void 0:R.message})]}),r(L,{isInvalid:!!(m&&((K=m[c])==null?void 0:K.host)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.host")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.host.info")}),e(d,{fontSize:"xs",mt:"2",children:e(Te,{i18nKey:"hostsDialog.host.wildcard",components:{badge:e(E,{})}})}),e(d,{fontSize:"xs",children:e(Te,{i18nKey:"hostsDialog.host.multiHost",components:{badge:e(E,{})}})})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"Host (e.g. example.com)",...i.register(t+"."+c+".host")}),m&&((le=m[c])==null?void 0:le.host)&&e(xe,{children:(_e=(J=m[c])==null?void 0:J.host)==null?void 0:_e.message})]}),r(L,{isInvalid:!!(m&&((_t=m[c])==null?void 0:_t.path)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.path")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.path.info")})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"path (e.g. /vless)",...i.register(t+"."+c+".path")}),m&&((Xe=m[c])==null?void 0:Xe.path)&&e(xe,{children:(Je=(kt=m[c])==null?void 0:kt.path)==null?void 0:Je.message})]}),r(L,{height:"66px",children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.security")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.security.info")})]})})]})]}),e(Ot,{size:"sm",...i.register(t+"."+c+".security"),children:Ws.map(te=>e("option",{value:te.value,children:te.title},te.value))})]}),r(L,{height:"66px",children:[e(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:e("span",{children:h("hostsDialog.alpn")})}),e(Ot,{size:"sm",...i.register(t+"."+c+".alpn"),children:Os.map(te=>e("option",{value:te.value,children:te.title},te.value))})]}),r(L,{height:"66px",children:[e(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:e("span",{children:h("hostsDialog.fingerprint")})}),e(Ot,{size:"sm",...i.register(t+"."+c+".fingerprint"),children:Hs.map(te=>e("option",{value:te.value,children:te.title},te.value))})]}),r(L,{isInvalid:!!(m&&((Ke=m[c])==null?void 0:Ke.fragment_setting)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.fragment")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.fragment.info")}),e(d,{fontSize:"xs",pr:5,pt:2,pb:1,children:h("hostsDialog.fragment.info.examples")}),e(d,{fontSize:"xs",pr:5,children:"100-200,10-20,tlshello"}),e(d,{fontSize:"xs",pr:5,children:"100-200,10-20,1-3"}),e(d,{fontSize:"xs",pr:5,pt:"3",children:h("hostsDialog.fragment.info.attention")})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"Fragment settings by pattern",...i.register(t+"."+c+".fragment_setting")}),m&&((et=m[c])==null?void 0:et.fragment_setting)&&e(xe,{children:(rt=(tt=m[c])==null?void 0:tt.fragment_setting)==null?void 0:rt.message})]}),r(L,{isInvalid:!!(m&&((k=m[c])==null?void 0:k.noise_setting)),children:[r(B,{display:"flex",pb:1,alignItems:"center",gap:1,justifyContent:"space-between",m:"0",children:[e("span",{children:h("hostsDialog.noise")}),r(Ie,{isLazy:!0,placement:"right",children:[e(ve,{children:e(Re,{})}),e(De,{children:r(ze,{p:2,children:[e(Ue,{}),e(Ee,{}),e(d,{fontSize:"xs",pr:5,children:h("hostsDialog.noise.info")}),e(d,{fontSize:"xs",pr:5,pt:2,pb:1,children:h("hostsDialog.noise.info.examples")}),e(d,{fontSize:"xs",pr:5,children:"rand:10-20,10-20"}),e(d,{fontSize:"xs",pr:5,children:"rand:10-20,10-20&base64:7nQBAAABAAAAAAAABnQtcmluZwZtc2VkZ2UDbmV0AAABAAE=,10-25"}),e(d,{fontSize:"xs",pr:5,pt:"3",children:h("hostsDialog.noise.info.attention")})]})})]})]}),e(Ae,{size:"sm",borderRadius:"4px",placeholder:"Noise settings by pattern",...i.register(t+"."+c+".noise_setting")}),m&&((T=m[c])==null?void 0:T.noise_setting)&&e(xe,{children:(se=(ee=m[c])==null?void 0:ee.noise_setting)==null?void 0:se.message})]}),e(L,{isInvalid:!!(m&&((fe=m[c])==null?void 0:fe.allowinsecure)),children:r(pt,{...i.register(t+"."+c+".allowinsecure"),name:t+"."+c+".allowinsecure",children:[e(B,{children:h("hostsDialog.allowinsecure")}),m&&((ke=m[c])==null?void 0:ke.allowinsecure)&&e(xe,{children:(nt=(G=m[c])==null?void 0:G.allowinsecure)==null?void 0:nt.message})]})}),r(L,{isInvalid:!!(m&&((ot=m[c])==null?void 0:ot.mux_enable)),children:[e(pt,{...i.register(t+"."+c+".mux_enable"),children:e(B,{children:h("hostsDialog.muxEnable")})}),m&&((st=m[c])==null?void 0:st.mux_enable)&&e(xe,{children:(it=(at=m[c])==null?void 0:at.mux_enable)==null?void 0:it.message})]}),r(L,{isInvalid:!!(m&&((je=m[c])==null?void 0:je.random_user_agent)),children:[e(pt,{...i.register(t+"."+c+".random_user_agent"),children:e(B,{children:h("hostsDialog.randomUserAgent")})}),m&&((or=m[c])==null?void 0:or.random_user_agent)&&e(xe,{children:(ar=(sr=m[c])==null?void 0:sr.random_user_agent)==null?void 0:ar.message})]})]},c)})]})})]},u.id)},u.id)}),e(P,{variant:"outline",w:"full",size:"sm",color:"",fontWeight:"normal",onClick:I,children:h("hostsDialog.addHost")})]})})]})},Js=()=>{const{isEditingHosts:t,onEditingHosts:n,refetchUsers:o,inbounds:s}=z(),{isLoading:a,hosts:i,fetchHosts:l,isPostLoading:p,setHosts:g}=$s(),w=we(),{t:x}=H(),[b,h]=f.exports.useState({});f.exports.useEffect(()=>{t&&l()},[t]);const m=Qe({resolver:xt(qs)});f.exports.useEffect(()=>{i&&t&&m.reset(i)},[i]);const I=()=>{h({}),n(!1)},C=u=>{g(u).then(()=>{w({title:x("hostsDialog.savedSuccess"),status:"success",isClosable:!0,position:"top",duration:3e3}),o()}).catch(c=>{var F,j,D,M,Y;(((F=c==null?void 0:c.response)==null?void 0:F.status)===409||((j=c==null?void 0:c.response)==null?void 0:j.status)===400)&&w({title:(M=(D=c.response)==null?void 0:D._data)==null?void 0:M.detail,status:"error",isClosable:!0,position:"top",duration:3e3}),((Y=c==null?void 0:c.response)==null?void 0:Y.status)===422&&Object.keys(c.response._data.detail).forEach(Z=>{w({title:c.response._data.detail[Z]+" ("+Z+")",status:"error",isClosable:!0,position:"top",duration:3e3})})})},A=u=>{b[String(u)]?delete b[String(u)]:b[String(u)]={},h({...b})};return r(ce,{isOpen:t,onClose:I,children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",w:"fit-content",maxW:"3xl",children:[e(ue,{pt:6,children:e(ge,{color:"primary",children:e(Qs,{color:"white"})})}),e(pe,{mt:3}),e(me,{w:"440px",pb:3,pt:3,children:e(Vr,{...m,children:r("form",{onSubmit:m.handleSubmit(C),children:[e(d,{mb:3,opacity:.8,fontSize:"sm",children:x("hostsDialog.title")}),a&&x("hostsDialog.loading"),!a&&i&&(Object.keys(i).length>0?e(yt,{w:"full",allowToggle:!0,allowMultiple:!0,index:Object.keys(b).map(u=>parseInt(u)),children:e(N,{w:"full",children:Object.keys(i).map((u,c)=>e(Xs,{toggleAccordion:()=>A(c),isOpen:b[String(c)],hostKey:u},u))})}):"No inbound found. Please check your Xray config file."),e(_,{justifyContent:"flex-end",py:2,children:e(P,{variant:"solid",mt:"2",type:"submit",colorScheme:"primary",size:"sm",px:5,isLoading:p,disabled:p,children:x("hostsDialog.apply")})})]})})})]})]})},rr=(t,n,o)=>{if(t.response&&t.response._data){if(typeof t.response._data.detail=="string")return n({title:t.response._data.detail,status:"error",isClosable:!0,position:"top",duration:3e3});if(typeof t.response._data.detail=="object"&&o){Object.keys(t.response._data.detail).forEach(s=>o.setError(s,{message:t.response._data.detail[s]}));return}}return n({title:"Something went wrong!",status:"error",isClosable:!0,position:"top",duration:3e3})},nr=(t,n)=>n({title:t,status:"success",isClosable:!0,position:"top",duration:3e3}),Ks=({deleteCallback:t})=>{const{deleteNode:n,deletingNode:o,setDeletingNode:s}=St(),{t:a}=H(),i=we(),l=Jt(),p=()=>{s(null)},{isLoading:g,mutate:w}=mt(n,{onSuccess:()=>{nr(a("deleteNode.deleteSuccess",{name:o&&o.name}),i),s(null),l.invalidateQueries(ft),t&&t()},onError:x=>{rr(x,i)}});return r(ce,{isCentered:!0,isOpen:!!o,onClose:p,size:"sm",children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",children:[e(ue,{pt:6,children:e(ge,{color:"red",children:e(wt,{})})}),e(pe,{mt:3}),r(me,{children:[e(d,{fontWeight:"semibold",fontSize:"lg",children:a("deleteNode.title")}),o&&e(d,{mt:1,fontSize:"sm",_dark:{color:"gray.400"},color:"gray.600",children:e(Te,{components:{b:e("b",{})},children:a("deleteNode.prompt",{name:o.name})})})]}),r(Pe,{display:"flex",children:[e(P,{size:"sm",onClick:p,mr:3,w:"full",variant:"outline",children:a("cancel")}),e(P,{size:"sm",w:"full",colorScheme:"red",onClick:()=>w(),leftIcon:g?e(He,{size:"xs"}):void 0,children:a("delete")})]})]})]})},Ct={baseStyle:{strokeWidth:"2px",w:4,h:4}},Cr=S(oo,Ct),ea=S(so,Ct),_r=S(ao,Ct),kr=S(Gr,Ct),ta=S(Gr,Ct),Zt=[{title:"No",value:"no_reset"},{title:"Daily",value:"day"},{title:"Weekly",value:"week"},{title:"Monthly",value:"month"},{title:"Annually",value:"year"}],Oe={active:{statusColor:"green",bandWidthColor:"primary",icon:Cr},connected:{statusColor:"green",bandWidthColor:"primary",icon:Cr},disabled:{statusColor:"gray",bandWidthColor:"gray",icon:ea},expired:{statusColor:"orange",bandWidthColor:"orange",icon:kr},on_hold:{statusColor:"purple",bandWidthColor:"purple",icon:ta},connecting:{statusColor:"orange",bandWidthColor:"orange",icon:kr},limited:{statusColor:"red",bandWidthColor:"red",icon:_r},error:{statusColor:"red",bandWidthColor:"red",icon:_r}},Nt=t=>{let n={status:"",time:""};if(t){$(t*1e3).utc().isAfter($().utc())?n.status="expires":n.status="expired";const o=[],s=$.duration($(t*1e3).utc().diff($()));s.years()!=0&&o.push(Math.abs(s.years())+" year"+(Math.abs(s.years())!=1?"s":"")),s.months()!=0&&o.push(Math.abs(s.months())+" month"+(Math.abs(s.months())!=1?"s":"")),s.days()!=0&&o.push(Math.abs(s.days())+" day"+(Math.abs(s.days())!=1?"s":"")),o.length===0&&(s.hours()!=0&&o.push(Math.abs(s.hours())+" hour"+(Math.abs(s.hours())!=1?"s":"")),s.minutes()!=0&&o.push(Math.abs(s.minutes())+" min"+(Math.abs(s.minutes())!=1?"s":""))),n.time=o.join(", ")}return n},ra=({expiryDate:t,status:n,compact:o=!1,showDetail:s=!0,extraText:a})=>{const{t:i}=H(),l=Nt(t),p=Oe[n].icon;return r(ie,{children:[r(E,{colorScheme:Oe[n].statusColor,rounded:"full",display:"inline-flex",px:3,py:1,columnGap:o?1:2,alignItems:"center",children:[e(p,{w:o?3:4}),s&&r(d,{textTransform:"capitalize",fontSize:o?".7rem":".875rem",lineHeight:o?"1rem":"1.25rem",fontWeight:"medium",letterSpacing:"tighter",children:[n&&i(`nodeModal.status.${n}`),a&&`: ${a}`]})]}),s&&t&&e(d,{display:"inline-block",fontSize:"xs",fontWeight:"medium",ml:"2",color:"gray.600",_dark:{color:"gray.400"},children:i(l.status,{time:l.time})})]})},ct=S(Me,{baseStyle:{bg:"white",_dark:{bg:"gray.700"}}}),na=S(Br,{baseStyle:{w:5,h:5}}),oa=S(io,{baseStyle:{w:5,h:5,strokeWidth:2}}),sa=({toggleAccordion:t,node:n})=>{const{updateNode:o,reconnectNode:s,setDeletingNode:a}=St(),{t:i}=H(),l=Jt(),p=we(),g=Qe({defaultValues:n,resolver:xt(an)}),w=a.bind(null,n),{isLoading:x,mutate:b}=mt(o,{onSuccess:()=>{nr("Node updated successfully",p),l.invalidateQueries(ft)},onError:C=>{rr(C,p,g)}}),{isLoading:h,mutate:m}=mt(s.bind(null,n),{onSuccess:()=>{l.invalidateQueries(ft)}}),I=h?"connecting":n.status?n.status:"error";return r(Ve,{border:"1px solid",_dark:{borderColor:"gray.600"},_light:{borderColor:"gray.200"},borderRadius:"4px",p:1,w:"full",children:[r(Ge,{px:2,borderRadius:"3px",onClick:t,children:[r(_,{w:"full",justifyContent:"space-between",pr:2,children:[e(d,{as:"span",fontWeight:"medium",fontSize:"sm",flex:"1",textAlign:"left",color:"gray.700",_dark:{color:"gray.300"},children:n.name}),r(_,{children:[n.xray_version&&e(E,{colorScheme:"blue",rounded:"full",display:"inline-flex",px:3,py:1,children:r(d,{textTransform:"capitalize",fontSize:"0.7rem",fontWeight:"medium",letterSpacing:"tighter",children:["Xray ",n.xray_version]})}),n.status&&e(ra,{status:I,compact:!0})]})]}),e(Vt,{})]}),r(Ye,{px:2,pb:2,children:[e(N,{pb:3,alignItems:"flex-start",children:I==="error"&&e(gt,{status:"error",size:"xs",children:r(v,{children:[r(_,{w:"full",children:[e(Ut,{w:4}),e(d,{marginInlineEnd:0,children:n.message})]}),e(_,{justifyContent:"flex-end",w:"full",children:e(P,{size:"sm","aria-label":"reconnect node",leftIcon:e(tr,{}),onClick:()=>m(),disabled:h,children:i(h?"nodes.reconnecting":"nodes.reconnect")})})]})})}),e(pn,{form:g,mutate:b,isLoading:x,submitBtnText:i("nodes.editNode"),btnLeftAdornment:e(re,{label:i("delete"),placement:"top",children:e(V,{colorScheme:"red",variant:"ghost",size:"sm","aria-label":"delete node",onClick:w,children:e(wt,{})})})})]})]})},aa=({toggleAccordion:t,resetAccordions:n})=>{const o=we(),{t:s}=H(),a=Jt(),{addNode:i}=St(),l=Qe({resolver:xt(an),defaultValues:{...ls(),add_as_new_host:!1}}),{isLoading:p,mutate:g}=mt(i,{onSuccess:()=>{nr(s("nodes.addNodeSuccess",{name:l.getValues("name")}),o),a.invalidateQueries(ft),l.reset(),n()},onError:w=>{rr(w,o,l)}});return r(Ve,{border:"1px solid",_dark:{borderColor:"gray.600"},_light:{borderColor:"gray.200"},borderRadius:"4px",p:1,w:"full",children:[e(Ge,{px:2,borderRadius:"3px",onClick:t,children:r(d,{as:"span",fontWeight:"medium",fontSize:"sm",flex:"1",textAlign:"left",color:"gray.700",_dark:{color:"gray.300"},display:"flex",gap:1,children:[e(oa,{display:"inline-block"})," ",e("span",{children:s("nodes.addNewMarzbanNode")})]})}),e(Ye,{px:2,py:4,children:e(pn,{form:l,mutate:g,isLoading:p,submitBtnText:s("nodes.addNode"),btnProps:{variant:"solid"},addAsHost:!0})})]})},pn=({form:t,mutate:n,isLoading:o,submitBtnText:s,btnProps:a={},btnLeftAdornment:i,addAsHost:l=!1})=>{var m,I,C,A,u,c,F,j,D,M,Y,Z,Q,ne,oe;const{t:p}=H(),[g,w]=f.exports.useState(!1),{data:x,isLoading:b}=Tt({queryKey:"node-settings",queryFn:()=>O("/node/settings")});function h(U){if(document.body.createTextRange){const W=document.body.createTextRange();W.moveToElementText(U),W.select()}else if(window.getSelection){const W=window.getSelection(),X=document.createRange();X.selectNodeContents(U),W.removeAllRanges(),W.addRange(X)}else console.warn("Could not select text in node: Unsupported browser.")}return e("form",{onSubmit:t.handleSubmit(U=>n(U)),children:r(N,{children:[x&&x.certificate&&e(gt,{status:"info",alignItems:"start",children:r(Yr,{display:"flex",flexDirection:"column",overflow:"hidden",children:[e("span",{children:p("nodes.connection-hint")}),r(_,{justify:"end",py:2,children:[e(P,{as:"a",colorScheme:"primary",size:"xs",download:"ssl_client_cert.pem",href:URL.createObjectURL(new Blob([x.certificate],{type:"text/plain"})),children:p("nodes.download-certificate")}),e(re,{placement:"top",label:p("nodes.show-certificate"),children:e(V,{"aria-label":p("nodes.show-certificate"),onClick:w.bind(null,!g),colorScheme:"whiteAlpha",color:"primary",size:"xs",children:g?e(co,{width:"15px"}):e(lo,{width:"15px"})})})]}),e(Zr,{in:g,animateOpacity:!0,children:e(d,{bg:"rgba(255,255,255,.5)",_dark:{bg:"rgba(255,255,255,.2)"},rounded:"md",p:"2",lineHeight:"1.2",fontSize:"10px",fontFamily:"Courier",whiteSpace:"pre",overflow:"auto",onClick:U=>{h(U.target)},children:x.certificate})})]})}),r(_,{w:"full",children:[e(L,{children:e(ct,{label:p("nodes.nodeName"),size:"sm",placeholder:"Marzban-S2",...t.register("name"),error:(C=(I=(m=t.formState)==null?void 0:m.errors)==null?void 0:I.name)==null?void 0:C.message})}),e(_,{px:1,children:e(ye,{name:"status",control:t.control,render:({field:U})=>e(re,{placement:"top",label:`${p("usersTable.status")}: `+(U.value!=="disabled"?p("active"):p("disabled")),textTransform:"capitalize",children:e(v,{mt:"6",children:e(zt,{colorScheme:"primary",isChecked:U.value!=="disabled",onChange:W=>{W.target.checked?U.onChange("connecting"):U.onChange("disabled")}})})},U.value)})})]}),e(_,{alignItems:"flex-start",w:"100%",children:e(v,{w:"100%",children:e(ct,{label:p("nodes.nodeAddress"),size:"sm",placeholder:"51.20.12.13",...t.register("address"),error:(c=(u=(A=t.formState)==null?void 0:A.errors)==null?void 0:u.address)==null?void 0:c.message})})}),r(_,{alignItems:"flex-start",w:"100%",children:[e(v,{children:e(ct,{label:p("nodes.nodePort"),size:"sm",placeholder:"62050",...t.register("port"),error:(D=(j=(F=t.formState)==null?void 0:F.errors)==null?void 0:j.port)==null?void 0:D.message})}),e(v,{children:e(ct,{label:p("nodes.nodeAPIPort"),size:"sm",placeholder:"62051",...t.register("api_port"),error:(Z=(Y=(M=t.formState)==null?void 0:M.errors)==null?void 0:Y.api_port)==null?void 0:Z.message})}),e(v,{children:e(ct,{label:p("nodes.usageCoefficient"),size:"sm",placeholder:"1",...t.register("usage_coefficient"),error:(oe=(ne=(Q=t.formState)==null?void 0:Q.errors)==null?void 0:ne.usage_coefficient)==null?void 0:oe.message})})]}),l&&e(L,{py:1,children:e(pt,{...t.register("add_as_new_host"),children:e(B,{m:0,children:p("nodes.addHostForEveryInbound")})})}),r(_,{w:"full",children:[i,e(P,{flexGrow:1,type:"submit",colorScheme:"primary",size:"sm",px:5,w:"full",isLoading:o,...a,children:s})]})]})})},ia=()=>{const{isEditingNodes:t,onEditingNodes:n}=z(),{t:o}=H(),[s,a]=f.exports.useState({}),{data:i,isLoading:l}=ln(),p=()=>{a({}),n(!1)},g=w=>{s[String(w)]?delete s[String(w)]:s[String(w)]={},a({...s})};return r(ie,{children:[r(ce,{isOpen:t,onClose:p,children:[e(de,{bg:"blackAlpha.300",backdropFilter:"blur(10px)"}),r(he,{mx:"3",w:"fit-content",maxW:"3xl",children:[e(ue,{pt:6,children:e(ge,{color:"primary",children:e(na,{color:"white"})})}),e(pe,{mt:3}),r(me,{w:"440px",pb:6,pt:3,children:[e(d,{mb:3,opacity:.8,fontSize:"sm",children:o("nodes.title")}),l&&"loading...",e(yt,{w:"full",allowToggle:!0,index:Object.keys(s).map(w=>parseInt(w)),children:r(N,{w:"full",children:[!l&&i&&i.map((w,x)=>e(sa,{toggleAccordion:()=>g(x),node:w},w.name)),e(aa,{toggleAccordion:()=>g((i||[]).length),resetAccordions:()=>a({})})]})})]})]})]}),e(Ks,{deleteCallback:()=>a({})})]})};function la(t){const n=360/t,o=90,s=47,a=[];for(let i=0;i<t;i++){const l=i*n%360+140,p=ca(l,o,s);a.push(p)}return a}function ca(t,n,o){t/=360,n/=100,o/=100;let s,a,i;if(n===0)s=a=i=o;else{const p=(x,b,h)=>(h<0&&(h+=1),h>1&&(h-=1),h<.16666666666666666?x+(b-x)*6*h:h<.5?b:h<.6666666666666666?x+(b-x)*(.6666666666666666-h)*6:x),g=o<.5?o*(1+n):o+n-o*n,w=2*o-g;s=Math.round(p(w,g,t+1/3)*255),a=Math.round(p(w,g,t)*255),i=Math.round(p(w,g,t-1/3)*255)}const l=p=>{const g=p.toString(16);return g.length===1?"0"+g:g};return`#${l(s)}${l(a)}${l(i)}`}const Ir=({border:t,...n})=>{const{getInputProps:o,getRadioProps:s}=bo(n),a=We({base:"xs",md:"sm"});return r(v,{as:"label",children:[e("input",{...o()}),e(v,{...s(),minW:"48px",w:"full",h:"full",textAlign:"center",cursor:"pointer",fontSize:a,borderWidth:t?"1px":"0px",borderRadius:"md",_checked:{bg:"primary.500",color:"white",borderColor:"primary.500"},_focus:{boxShadow:"outline"},px:3,py:1,children:n.children})]})},mn=({onChange:t,defaultValue:n,...o})=>{const{t:s,i18n:a}=H();Ze();const i=We({base:["7h","1d","3d","1w"],md:["7h","1d","3d","1w","1m","3m"]}),l={h:"hour",d:"day",w:"week",m:"month",y:"year"},p=We({base:[{title:"hours",options:["1h","3h","6h","12h"]},{title:"days",options:["1d","2d","3d","4d"]},{title:"weeks",options:["1w","2w","3w","4w"]},{title:"months",options:["1m","2m","3m","6m"]}],md:[{title:"hours",options:["1h","2h","3h","6h","8h","12h"]},{title:"days",options:["1d","2d","3d","4d","5d","6d"]},{title:"weeks",options:["1w","2w","3w","4w"]},{title:"months",options:["1m","2m","3m","6m","8m"]}]}),{getRootProps:g,getRadioProps:w,setValue:x}=ho({name:"filter",defaultValue:n,onChange:U=>{if(U==="custom")return;m(),i.indexOf(U)>=0?(A(s("userDialog.custom")),c(!1)):(A(s("userDialog.custom")+` (${U})`),c(!0));const W=Number(U.substring(0,U.length-1)),X=l[U[U.length-1]];t(U,{start:$().utc().subtract(W,X).format("YYYY-MM-DDTHH:00:00")})}}),{isOpen:b,onOpen:h,onClose:m}=uo(),I=f.exports.useRef(null);po({ref:I,handler:m});const[C,A]=f.exports.useState(s("userDialog.custom")),[u,c]=f.exports.useState(!1),[F,j]=f.exports.useState(0),D=We({base:1,md:2}),M=We({base:"xs",md:"sm"}),[Y,Z]=f.exports.useState(null),[Q,ne]=f.exports.useState(null),oe=U=>{const[W,X]=U;Q&&!X?(Z(null),ne(null)):(Z(W),ne(X),W&&X&&(m(),t("custom",{start:$(W).format("YYYY-MM-DDT00:00:00"),end:$(X).format("YYYY-MM-DDT23:59:59")})))};return r(N,{...o,children:[F==0&&r(Kt,{...g(),gap:0,display:"flex",borderWidth:"1px",borderRadius:"md",minW:{base:"320px",md:"400px"},children:[i.map(U=>e(Ir,{...w({value:U}),children:U},U)),e(v,{onClick:()=>{Z(null),ne(null),h()},cursor:"pointer",borderRadius:"md",w:"full",fontSize:M,px:3,py:1,bg:u?"primary.500":"unset",color:u?"white":"unset",borderColor:u?"primary.500":"unset",children:r(_,{children:[e(d,{children:C}),e(Pt,{as:hr,boxSize:"18px"})]})})]}),F==1&&r(_,{onClick:h,cursor:"pointer",fontSize:M,borderRadius:"md",px:3,py:1,minW:{base:"320px",md:"400px"},borderWidth:"1px",children:[e(d,{w:"full",color:Y?"unset":"gray.500",children:Y?$(Y).format("YYYY-MM-DD (00:00)"):s("userDialog.startDate")}),e(Pt,{as:Qr,boxSize:"18px"}),e(d,{w:"full",color:Q?"unset":"gray.500",children:Q?$(Q).format("YYYY-MM-DD (23:59)"):s("userDialog.endDate")}),e(Pt,{as:hr,boxSize:"18px"})]}),e(N,{ref:I,marginTop:"40px !important",borderRadius:"md",borderWidth:"1px",position:"absolute",zIndex:"1",backgroundColor:"white",_dark:{backgroundColor:"gray.700"},display:b?"unset":"none",children:r(mo,{onChange:U=>j(U),children:[r(go,{children:[e(ur,{fontSize:M,children:s("userDialog.relative")}),e(ur,{fontSize:M,children:s("userDialog.absolute")})]}),r(fo,{children:[e(pr,{children:p.map(U=>e(N,{alignItems:"start",pl:2,pr:2,children:r(_,{justifyItems:"flex-start",mb:4,children:[e(d,{fontSize:M,minW:"60px",children:s("userDialog."+U.title)}),U.options.map(W=>e(Ir,{border:!0,...w({value:W}),children:W},W+".custom"))]})},U.title))}),e(pr,{className:"datepicker-panel",children:e(N,{children:e(qr,{locale:a.language.toLocaleLowerCase(),selected:Y,onChange:oe,startDate:Y,endDate:Q,selectsRange:!0,maxDate:new Date,monthsShown:D,peekNextMonth:!1,inline:!0})})})]})]})})]})};function Rt(t,n,o=[],s=[]){const a=ae(o.reduce((i,l)=>i+=l,0));return{series:o,options:{labels:s,chart:{width:"100%",height:"100%",type:"donut",animations:{enabled:!1}},title:{text:`${n}${a}`,align:"center",style:{fontWeight:"var(--chakra-fontWeights-medium)",color:t==="dark"?"var(--chakra-colors-gray-300)":void 0}},legend:{position:"bottom",labels:{colors:t==="dark"?"#CBD5E0":void 0,useSeriesColors:!1}},stroke:{width:1,colors:void 0},dataLabels:{formatter:(i,{seriesIndex:l,w:p})=>ae(p.config.series[l],1)},tooltip:{custom:({series:i,seriesIndex:l,dataPointIndex:p,w:g})=>{const w=ae(i[l],1),x=Math.max(i.reduce((h,m)=>h+=m),1),b=Math.round(i[l]/x*1e3)/10+"%";return`
             <div style="
                     background-color: ${g.globals.colors[l]};
                     padding-left:12px;
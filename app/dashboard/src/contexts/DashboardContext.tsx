@@ -75,7 +75,9 @@ const fetchUsers = (query: FilterType): Promise<User[]> => {
     if (!query[key as keyof FilterType]) delete query[key as keyof FilterType];
   }
   useDashboard.setState({ loading: true });
-  return fetch("/users", { query })
+  return fetch("/users", {
+    query: { ...query, include: ["links", "subscription_url"] },
+  })
     .then((users) => {
       useDashboard.setState({ users });
       return users;
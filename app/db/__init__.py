@@ -29,6 +29,8 @@ from .crud import (create_admin, create_notification_reminder,  # noqa
                    get_or_create_inbound, get_system_usage,
                    get_tls_certificate, get_user, get_user_by_id, get_users,
                    get_users_count, get_users_for_notification, get_users_for_review, get_onhold_users_for_review,
+                   get_users_notification_usage, get_notification_reminders,
+                   review_users_status,
                    remove_admin, remove_user, revoke_user_sub,
                    set_owner, update_admin, update_user, update_user_status, reset_user_by_next,
                    update_user_sub, start_user_expire, get_admin_by_id,
@@ -43,8 +45,11 @@ __all__ = [
     "get_users",
     "get_users_count",
     "get_users_for_review",
+    "review_users_status",
     "get_onhold_users_for_review",
     "get_users_for_notification",
+    "get_users_notification_usage",
+    "get_notification_reminders",
     "create_user",
     "remove_user",
     "update_user",
@@ -2,12 +2,14 @@
 Functions for managing proxy hosts, users, user templates, nodes, and administrative tasks.
 """
 
-from datetime import datetime, timedelta
+import base64
+import json
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
-from sqlalchemy import and_, delete, func, or_
-from sqlalchemy.orm import Query, Session, joinedload
+from sqlalchemy import DateTime, and_, delete, func, insert, literal, or_, select, union, union_all, update
+from sqlalchemy.orm import Query, Session, joinedload, load_only, selectinload
 from sqlalchemy.sql.functions import coalesce
 
 from app.db.models import (
@@ -19,6 +21,8 @@ from app.db.models import (
     Node,
     NodeUsage,
     NodeUserUsage,
+    NodeUserUsageDaily,
+    NodeUserUsageMonthly,
     NotificationReminder,
     Proxy,
     ProxyHost,
@@ -30,7 +34,7 @@ from app.db.models import (
     UserUsageResetLogs,
 )
 from app.models.admin import AdminCreate, AdminModify, AdminPartialModify
-from app.models.node import NodeCreate, NodeModify, NodeStatus, NodeUsageResponse
+from app.models.node import NodeCreate, NodeModify, NodeStatus, NodeUsageResponse, UsageGranularity
 from app.models.proxy import ProxyHost as ProxyHostModify
 from app.models.user import (
     ReminderType,
@@ -42,8 +46,19 @@ from app.models.user import (
     UserUsageResponse,
 )
 from app.models.user_template import UserTemplateCreate, UserTemplateModify
+from app.subscription.cache import subscription_cache
+from app.utils.expiry import expiry_scheduler
 from app.utils.helpers import calculate_expiration_days, calculate_usage_percent
-from config import NOTIFY_DAYS_LEFT, NOTIFY_REACHED_USAGE_PERCENT, USERS_AUTODELETE_DAYS
+from app.utils.quota import quota_index
+from app.utils.store import TTLMemoryStorage
+from config import (
+    NOTIFY_DAYS_LEFT,
+    NOTIFY_REACHED_USAGE_PERCENT,
+    USER_USAGES_DAILY_RETENTION_DAYS,
+    USER_USAGES_HOURLY_RETENTION_DAYS,
+    USERS_AUTODELETE_DAYS,
+    USERS_COUNT_CACHE_TTL,
+)
 
 
 def add_default_host(db: Session, inbound: ProxyInbound):
@@ -221,6 +236,48 @@ UsersSortingOptions = Enum('UsersSortingOptions', {
 })
 
 
+def _get_users_filters(usernames: Optional[List[str]] = None,
+                       search: Optional[str] = None,
+                       status: Optional[Union[UserStatus, list]] = None,
+                       admin: Optional[Admin] = None,
+                       admins: Optional[List[str]] = None,
+                       reset_strategy: Optional[Union[UserDataLimitResetStrategy, list]] = None) -> list:
+    """
+    Builds the filter clauses shared by the users listings.
+
+    Returns:
+        list: Clauses to be passed to Query.filter.
+    """
+    filters = []
+
+    if search:
+        filters.append(or_(User.username.ilike(f"%{search}%"), User.note.ilike(f"%{search}%")))
+
+    if usernames:
+        filters.append(User.username.in_(usernames))
+
+    if status:
+        if isinstance(status, list):
+            filters.append(User.status.in_(status))
+        else:
+            filters.append(User.status == status)
+
+    if reset_strategy:
+        if isinstance(reset_strategy, list):
+            filters.append(User.data_limit_reset_strategy.in_(reset_strategy))
+        else:
+            filters.append(User.data_limit_reset_strategy == reset_strategy)
+
+    if admin:
+        filters.append(User.admin == admin)
+
+    if admins:
+        # compared by admin_id rather than a correlated EXISTS, so it can use the admin_id index
+        filters.append(User.admin_id.in_(select(Admin.id).where(Admin.username.in_(admins))))
+
+    return filters
+
+
 def get_users(db: Session,
               offset: Optional[int] = None,
               limit: Optional[int] = None,
@@ -251,31 +308,14 @@ def get_users(db: Session,
     Returns:
         Union[List[User], Tuple[List[User], int]]: List of users or tuple of users and total count.
     """
-    query = get_user_queryset(db)
-
-    if search:
-        query = query.filter(or_(User.username.ilike(f"%{search}%"), User.note.ilike(f"%{search}%")))
-
-    if usernames:
-        query = query.filter(User.username.in_(usernames))
-
-    if status:
-        if isinstance(status, list):
-            query = query.filter(User.status.in_(status))
-        else:
-            query = query.filter(User.status == status)
-
-    if reset_strategy:
-        if isinstance(reset_strategy, list):
-            query = query.filter(User.data_limit_reset_strategy.in_(reset_strategy))
-        else:
-            query = query.filter(User.data_limit_reset_strategy == reset_strategy)
-
-    if admin:
-        query = query.filter(User.admin == admin)
-
-    if admins:
-        query = query.filter(User.admin.has(Admin.username.in_(admins)))
+    query = get_user_queryset(db).filter(*_get_users_filters(
+        usernames=usernames,
+        search=search,
+        status=status,
+        admin=admin,
+        admins=admins,
+        reset_strategy=reset_strategy,
+    ))
 
     if return_with_count:
         count = query.count()
@@ -294,7 +334,217 @@ def get_users(db: Session,
     return query.all()
 
 
-def get_users_for_review(db: Session, now_ts: float) -> List[User]:
+# sort options usable with cursor pagination, their columns can't be NULL
+KEYSET_SORTING_OPTIONS = ('username', 'used_traffic', 'created_at')
+
+# columns of users a listing page needs, the rest are left unloaded
+_USERS_PAGE_COLUMNS = (
+    User.id, User.username, User.status, User.used_traffic, User.lifetime_used_traffic, User.data_limit,
+    User.data_limit_reset_strategy,
+    User.expire, User.admin_id, User.sub_updated_at, User.sub_last_user_agent, User.created_at, User.note,
+    User.online_at, User.on_hold_expire_duration, User.on_hold_timeout, User.auto_delete_in_days,
+)
+
+_users_count_cache = TTLMemoryStorage(USERS_COUNT_CACHE_TTL)
+
+
+def encode_users_cursor(sort: str, user: User) -> str:
+    """
+    Encodes the position after a user of a listing sorted by the given option.
+    """
+    value = getattr(user, sort.lstrip('-'))
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, user.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_users_cursor(cursor: str, sort: str) -> Tuple[Union[str, int, datetime], int]:
+    """
+    Decodes a cursor made by encode_users_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or was made for another sort option.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, user_id = json.loads(raw)
+    except (ValueError, TypeError) as err:
+        raise ValueError("invalid cursor") from err
+
+    if cursor_sort != sort or not isinstance(user_id, int):
+        raise ValueError("cursor doesn't match the sort option")
+
+    try:
+        if sort.lstrip('-') == 'created_at':
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, str if sort.lstrip('-') == 'username' else int):
+            raise TypeError
+    except (ValueError, TypeError) as err:
+        raise ValueError("invalid cursor") from err
+
+    return value, user_id
+
+
+def count_users(db: Session, cached: bool = False, **filters) -> int:
+    """
+    Counts users matching the filters of get_users.
+
+    Args:
+        db (Session): Database session.
+        cached (bool): Whether a count made in the last USERS_COUNT_CACHE_TTL seconds may be returned.
+        **filters: Filters accepted by get_users.
+
+    Returns:
+        int: Number of matching users.
+    """
+    key = None
+    if cached and USERS_COUNT_CACHE_TTL > 0:
+        key = tuple(
+            (name, tuple(value) if isinstance(value, list) else getattr(value, 'id', value))
+            for name, value in sorted(filters.items())
+        )
+        count = _users_count_cache.get(key)
+        if count is not None:
+            return count
+
+    count = db.query(func.count(User.id)).filter(*_get_users_filters(**filters)).scalar()
+
+    if key is not None:
+        _users_count_cache.set(key, count)
+    return count
+
+
+def get_users_page(db: Session,
+                   cursor: Optional[str] = None,
+                   limit: Optional[int] = None,
+                   sort: Optional[UsersSortingOptions] = None,
+                   **filters) -> Tuple[List[User], Optional[str]]:
+    """
+    Retrieves a page of users using keyset (cursor) pagination.
+
+    Unlike offset pagination, the cost of a page doesn't grow with its position.
+    Only the columns a listing needs are loaded, and proxies and excluded inbounds
+    are loaded for the whole page with one IN query each.
+
+    Args:
+        db (Session): Database session.
+        cursor (Optional[str]): Cursor returned with the previous page, None for the first page.
+        limit (Optional[int]): Number of records to retrieve.
+        sort (Optional[UsersSortingOptions]): Sorting option, one of KEYSET_SORTING_OPTIONS with optional "-".
+        **filters: Filters accepted by get_users.
+
+    Returns:
+        Tuple[List[User], Optional[str]]: Users of the page and the cursor of the next page, if there is one.
+
+    Raises:
+        ValueError: If the sort option can't be used with cursors or the cursor is invalid.
+    """
+    sort = sort.name if sort else 'username'
+    if sort.lstrip('-') not in KEYSET_SORTING_OPTIONS:
+        raise ValueError(f'"{sort}" sort option is not supported with cursor pagination')
+
+    column = getattr(User, sort.lstrip('-'))
+    descending = sort.startswith('-')
+
+    query = db.query(User).options(
+        load_only(*_USERS_PAGE_COLUMNS),
+        joinedload(User.admin),
+        joinedload(User.next_plan),
+        selectinload(User.proxies).selectinload(Proxy.excluded_inbounds),
+    ).filter(*_get_users_filters(**filters))
+
+    if cursor:
+        value, user_id = decode_users_cursor(cursor, sort)
+        if descending:
+            query = query.filter(or_(column < value, and_(column == value, User.id < user_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, User.id > user_id)))
+
+    if descending:
+        query = query.order_by(column.desc(), User.id.desc())
+    else:
+        query = query.order_by(column.asc(), User.id.asc())
+
+    if limit:
+        # one extra row tells whether there's a next page
+        users = query.limit(limit + 1).all()
+        if len(users) > limit:
+            return users[:limit], encode_users_cursor(sort, users[limit - 1])
+        return users, None
+
+    return query.all(), None
+
+
+# columns of the users export, in order
+USERS_EXPORT_COLUMNS = (
+    'id', 'username', 'status', 'data_limit', 'data_limit_reset_strategy', 'expire',
+    'on_hold_expire_duration', 'on_hold_timeout', 'created_at', 'online_at', 'sub_updated_at', 'note', 'admin',
+)
+USERS_EXPORT_USAGE_COLUMNS = ('used_traffic', 'lifetime_used_traffic')
+
+
+def iter_users_export(db: Session,
+                      usage: bool = False,
+                      batch_size: int = 1000,
+                      **filters) -> Iterator[dict]:
+    """
+    Yields users as plain rows of USERS_EXPORT_COLUMNS, for exporting all of them.
+
+    Rows are fetched from a server side cursor `batch_size` at a time without
+    building ORM objects, so memory doesn't grow with the number of users.
+
+    Args:
+        db (Session): Database session.
+        usage (bool): Whether to add the USERS_EXPORT_USAGE_COLUMNS.
+        batch_size (int): Number of rows fetched at a time.
+        **filters: Filters accepted by get_users.
+
+    Yields:
+        dict: Column name to value of each user, ordered by id.
+    """
+    columns = [getattr(User, name) for name in USERS_EXPORT_COLUMNS[:-1]] + [Admin.username.label('admin')]
+    if usage:
+        columns += [getattr(User, name) for name in USERS_EXPORT_USAGE_COLUMNS]
+
+    query = db.query(*columns) \
+        .select_from(User) \
+        .outerjoin(Admin, User.admin_id == Admin.id) \
+        .filter(*_get_users_filters(**filters)) \
+        .order_by(User.id) \
+        .yield_per(batch_size)
+
+    for row in query:
+        yield row._asdict()
+
+
+def _review_conditions(now_ts: float, statuses: Optional[List[UserStatus]] = None,
+                       user_ids: Optional[List[int]] = None) -> Dict[UserStatus, tuple]:
+    """
+    Conditions of the active users to be limited or expired, limiting comes first.
+    """
+    conditions = {
+        UserStatus.limited: (
+            User.status == UserStatus.active,
+            User.data_limit.isnot(None),
+            User.used_traffic >= User.data_limit,
+        ),
+        UserStatus.expired: (
+            User.status == UserStatus.active,
+            User.expire.isnot(None),
+            User.expire <= now_ts,
+        ),
+    }
+    return {
+        status: (*status_conditions, User.id.in_(user_ids)) if user_ids is not None else status_conditions
+        for status, status_conditions in conditions.items()
+        if statuses is None or status in statuses
+    }
+
+
+def get_users_for_review(db: Session, now_ts: float, next_plan: Optional[bool] = None,
+                         statuses: Optional[List[UserStatus]] = None,
+                         user_ids: Optional[List[int]] = None) -> List[User]:
     """
     Retrieves active users who need to be reviewed for status change.
     
@@ -305,27 +555,87 @@ def get_users_for_review(db: Session, now_ts: float) -> List[User]:
     Args:
         db (Session): Database session.
         now_ts (float): Current timestamp to check expiration against.
+        next_plan (Optional[bool]): Only users with (True) or without (False) a next plan.
+        statuses (Optional[List[UserStatus]]): Only users due for these statuses.
+        user_ids (Optional[List[int]]): Only users among these.
 
     Returns:
         List[User]: List of active users who need status review.
     """
-    query = get_user_queryset(db).filter(
-        User.status == UserStatus.active,
-        or_(
-            # Limited: has data_limit and used_traffic >= data_limit
-            and_(
-                User.data_limit.isnot(None),
-                User.used_traffic >= User.data_limit
-            ),
-            # Expired: has expire and expire <= now_ts
-            and_(
-                User.expire.isnot(None),
-                User.expire <= now_ts
-            )
-        )
-    )
+    # each condition is its own query over its own index, OR-ing them would scan the table
+    query = get_user_queryset(db).filter(User.id.in_(union_all(
+        *(select(User.id).where(*conditions) for conditions in _review_conditions(now_ts, statuses, user_ids).values())
+    )))
+    if next_plan is not None:
+        has_next_plan = select(NextPlan.user_id).where(NextPlan.user_id == User.id).exists()
+        query = query.filter(has_next_plan if next_plan else ~has_next_plan)
     return query.all()
 
+
+def review_users_status(db: Session, now_ts: float, statuses: Optional[List[UserStatus]] = None,
+                        user_ids: Optional[List[int]] = None) -> Dict[UserStatus, List[User]]:
+    """
+    Limits or expires all the active users without a next plan due for it,
+    with one UPDATE per status.
+
+    Args:
+        db (Session): Database session.
+        now_ts (float): Current timestamp to check expiration against.
+        statuses (Optional[List[UserStatus]]): Only review for these statuses.
+        user_ids (Optional[List[int]]): Only review these users.
+
+    Returns:
+        Dict[UserStatus, List[User]]: The changed users by their new status.
+    """
+    now = datetime.utcnow()
+    no_next_plan = ~select(NextPlan.user_id).where(NextPlan.user_id == User.id).exists()
+
+    changed = {}
+    for status, conditions in _review_conditions(now_ts, statuses, user_ids).items():
+        stmt = update(User).values(status=status, last_status_change=now) \
+            .execution_options(synchronize_session=False)
+
+        if db.bind.dialect.update_returning:
+            ids = db.execute(stmt.where(*conditions, no_next_plan).returning(User.id)).scalars().all()
+        else:
+            # the rows stay locked until the commit, so they can't change in between
+            ids = db.execute(
+                select(User.id).where(*conditions, no_next_plan).with_for_update()
+            ).scalars().all()
+            if ids:
+                db.execute(stmt.where(User.id.in_(ids)))
+        changed[status] = ids
+
+    db.commit()
+
+    query = get_user_queryset(db).options(selectinload(User.proxies).selectinload(Proxy.excluded_inbounds))
+    for status, ids in changed.items():
+        changed[status] = [
+            user
+            for i in range(0, len(ids), 1000)
+            for user in query.filter(User.id.in_(ids[i:i + 1000])).all()
+        ]
+    return changed
+
+
+def get_users_remaining_quota(db: Session) -> List[Tuple[int, int]]:
+    """
+    Retrieves the remaining data quota (data_limit - used_traffic) of the active users with a data limit.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        List[Tuple[int, int]]: Ids and remaining quotas of the users.
+    """
+    return db.execute(
+        select(User.id, User.data_limit - func.coalesce(User.used_traffic, 0)).where(
+            User.status == UserStatus.active,
+            User.data_limit.isnot(None),
+        )
+    ).all()
+
+
 def get_users_for_notification(db: Session, now_ts: float, max_days_lookahead: float) -> List[User]:
     """
     Retrieves active users who are eligible for notification reminders.
@@ -353,7 +663,45 @@ def get_users_for_notification(db: Session, now_ts: float, max_days_lookahead: f
     return query.all()
 
 
-def get_onhold_users_for_review(db: Session, now: datetime) -> List[User]:
+def get_users_notification_usage(db: Session, now_ts: float, usage_percent: Optional[int] = None,
+                                 days_left: Optional[int] = None) -> List[Tuple[int, str, int, int, int]]:
+    """
+    Retrieves the usage and expire of the active users who reached a usage percent
+    of their data limit or are close to expiring.
+
+    Args:
+        db (Session): Database session.
+        now_ts (float): Current timestamp to check expiration against.
+        usage_percent (Optional[int]): Lowest usage percent to include users from.
+        days_left (Optional[int]): Highest number of days left to include users from.
+
+    Returns:
+        List[Tuple[int, str, int, int, int]]: Ids, usernames, used traffics, data limits and expires of the users.
+    """
+    columns = (User.id, User.username, User.used_traffic, User.data_limit, User.expire)
+    queries = []
+    if usage_percent is not None:
+        queries.append(select(*columns).where(
+            User.status == UserStatus.active,
+            User.data_limit.isnot(None),
+            User.used_traffic * 100 >= User.data_limit * usage_percent,
+        ))
+    if days_left is not None:
+        # a day wider than days_left, the days are counted by calculate_expiration_days.
+        # no lower bound, active users past their expire still get the reminders missed
+        # while the job wasn't running, until they're expired
+        queries.append(select(*columns).where(
+            User.status == UserStatus.active,
+            User.expire.isnot(None),
+            User.expire <= now_ts + (days_left + 2) * 86400,
+        ))
+
+    if not queries:
+        return []
+    return db.execute(union(*queries)).all()
+
+
+def get_onhold_users_for_review(db: Session, now: datetime, user_ids: Optional[List[int]] = None) -> List[User]:
     """
     Retrieves on-hold users who need to be activated.
     
@@ -364,6 +712,7 @@ def get_onhold_users_for_review(db: Session, now: datetime) -> List[User]:
     Args:
         db (Session): Database session.
         now (datetime): Current datetime to check timeout against.
+        user_ids (Optional[List[int]]): Only users among these.
 
     Returns:
         List[User]: List of on-hold users who need to be activated.
@@ -371,62 +720,173 @@ def get_onhold_users_for_review(db: Session, now: datetime) -> List[User]:
     # Base time is edit_at if set, otherwise created_at
     base_time = coalesce(User.edit_at, User.created_at)
     
-    query = get_user_queryset(db).filter(
+    # each condition is its own query over its own index, OR-ing them would scan the table
+    came_online = select(User.id).where(
         User.status == UserStatus.on_hold,
-        or_(
-            # User came online after base_time
-            and_(
-                User.online_at.isnot(None),
-                base_time <= User.online_at
-            ),
-            # On-hold timeout has been reached
-            and_(
-                User.on_hold_timeout.isnot(None),
-                User.on_hold_timeout <= now
-            )
-        )
+        User.online_at.isnot(None),
+        base_time <= User.online_at,
+    )
+    timed_out = select(User.id).where(
+        User.status == UserStatus.on_hold,
+        User.on_hold_timeout.isnot(None),
+        User.on_hold_timeout <= now,
     )
+    if user_ids is not None:
+        came_online = came_online.where(User.id.in_(user_ids))
+        timed_out = timed_out.where(User.id.in_(user_ids))
+
+    query = get_user_queryset(db).filter(User.id.in_(union_all(came_online, timed_out)))
     return query.all()
 
 
-def get_user_usages(db: Session, dbuser: User, start: datetime, end: datetime) -> List[UserUsageResponse]:
+def get_users_expiry(db: Session) -> List[Tuple[int, UserStatus, Optional[int], Optional[datetime]]]:
     """
-    Retrieves user usages within a specified date range.
+    Retrieves the expiry of the active users with an expire and the on-hold users with a timeout.
 
     Args:
         db (Session): Database session.
-        dbuser (User): The user object.
-        start (datetime): Start date for usage retrieval.
-        end (datetime): End date for usage retrieval.
 
     Returns:
-        List[UserUsageResponse]: List of user usage responses.
+        List[Tuple[int, UserStatus, Optional[int], Optional[datetime]]]:
+            Ids, statuses, expires and on-hold timeouts of the users.
     """
+    columns = (User.id, User.status, User.expire, User.on_hold_timeout)
+    return db.execute(union_all(
+        select(*columns).where(User.status == UserStatus.active, User.expire.isnot(None)),
+        select(*columns).where(User.status == UserStatus.on_hold, User.on_hold_timeout.isnot(None)),
+    )).all()
+
 
-    usages = {0: UserUsageResponse(  # Main Core
-        node_id=None,
-        node_name="Master",
-        used_traffic=0
-    )}
+# strftime patterns of the start of each usage period, shared by sqlite and mysql
+_USAGE_PERIOD_FORMATS = {
+    UsageGranularity.hour: '%Y-%m-%d %H:00:00',
+    UsageGranularity.day: '%Y-%m-%d 00:00:00',
+    UsageGranularity.month: '%Y-%m-01 00:00:00',
+}
 
-    for node in db.query(Node).all():
-        usages[node.id] = UserUsageResponse(
-            node_id=node.id,
-            node_name=node.name,
-            used_traffic=0
+
+def _usage_period(db: Session, column, granularity: UsageGranularity):
+    """
+    Returns an SQL expression of the start of the period the column falls in, as text.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return func.to_char(func.date_trunc(granularity.value, column), 'YYYY-MM-DD HH24:MI:SS')
+    if dialect in ('mysql', 'mariadb'):
+        return func.date_format(column, _USAGE_PERIOD_FORMATS[granularity])
+    return func.strftime(_USAGE_PERIOD_FORMATS[granularity], column)
+
+
+def _get_usages_node_names(db: Session) -> Dict[int, str]:
+    names = {0: "Master"}  # Main Core
+    names.update(db.query(Node.id, Node.name).all())
+    return names
+
+
+def get_user_usages_rollup_cutoffs(now: datetime) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Returns the time before which hourly usages are rolled up into daily ones, and the time
+    before which daily usages are rolled up into monthly ones, None if they're kept forever.
+
+    Args:
+        now (datetime): Current UTC datetime.
+
+    Returns:
+        Tuple[Optional[datetime], Optional[datetime]]: Start of a day and start of a month.
+    """
+    hourly_cutoff = monthly_cutoff = None
+    if USER_USAGES_HOURLY_RETENTION_DAYS > 0:
+        hourly_cutoff = (now - timedelta(days=USER_USAGES_HOURLY_RETENTION_DAYS)) \
+            .replace(hour=0, minute=0, second=0, microsecond=0)
+    if USER_USAGES_DAILY_RETENTION_DAYS > 0:
+        monthly_cutoff = (now - timedelta(days=USER_USAGES_DAILY_RETENTION_DAYS)) \
+            .replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return hourly_cutoff, monthly_cutoff
+
+
+def _get_user_usages_tables(start: datetime) -> list:
+    """
+    Returns the usages tables which may have records after start, coarser ones hold only older records.
+    """
+    if start.tzinfo is not None:
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+
+    hourly_cutoff, monthly_cutoff = get_user_usages_rollup_cutoffs(datetime.utcnow())
+    tables = [NodeUserUsage]
+    if hourly_cutoff is not None and start < hourly_cutoff:
+        tables.append(NodeUserUsageDaily)
+        if monthly_cutoff is not None and start < monthly_cutoff:
+            tables.append(NodeUserUsageMonthly)
+    return tables
+
+
+def _get_users_usages(db: Session,
+                      user_cond: Callable,
+                      start: datetime,
+                      end: datetime,
+                      granularity: Optional[UsageGranularity] = None) -> List[UserUsageResponse]:
+    """
+    Sums users' usages matching the condition per node, and per period if granularity is given.
+
+    Only the usages tables which can have records in the range are queried, records
+    rolled up into days or months count as a whole when their start is in the range.
+    """
+    node_names = _get_usages_node_names(db)
+    usages = union_all(*(
+        select(table.created_at, table.node_id, table.used_traffic)
+        .where(user_cond(table), table.created_at >= start, table.created_at <= end)
+        for table in _get_user_usages_tables(start)
+    )).subquery()
+    used_traffic = func.sum(usages.c.used_traffic)
+
+    if granularity is None:
+        result = {node_id: UserUsageResponse(node_id=node_id or None, node_name=name, used_traffic=0)
+                  for node_id, name in node_names.items()}
+        for node_id, traffic in db.query(usages.c.node_id, used_traffic).group_by(usages.c.node_id):
+            try:
+                result[node_id or 0].used_traffic += int(traffic)
+            except KeyError:
+                pass
+        return list(result.values())
+
+    period = _usage_period(db, usages.c.created_at, granularity)
+    query = db.query(period, usages.c.node_id, used_traffic) \
+        .group_by(period, usages.c.node_id) \
+        .order_by(period, usages.c.node_id)
+
+    return [
+        UserUsageResponse(
+            node_id=node_id,
+            node_name=node_names[node_id or 0],
+            used_traffic=int(traffic),
+            period=datetime.fromisoformat(p),
         )
+        for p, node_id, traffic in query if (node_id or 0) in node_names
+    ]
+
+
+def get_user_usages(db: Session,
+                    dbuser: User,
+                    start: datetime,
+                    end: datetime,
+                    granularity: Optional[UsageGranularity] = None) -> List[UserUsageResponse]:
+    """
+    Retrieves user usages within a specified date range.
 
-    cond = and_(NodeUserUsage.user_id == dbuser.id,
-                NodeUserUsage.created_at >= start,
-                NodeUserUsage.created_at <= end)
+    Usages are summed by the database, per node and also per period when granularity is given,
+    then only periods with usage are returned.
 
-    for v in db.query(NodeUserUsage).filter(cond):
-        try:
-            usages[v.node_id or 0].used_traffic += v.used_traffic
-        except KeyError:
-            pass
+    Args:
+        db (Session): Database session.
+        dbuser (User): The user object.
+        start (datetime): Start date for usage retrieval.
+        end (datetime): End date for usage retrieval.
+        granularity (Optional[UsageGranularity]): Length of the periods to split usages by.
 
-    return list(usages.values())
+    Returns:
+        List[UserUsageResponse]: List of user usage responses.
+    """
+    return _get_users_usages(db, lambda table: table.user_id == dbuser.id, start, end, granularity)
 
 
 def get_users_count(db: Session, status: UserStatus = None, admin: Admin = None) -> int:
@@ -449,6 +909,27 @@ def get_users_count(db: Session, status: UserStatus = None, admin: Admin = None)
     return query.count()
 
 
+# days between the periodic data usage resets of each strategy
+reset_strategy_to_days = {
+    UserDataLimitResetStrategy.day.value: 1,
+    UserDataLimitResetStrategy.week.value: 7,
+    UserDataLimitResetStrategy.month.value: 30,
+    UserDataLimitResetStrategy.year.value: 365,
+}
+
+
+def _update_next_reset_at(dbuser: User) -> None:
+    """
+    Sets when the data usage of the user is due to be reset by its reset strategy.
+    """
+    days = reset_strategy_to_days.get(dbuser.data_limit_reset_strategy)
+    if not days:
+        dbuser.next_reset_at = None
+        return
+    # a new user has no created_at until it's flushed
+    dbuser.next_reset_at = (dbuser.last_traffic_reset_time or datetime.utcnow()) + timedelta(days=days)
+
+
 def create_user(db: Session, user: UserCreate, admin: Admin = None) -> User:
     """
     Creates a new user with provided details.
@@ -492,9 +973,12 @@ def create_user(db: Session, user: UserCreate, admin: Admin = None) -> User:
             fire_on_either=user.next_plan.fire_on_either,
         ) if user.next_plan else None
     )
+    _update_next_reset_at(dbuser)
     db.add(dbuser)
     db.commit()
     db.refresh(dbuser)
+    expiry_scheduler.schedule_user(dbuser)
+    quota_index.update_user(dbuser)
     return dbuser
 
 
@@ -511,6 +995,7 @@ def remove_user(db: Session, dbuser: User) -> User:
     """
     db.delete(dbuser)
     db.commit()
+    subscription_cache.invalidate_user(dbuser.id)
     return dbuser
 
 
@@ -525,6 +1010,8 @@ def remove_users(db: Session, dbusers: List[User]):
     for dbuser in dbusers:
         db.delete(dbuser)
     db.commit()
+    for dbuser in dbusers:
+        subscription_cache.invalidate_user(dbuser.id)
     return
 
 
@@ -603,6 +1090,7 @@ def update_user(db: Session, dbuser: User, modify: UserModify) -> User:
 
     if modify.data_limit_reset_strategy is not None:
         dbuser.data_limit_reset_strategy = modify.data_limit_reset_strategy.value
+        _update_next_reset_at(dbuser)
 
     if modify.on_hold_timeout is not None:
         dbuser.on_hold_timeout = modify.on_hold_timeout
@@ -624,9 +1112,23 @@ def update_user(db: Session, dbuser: User, modify: UserModify) -> User:
 
     db.commit()
     db.refresh(dbuser)
+    subscription_cache.invalidate_user(dbuser.id)
+    expiry_scheduler.schedule_user(dbuser)
+    quota_index.update_user(dbuser)
     return dbuser
 
 
+def _delete_node_user_usages(db: Session, user_cond: Optional[Callable] = None):
+    """
+    Deletes the hourly, daily and monthly node usages of users matching the condition, or of all users.
+    """
+    for table in (NodeUserUsage, NodeUserUsageDaily, NodeUserUsageMonthly):
+        stmt = delete(table)
+        if user_cond is not None:
+            stmt = stmt.where(user_cond(table))
+        db.execute(stmt.execution_options(synchronize_session=False))
+
+
 def reset_user_data_usage(db: Session, dbuser: User) -> User:
     """
     Resets the data usage of a user and logs the reset.
@@ -641,11 +1143,14 @@ def reset_user_data_usage(db: Session, dbuser: User) -> User:
     usage_log = UserUsageResetLogs(
         user=dbuser,
         used_traffic_at_reset=dbuser.used_traffic,
+        reset_at=datetime.utcnow(),
     )
     db.add(usage_log)
+    dbuser.last_reset_at = usage_log.reset_at
+    _update_next_reset_at(dbuser)
 
     dbuser.used_traffic = 0
-    dbuser.node_usages.clear()
+    _delete_node_user_usages(db, lambda table: table.user_id == dbuser.id)
     if dbuser.status not in (UserStatus.expired or UserStatus.disabled):
         dbuser.status = UserStatus.active.value
 
@@ -656,6 +1161,8 @@ def reset_user_data_usage(db: Session, dbuser: User) -> User:
 
     db.commit()
     db.refresh(dbuser)
+    expiry_scheduler.schedule_user(dbuser)
+    quota_index.update_user(dbuser)
     return dbuser
 
 
@@ -677,10 +1184,13 @@ def reset_user_by_next(db: Session, dbuser: User) -> User:
     usage_log = UserUsageResetLogs(
         user=dbuser,
         used_traffic_at_reset=dbuser.used_traffic,
+        reset_at=datetime.utcnow(),
     )
     db.add(usage_log)
+    dbuser.last_reset_at = usage_log.reset_at
+    _update_next_reset_at(dbuser)
 
-    dbuser.node_usages.clear()
+    _delete_node_user_usages(db, lambda table: table.user_id == dbuser.id)
     dbuser.status = UserStatus.active.value
 
     dbuser.data_limit = dbuser.next_plan.data_limit + \
@@ -707,6 +1217,8 @@ def reset_user_by_next(db: Session, dbuser: User) -> User:
 
     db.commit()
     db.refresh(dbuser)
+    expiry_scheduler.schedule_user(dbuser)
+    quota_index.update_user(dbuser)
     return dbuser
 
 
@@ -767,18 +1279,85 @@ def reset_all_users_data_usage(db: Session, admin: Optional[Admin] = None):
     if admin:
         query = query.filter(User.admin == admin)
 
+    _delete_node_user_usages(
+        db, (lambda table: table.user_id.in_(select(User.id).where(User.admin_id == admin.id))) if admin else None
+    )
+
+    schedule = []
     for dbuser in query.all():
         dbuser.used_traffic = 0
+        dbuser.lifetime_used_traffic = 0
+        dbuser.last_reset_at = None
+        _update_next_reset_at(dbuser)
         if dbuser.status not in [UserStatus.on_hold, UserStatus.expired, UserStatus.disabled]:
             dbuser.status = UserStatus.active
         dbuser.usage_logs.clear()
-        dbuser.node_usages.clear()
         if dbuser.next_plan:
             db.delete(dbuser.next_plan)
             dbuser.next_plan = None
         db.add(dbuser)
+        schedule.append((dbuser.id, dbuser.status, dbuser.expire, dbuser.on_hold_timeout))
 
     db.commit()
+    for row in schedule:
+        expiry_scheduler.schedule(*row)
+    quota_index.invalidate()
+
+
+def reset_users_data_usage_by_strategy(db: Session, now: datetime) -> Tuple[List[str], List[User]]:
+    """
+    Resets the data usage of the active and limited users due for it by their reset strategy,
+    with a bulk insert of their usage logs and an update per strategy.
+
+    Args:
+        db (Session): Database session.
+        now (datetime): Current datetime to check next_reset_at against, also logged as the reset time.
+
+    Returns:
+        Tuple[List[str], List[User]]: Usernames of the reset users and the users reactivated by the reset.
+    """
+    due = and_(
+        User.status.in_((UserStatus.active, UserStatus.limited)),
+        User.next_reset_at <= now,
+    )
+    due_users = select(User.id).where(due)
+
+    # the rows stay locked until the commit, so the usage can't grow between logging and resetting it
+    rows = db.execute(
+        select(User.id, User.username, User.status, User.expire, User.on_hold_timeout).where(due).with_for_update()
+    ).all()
+    if not rows:
+        return [], []
+
+    db.execute(insert(UserUsageResetLogs).from_select(
+        [UserUsageResetLogs.user_id, UserUsageResetLogs.used_traffic_at_reset, UserUsageResetLogs.reset_at],
+        select(User.id, User.used_traffic, literal(now, DateTime)).where(due),
+    ))
+    _delete_node_user_usages(db, lambda table: table.user_id.in_(due_users))
+    db.execute(delete(NextPlan).where(NextPlan.user_id.in_(due_users)).execution_options(synchronize_session=False))
+
+    for strategy, days in reset_strategy_to_days.items():
+        db.execute(
+            update(User).where(due, User.data_limit_reset_strategy == strategy)
+            .values(used_traffic=0, last_reset_at=now, next_reset_at=now + timedelta(days=days),
+                    status=UserStatus.active)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+    limited = [row.id for row in rows if row.status == UserStatus.limited]
+    for row in rows:
+        expiry_scheduler.schedule(row.id, UserStatus.active, row.expire, row.on_hold_timeout)
+    if rows:
+        quota_index.invalidate()
+
+    query = get_user_queryset(db).options(selectinload(User.proxies).selectinload(Proxy.excluded_inbounds))
+    reactivated = [
+        user
+        for i in range(0, len(limited), 1000)
+        for user in query.filter(User.id.in_(limited[i:i + 1000])).all()
+    ]
+    return [row.username for row in rows], reactivated
 
 
 def disable_all_active_users(db: Session, admin: Optional[Admin] = None) -> List[User]:
@@ -806,6 +1385,9 @@ def disable_all_active_users(db: Session, admin: Optional[Admin] = None) -> List
             synchronize_session=False
         )
         db.commit()
+        for user_id in user_ids:
+            expiry_scheduler.schedule(user_id, UserStatus.disabled, None, None)
+        quota_index.invalidate()
 
     return affected_users
 
@@ -839,7 +1421,8 @@ def activate_all_disabled_users(db: Session, admin: Optional[Admin] = None) -> L
         query_for_on_hold_users = query_for_on_hold_users.filter(User.admin == admin)
 
     # Get the IDs of users who should be on_hold (to exclude from active users list)
-    on_hold_user_ids = {user.id for user in query_for_on_hold_users.all()}
+    users_to_hold = query_for_on_hold_users.all()
+    on_hold_user_ids = {user.id for user in users_to_hold}
     
     # Fetch all disabled users and filter out those going to on_hold
     all_disabled_users = query_for_active_users.all()
@@ -860,7 +1443,12 @@ def activate_all_disabled_users(db: Session, admin: Optional[Admin] = None) -> L
             synchronize_session=False
         )
 
+    schedule = [(user.id, UserStatus.on_hold, user.expire, user.on_hold_timeout) for user in users_to_hold] + \
+        [(user.id, UserStatus.active, user.expire, user.on_hold_timeout) for user in users_to_activate]
     db.commit()
+    for row in schedule:
+        expiry_scheduler.schedule(*row)
+    quota_index.invalidate()
 
     # Return only users that became active (they need to be added to xray)
     return users_to_activate
@@ -907,7 +1495,7 @@ def autodelete_expired_users(db: Session,
 
 
 def get_all_users_usages(
-        db: Session, admin: Admin, start: datetime, end: datetime
+        db: Session, admin: Admin, start: datetime, end: datetime, granularity: Optional[UsageGranularity] = None
 ) -> List[UserUsageResponse]:
     """
     Retrieves usage data for all users associated with an admin within a specified time range.
@@ -920,39 +1508,14 @@ def get_all_users_usages(
         admin (Admin): The admin user for which to retrieve user usage data.
         start (datetime): The start date and time of the period to consider.
         end (datetime): The end date and time of the period to consider.
+        granularity (Optional[UsageGranularity]): Length of the periods to split usages by.
 
     Returns:
         List[UserUsageResponse]: A list of UserUsageResponse objects, each representing
         the usage data for a specific node or the main core.
     """
-    usages = {0: UserUsageResponse(  # Main Core
-        node_id=None,
-        node_name="Master",
-        used_traffic=0
-    )}
-
-    for node in db.query(Node).all():
-        usages[node.id] = UserUsageResponse(
-            node_id=node.id,
-            node_name=node.name,
-            used_traffic=0
-        )
-
-    admin_users = set(user.id for user in get_users(db=db, admins=admin))
-
-    cond = and_(
-        NodeUserUsage.created_at >= start,
-        NodeUserUsage.created_at <= end,
-        NodeUserUsage.user_id.in_(admin_users)
-    )
-
-    for v in db.query(NodeUserUsage).filter(cond):
-        try:
-            usages[v.node_id or 0].used_traffic += v.used_traffic
-        except KeyError:
-            pass
-
-    return list(usages.values())
+    admin_users = select(User.id).where(*_get_users_filters(admins=admin))
+    return _get_users_usages(db, lambda table: table.user_id.in_(admin_users), start, end, granularity)
 
 
 def update_user_status(db: Session, dbuser: User, status: UserStatus) -> User:
@@ -971,6 +1534,8 @@ def update_user_status(db: Session, dbuser: User, status: UserStatus) -> User:
     dbuser.last_status_change = datetime.utcnow()
     db.commit()
     db.refresh(dbuser)
+    expiry_scheduler.schedule_user(dbuser)
+    quota_index.update_user(dbuser)
     return dbuser
 
 
@@ -1012,6 +1577,8 @@ def start_user_expire(db: Session, dbuser: User) -> User:
     dbuser.on_hold_timeout = None
     db.commit()
     db.refresh(dbuser)
+    expiry_scheduler.schedule_user(dbuser)
+    quota_index.update_user(dbuser)
     return dbuser
 
 
@@ -1407,7 +1974,10 @@ def get_nodes(db: Session,
     return query.all()
 
 
-def get_nodes_usage(db: Session, start: datetime, end: datetime) -> List[NodeUsageResponse]:
+def get_nodes_usage(db: Session,
+                    start: datetime,
+                    end: datetime,
+                    granularity: Optional[UsageGranularity] = None) -> List[NodeUsageResponse]:
     """
     Retrieves usage data for all nodes within a specified time range.
 
@@ -1415,35 +1985,42 @@ def get_nodes_usage(db: Session, start: datetime, end: datetime) -> List[NodeUsa
         db (Session): The database session.
         start (datetime): The start time of the usage period.
         end (datetime): The end time of the usage period.
+        granularity (Optional[UsageGranularity]): Length of the periods to split usages by.
 
     Returns:
         List[NodeUsageResponse]: A list of NodeUsageResponse objects containing usage data.
     """
-    usages = {0: NodeUsageResponse(  # Main Core
-        node_id=None,
-        node_name="Master",
-        uplink=0,
-        downlink=0
-    )}
-
-    for node in db.query(Node).all():
-        usages[node.id] = NodeUsageResponse(
-            node_id=node.id,
-            node_name=node.name,
-            uplink=0,
-            downlink=0
-        )
-
+    node_names = _get_usages_node_names(db)
     cond = and_(NodeUsage.created_at >= start, NodeUsage.created_at <= end)
-
-    for v in db.query(NodeUsage).filter(cond):
-        try:
-            usages[v.node_id or 0].uplink += v.uplink
-            usages[v.node_id or 0].downlink += v.downlink
-        except KeyError:
-            pass
-
-    return list(usages.values())
+    uplink, downlink = func.sum(NodeUsage.uplink), func.sum(NodeUsage.downlink)
+
+    if granularity is None:
+        usages = {node_id: NodeUsageResponse(node_id=node_id or None, node_name=name, uplink=0, downlink=0)
+                  for node_id, name in node_names.items()}
+        for node_id, up, down in db.query(NodeUsage.node_id, uplink, downlink).filter(cond) \
+                .group_by(NodeUsage.node_id):
+            try:
+                usages[node_id or 0].uplink += int(up or 0)
+                usages[node_id or 0].downlink += int(down or 0)
+            except KeyError:
+                pass
+        return list(usages.values())
+
+    period = _usage_period(db, NodeUsage.created_at, granularity)
+    query = db.query(period, NodeUsage.node_id, uplink, downlink).filter(cond) \
+        .group_by(period, NodeUsage.node_id) \
+        .order_by(period, NodeUsage.node_id)
+
+    return [
+        NodeUsageResponse(
+            node_id=node_id,
+            node_name=node_names[node_id or 0],
+            uplink=int(up or 0),
+            downlink=int(down or 0),
+            period=datetime.fromisoformat(p),
+        )
+        for p, node_id, up, down in query if (node_id or 0) in node_names
+    ]
 
 
 def create_node(db: Session, node: NodeCreate) -> Node:
@@ -1570,6 +2147,22 @@ def create_notification_reminder(
     return reminder
 
 
+def get_notification_reminders(db: Session, now: datetime) -> List[Tuple[int, ReminderType, Optional[int]]]:
+    """
+    Retrieves the user ids, types and thresholds of all the notification reminders which are not expired.
+
+    Args:
+        db (Session): The database session.
+        now (datetime): Current datetime to check the reminders expiration against.
+
+    Returns:
+        List[Tuple[int, ReminderType, Optional[int]]]: User ids, types and thresholds of the reminders.
+    """
+    return db.query(NotificationReminder.user_id, NotificationReminder.type, NotificationReminder.threshold).filter(
+        or_(NotificationReminder.expires_at.is_(None), NotificationReminder.expires_at >= now)
+    ).all()
+
+
 def get_notification_reminder(
         db: Session, user_id: int, reminder_type: ReminderType, threshold: Optional[int] = None
 ) -> Union[NotificationReminder, None]:
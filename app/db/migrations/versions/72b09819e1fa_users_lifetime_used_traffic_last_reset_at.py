@@ -0,0 +1,52 @@
+"""add lifetime_used_traffic and last_reset_at to users
+
+Revision ID: 72b09819e1fa
+Revises: c3377bdf2792
+Create Date: 2026-10-17 13:05:52.846120
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '72b09819e1fa'
+down_revision = 'c3377bdf2792'
+branch_labels = None
+depends_on = None
+
+
+users = sa.table(
+    'users',
+    sa.column('id', sa.Integer),
+    sa.column('used_traffic', sa.BigInteger),
+    sa.column('lifetime_used_traffic', sa.BigInteger),
+    sa.column('last_reset_at', sa.DateTime),
+)
+user_usage_logs = sa.table(
+    'user_usage_logs',
+    sa.column('user_id', sa.Integer),
+    sa.column('used_traffic_at_reset', sa.BigInteger),
+    sa.column('reset_at', sa.DateTime),
+)
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('lifetime_used_traffic', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('last_reset_at', sa.DateTime(), nullable=True))
+
+    # backfill from the usage logs
+    reseted_usage = sa.select(sa.func.sum(user_usage_logs.c.used_traffic_at_reset)) \
+        .where(user_usage_logs.c.user_id == users.c.id) \
+        .scalar_subquery()
+    last_reset_at = sa.select(sa.func.max(user_usage_logs.c.reset_at)) \
+        .where(user_usage_logs.c.user_id == users.c.id) \
+        .scalar_subquery()
+    op.execute(users.update().values(
+        lifetime_used_traffic=sa.func.coalesce(users.c.used_traffic, 0) + sa.func.coalesce(reseted_usage, 0),
+        last_reset_at=last_reset_at,
+    ))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'last_reset_at')
+    op.drop_column('users', 'lifetime_used_traffic')
@@ -0,0 +1,62 @@
+"""add next_reset_at to users
+
+Revision ID: 8a5cc6e0b7f4
+Revises: 72b09819e1fa
+Create Date: 2026-10-17 16:48:20.371592
+
+"""
+from datetime import timedelta
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8a5cc6e0b7f4'
+down_revision = '72b09819e1fa'
+branch_labels = None
+depends_on = None
+
+
+users = sa.table(
+    'users',
+    sa.column('id', sa.Integer),
+    sa.column('data_limit_reset_strategy', sa.String),
+    sa.column('created_at', sa.DateTime),
+    sa.column('last_reset_at', sa.DateTime),
+    sa.column('next_reset_at', sa.DateTime),
+)
+reset_strategy_to_days = {
+    'day': 1,
+    'week': 7,
+    'month': 30,
+    'year': 365,
+}
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('next_reset_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_users_status_next_reset_at', 'users', ['status', 'next_reset_at'], unique=False)
+
+    # backfill from the last reset time, the same way the reset job computed it
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(users.c.id, users.c.data_limit_reset_strategy, users.c.created_at, users.c.last_reset_at)
+        .where(users.c.data_limit_reset_strategy.in_(reset_strategy_to_days))
+    ).all()
+    params = [
+        {
+            'uid': uid,
+            'value': (last_reset_at or created_at) + timedelta(days=reset_strategy_to_days[strategy]),
+        }
+        for uid, strategy, created_at, last_reset_at in rows
+        if last_reset_at or created_at
+    ]
+    stmt = users.update().where(users.c.id == sa.bindparam('uid')) \
+        .values(next_reset_at=sa.bindparam('value'))
+    for i in range(0, len(params), 1000):
+        bind.execute(stmt, params[i:i + 1000])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_status_next_reset_at', table_name='users')
+    op.drop_column('users', 'next_reset_at')
@@ -0,0 +1,39 @@
+"""add daily and monthly rollups of node user usages
+
+Revision ID: c3377bdf2792
+Revises: c4413fc4fccb
+Create Date: 2026-10-17 11:40:07.203915
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c3377bdf2792'
+down_revision = 'c4413fc4fccb'
+branch_labels = None
+depends_on = None
+
+
+tables = ('node_user_usages_daily', 'node_user_usages_monthly')
+
+
+def upgrade() -> None:
+    for table in tables:
+        op.create_table(table,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('node_id', sa.Integer(), nullable=True),
+            sa.Column('used_traffic', sa.BigInteger(), nullable=True),
+            sa.ForeignKeyConstraint(['node_id'], ['nodes.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('created_at', 'user_id', 'node_id')
+        )
+        op.create_index(f'ix_{table}_user_id_created_at', table, ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    for table in tables:
+        op.drop_table(table)
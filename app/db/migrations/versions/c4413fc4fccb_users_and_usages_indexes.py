@@ -0,0 +1,59 @@
+"""add indexes for users review, listing and usages
+
+Revision ID: c4413fc4fccb
+Revises: 2b231de97dc3
+Create Date: 2026-10-17 09:12:41.518304
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c4413fc4fccb'
+down_revision = '2b231de97dc3'
+branch_labels = None
+depends_on = None
+
+
+users_indexes = {
+    'ix_users_status_expire': ['status', 'expire'],
+    'ix_users_status_data_limit_used_traffic': ['status', 'data_limit', 'used_traffic'],
+    'ix_users_status_on_hold_timeout': ['status', 'on_hold_timeout'],
+    'ix_users_status_online_at': ['status', 'online_at'],
+    'ix_users_admin_id_status': ['admin_id', 'status'],
+    'ix_users_data_limit_reset_strategy_status': ['data_limit_reset_strategy', 'status'],
+}
+
+
+def _index_names(table: str) -> set:
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    for name, columns in users_indexes.items():
+        op.create_index(name, 'users', columns, unique=False)
+    # kept by the mysql downgrade
+    if 'ix_next_plans_user_id' not in _index_names('next_plans'):
+        op.create_index('ix_next_plans_user_id', 'next_plans', ['user_id'], unique=False)
+    op.create_index(
+        'ix_node_user_usages_user_id_created_at', 'node_user_usages', ['user_id', 'created_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    if bind.engine.name == 'mysql':
+        # mysql may have dropped the implicit indexes of the foreign keys in favor of
+        # the composite ones, the foreign keys need an index to be left after dropping them
+        # the next_plans one is kept for the same reason
+        if 'ix_node_user_usages_user_id' not in _index_names('node_user_usages'):
+            op.create_index('ix_node_user_usages_user_id', 'node_user_usages', ['user_id'], unique=False)
+        if 'ix_users_admin_id' not in _index_names('users'):
+            op.create_index('ix_users_admin_id', 'users', ['admin_id'], unique=False)
+    else:
+        op.drop_index('ix_next_plans_user_id', table_name='next_plans')
+
+    op.drop_index('ix_node_user_usages_user_id_created_at', table_name='node_user_usages')
+    for name in reversed(users_indexes):
+        op.drop_index(name, table_name='users')
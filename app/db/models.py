@@ -10,6 +10,7 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
@@ -18,7 +19,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql.expression import select, text
+from sqlalchemy.sql.expression import text
 
 from app import xray
 from app.db.base import Base
@@ -60,13 +61,27 @@ class AdminUsageLogs(Base):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # matched to the review jobs, listing filters and their order of equality then range columns
+        Index('ix_users_status_expire', 'status', 'expire'),
+        Index('ix_users_status_data_limit_used_traffic', 'status', 'data_limit', 'used_traffic'),
+        Index('ix_users_status_on_hold_timeout', 'status', 'on_hold_timeout'),
+        Index('ix_users_status_online_at', 'status', 'online_at'),
+        Index('ix_users_admin_id_status', 'admin_id', 'status'),
+        Index('ix_users_data_limit_reset_strategy_status', 'data_limit_reset_strategy', 'status'),
+        Index('ix_users_status_next_reset_at', 'status', 'next_reset_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     username = Column(String(34, collation='NOCASE'), unique=True, index=True)
     proxies = relationship("Proxy", back_populates="user", cascade="all, delete-orphan")
     status = Column(Enum(UserStatus), nullable=False, default=UserStatus.active)
     used_traffic = Column(BigInteger, default=0)
+    # used_traffic plus the usages of all resets, kept along with used_traffic
+    lifetime_used_traffic = Column(BigInteger, nullable=False, default=0, server_default="0")
     node_usages = relationship("NodeUserUsage", back_populates="user", cascade="all, delete-orphan")
+    daily_node_usages = relationship("NodeUserUsageDaily", back_populates="user", cascade="all, delete-orphan")
+    monthly_node_usages = relationship("NodeUserUsageMonthly", back_populates="user", cascade="all, delete-orphan")
     notification_reminders = relationship("NotificationReminder", back_populates="user", cascade="all, delete-orphan")
     data_limit = Column(BigInteger, nullable=True)
     data_limit_reset_strategy = Column(
@@ -75,6 +90,9 @@ class User(Base):
         default=UserDataLimitResetStrategy.no_reset,
     )
     usage_logs = relationship("UserUsageResetLogs", back_populates="user")  # maybe rename it to reset_usage_logs?
+    last_reset_at = Column(DateTime, nullable=True, default=None)  # reset_at of the latest usage log
+    # when the usage is due to be reset by data_limit_reset_strategy, kept along with last_reset_at
+    next_reset_at = Column(DateTime, nullable=True, default=None)
     expire = Column(Integer, nullable=True)
     admin_id = Column(Integer, ForeignKey("admins.id"))
     admin = relationship("Admin", back_populates="users")
@@ -104,26 +122,15 @@ class User(Base):
 
     @hybrid_property
     def reseted_usage(self) -> int:
-        return int(sum([log.used_traffic_at_reset for log in self.usage_logs]))
+        return int(self.lifetime_used_traffic - (self.used_traffic or 0))
 
     @reseted_usage.expression
     def reseted_usage(cls):
-        return (
-            select(func.sum(UserUsageResetLogs.used_traffic_at_reset)).
-            where(UserUsageResetLogs.user_id == cls.id).
-            label('reseted_usage')
-        )
-
-    @property
-    def lifetime_used_traffic(self) -> int:
-        return int(
-            sum([log.used_traffic_at_reset for log in self.usage_logs])
-            + self.used_traffic
-        )
+        return (cls.lifetime_used_traffic - func.coalesce(cls.used_traffic, 0)).label('reseted_usage')
 
     @property
     def last_traffic_reset_time(self):
-        return self.usage_logs[-1].reset_at if self.usage_logs else self.created_at
+        return self.last_reset_at or self.created_at
 
     @property
     def excluded_inbounds(self):
@@ -164,7 +171,7 @@ class NextPlan(Base):
     __tablename__ = 'next_plans'
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
     data_limit = Column(BigInteger, nullable=False)
     expire = Column(Integer, nullable=True)
     add_remaining_traffic = Column(Boolean, nullable=False, default=False, server_default='0')
@@ -307,6 +314,8 @@ class Node(Base):
     uplink = Column(BigInteger, default=0)
     downlink = Column(BigInteger, default=0)
     user_usages = relationship("NodeUserUsage", back_populates="node", cascade="all, delete-orphan")
+    daily_user_usages = relationship("NodeUserUsageDaily", back_populates="node", cascade="all, delete-orphan")
+    monthly_user_usages = relationship("NodeUserUsageMonthly", back_populates="node", cascade="all, delete-orphan")
     usages = relationship("NodeUsage", back_populates="node", cascade="all, delete-orphan")
     usage_coefficient = Column(Float, nullable=False, server_default=text("1.0"), default=1)
 
@@ -315,6 +324,7 @@ class NodeUserUsage(Base):
     __tablename__ = "node_user_usages"
     __table_args__ = (
         UniqueConstraint('created_at', 'user_id', 'node_id'),
+        Index('ix_node_user_usages_user_id_created_at', 'user_id', 'created_at'),
     )
 
     id = Column(Integer, primary_key=True)
@@ -326,6 +336,39 @@ class NodeUserUsage(Base):
     used_traffic = Column(BigInteger, default=0)
 
 
+# hourly usages older than the retention are rolled up into these, see the rollup_user_usages job
+class NodeUserUsageDaily(Base):
+    __tablename__ = "node_user_usages_daily"
+    __table_args__ = (
+        UniqueConstraint('created_at', 'user_id', 'node_id'),
+        Index('ix_node_user_usages_daily_user_id_created_at', 'user_id', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, unique=False, nullable=False)  # one day per record
+    user_id = Column(Integer, ForeignKey("users.id"))
+    user = relationship("User", back_populates="daily_node_usages")
+    node_id = Column(Integer, ForeignKey("nodes.id"))
+    node = relationship("Node", back_populates="daily_user_usages")
+    used_traffic = Column(BigInteger, default=0)
+
+
+class NodeUserUsageMonthly(Base):
+    __tablename__ = "node_user_usages_monthly"
+    __table_args__ = (
+        UniqueConstraint('created_at', 'user_id', 'node_id'),
+        Index('ix_node_user_usages_monthly_user_id_created_at', 'user_id', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, unique=False, nullable=False)  # one month per record
+    user_id = Column(Integer, ForeignKey("users.id"))
+    user = relationship("User", back_populates="monthly_node_usages")
+    node_id = Column(Integer, ForeignKey("nodes.id"))
+    node = relationship("Node", back_populates="monthly_user_usages")
+    used_traffic = Column(BigInteger, default=0)
+
+
 class NodeUsage(Base):
     __tablename__ = "node_usages"
     __table_args__ = (
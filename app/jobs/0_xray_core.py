@@ -1,5 +1,6 @@
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from app import app, logger, scheduler, xray
 from app.db import GetDB, crud
@@ -8,29 +9,45 @@ from config import JOB_CORE_HEALTH_CHECK_INTERVAL
 from xray_api import exc as xray_exc
 
 
+def _refresh_node_state(node):
+    try:
+        node.refresh_state()
+    except Exception:
+        pass
+
+
 def core_health_check():
+    # restarts read the users from the database, they may have been changed
+    # without going through xray.operations, e.g. by marzban-cli
     config = None
 
     # main core
     if not xray.core.started:
         if not config:
-            config = xray.config.include_db_users()
+            config = xray.config.include_db_users(reload=True)
         xray.core.restart(config)
 
-    # nodes' core
-    for node_id, node in list(xray.nodes.items()):
+    # nodes' core, refresh their cached state which every other caller reads
+    nodes = list(xray.nodes.items())
+    if nodes:
+        with ThreadPoolExecutor(max_workers=min(len(nodes), 10)) as executor:
+            list(executor.map(_refresh_node_state, (node for _, node in nodes)))
+
+    for node_id, node in nodes:
         if node.connected:
             try:
                 assert node.started
                 node.api.get_sys_stats(timeout=60)
             except (ConnectionError, xray_exc.XrayError, AssertionError):
                 if not config:
-                    config = xray.config.include_db_users()
+                    config = xray.config.include_db_users(reload=True)
                 xray.operations.restart_node(node_id, config)
+            else:
+                # catch up on the users' changes the node missed
+                xray.operations.sync_node(node_id)
 
         if not node.connected:
-            if not config:
-                config = xray.config.include_db_users()
+            # the users are read from the database by connect_node once the node is reachable
             xray.operations.connect_node(node_id, config)
 
 
@@ -40,7 +57,7 @@ def start_core():
 
     start_time = time.time()
     config = xray.config.include_db_users()
-    logger.info(f"Xray core config generated in {(time.time() - start_time):.2f} seconds")
+    logger.info(f"Xray core config generated in {(time.time() - start_time) * 1000:.2f} milliseconds")
 
     # main core
     logger.info("Starting main Xray core")
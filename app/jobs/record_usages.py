@@ -1,37 +1,78 @@
+import threading
+import time
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from operator import attrgetter
-from typing import Union
+from typing import Dict, Union
 
 from pymysql.err import OperationalError
 from sqlalchemy import and_, bindparam, insert, select, update
+from sqlalchemy.dialects.mysql import Insert as MySQLInsert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.dml import Insert
 
-from app import scheduler, xray
+from app import app, logger, scheduler, xray
 from app.db import GetDB
+from app.db.crud import get_users_remaining_quota
 from app.db.models import Admin, NodeUsage, NodeUserUsage, System, User
+from app.models.user import UserStatus
+from app.utils.accumulator import UsageAccumulator
+from app.utils.quota import quota_index
+from app.utils.review import review_limited_users, review_onhold_users
 from config import (
     DISABLE_RECORDING_NODE_USAGE,
+    JOB_FLUSH_USER_USAGES_INTERVAL,
     JOB_RECORD_NODE_USAGES_INTERVAL,
     JOB_RECORD_USER_USAGES_INTERVAL,
+    JOB_RECORD_USER_USAGES_TIMEOUT,
     JOB_RECORD_USAGES_MAX_WORKERS,
+    USER_USAGES_FLUSH_BATCH_SIZE,
+    USER_USAGES_JOURNAL_PATH,
 )
 from xray_api import XRay as XRayAPI
 from xray_api import exc as xray_exc
 
 
-def safe_execute(db: Session, stmt, params=None):
-    if db.bind.name == 'mysql':
-        if isinstance(stmt, Insert):
-            stmt = stmt.prefix_with('IGNORE')
+def safe_execute(db: Session, stmt, params=None, batch_size: int = None):
+    """
+    Executes and commits the statement, retrying on MySQL deadlocks.
+    If `batch_size` is given, `params` are sent in chunks of that size
+    within the same transaction.
+    """
+    safe_execute_many(db, [(stmt, params)], batch_size=batch_size)
+
+
+def safe_execute_many(db: Session, steps: list, batch_size: int = None):
+    """
+    Executes the (statement, params) steps in a single transaction and commits it,
+    retrying the whole transaction on MySQL deadlocks.
+    If `batch_size` is given, the params of each step are sent in chunks of that size.
+    """
+    chunked_steps = []
+    for stmt, params in steps:
+        if db.bind.name == 'mysql':
+            # upserts handle duplicates themselves, IGNORE would also hide real errors
+            if isinstance(stmt, Insert) and not isinstance(stmt, MySQLInsert):
+                stmt = stmt.prefix_with('IGNORE')
+
+        if params and batch_size:
+            chunks = [params[i:i + batch_size] for i in range(0, len(params), batch_size)]
+        else:
+            chunks = [params]
+        chunked_steps.append((stmt, chunks))
 
+    if db.bind.name == 'mysql':
         tries = 0
         done = False
         while not done:
             try:
-                db.connection().execute(stmt, params)
+                for stmt, chunks in chunked_steps:
+                    for chunk in chunks:
+                        db.connection().execute(stmt, chunk)
                 db.commit()
                 done = True
             except OperationalError as err:
@@ -42,46 +83,87 @@ def safe_execute(db: Session, stmt, params=None):
                 raise err
 
     else:
-        db.connection().execute(stmt, params)
+        for stmt, chunks in chunked_steps:
+            for chunk in chunks:
+                db.connection().execute(stmt, chunk)
         db.commit()
 
 
-def record_user_stats(params: list, node_id: Union[int, None],
-                      consumption_factor: int = 1):
-    if not params:
-        return
+def upsert_user_stats_stmt(dialect: str, node_id: int, created_at: datetime):
+    """
+    Builds an INSERT that adds `value` to the hourly usage row of `uid`,
+    creating the row when it doesn't exist yet.
+    Returns None if the dialect doesn't support upserts.
+    """
+    if dialect == 'mysql':
+        stmt = mysql_insert(NodeUserUsage).values(
+            user_id=bindparam('uid'),
+            created_at=created_at,
+            node_id=node_id,
+            used_traffic=bindparam('value')
+        )
+        return stmt.on_duplicate_key_update(
+            used_traffic=NodeUserUsage.used_traffic + stmt.inserted.used_traffic
+        )
 
-    created_at = datetime.fromisoformat(datetime.utcnow().strftime('%Y-%m-%dT%H:00:00'))
+    if dialect in ('postgresql', 'sqlite'):
+        insert_func = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+        stmt = insert_func(NodeUserUsage).values(
+            user_id=bindparam('uid'),
+            created_at=created_at,
+            node_id=node_id,
+            used_traffic=bindparam('value')
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[NodeUserUsage.created_at, NodeUserUsage.user_id, NodeUserUsage.node_id],
+            set_={'used_traffic': NodeUserUsage.used_traffic + stmt.excluded.used_traffic}
+        )
 
-    with GetDB() as db:
-        # make user usage row if doesn't exist
-        select_stmt = select(NodeUserUsage.user_id) \
-            .where(and_(NodeUserUsage.node_id == node_id, NodeUserUsage.created_at == created_at))
-        existings = [r[0] for r in db.execute(select_stmt).fetchall()]
-        uids_to_insert = set()
-
-        for p in params:
-            uid = int(p['uid'])
-            if uid in existings:
-                continue
-            uids_to_insert.add(uid)
-
-        if uids_to_insert:
-            stmt = insert(NodeUserUsage).values(
-                user_id=bindparam('uid'),
-                created_at=created_at,
-                node_id=node_id,
-                used_traffic=0
-            )
-            safe_execute(db, stmt, [{'uid': uid} for uid in uids_to_insert])
 
-        # record
-        stmt = update(NodeUserUsage) \
-            .values(used_traffic=NodeUserUsage.used_traffic + bindparam('value') * consumption_factor) \
-            .where(and_(NodeUserUsage.user_id == bindparam('uid'),
-                        NodeUserUsage.node_id == node_id,
-                        NodeUserUsage.created_at == created_at))
-        safe_execute(db, stmt, params)
+def user_stats_steps(db: Session, params: list, node_id: Union[int, None],
+                     consumption_factor: int = 1, created_at: datetime = None) -> list:
+    """
+    Returns the (statement, params) steps adding `params` to the hourly usage rows of the users.
+    """
+    if not params:
+        return []
+
+    if created_at is None:
+        created_at = datetime.fromisoformat(datetime.utcnow().strftime('%Y-%m-%dT%H:00:00'))
+
+    # NULL node_id (main core) never conflicts on the unique constraint,
+    # so it can't be upserted and goes through select + insert + update
+    stmt = upsert_user_stats_stmt(db.bind.name, node_id, created_at) if node_id is not None else None
+    if stmt is not None:
+        return [(stmt, [
+            {'uid': int(p['uid']), 'value': int(p['value'] * consumption_factor)} for p in params
+        ])]
+
+    steps = []
+
+    # make user usage row if doesn't exist
+    select_stmt = select(NodeUserUsage.user_id) \
+        .where(and_(NodeUserUsage.node_id == node_id, NodeUserUsage.created_at == created_at))
+    existings = {r[0] for r in db.execute(select_stmt).fetchall()}
+    uids_to_insert = {int(p['uid']) for p in params} - existings
+
+    if uids_to_insert:
+        stmt = insert(NodeUserUsage).values(
+            user_id=bindparam('uid'),
+            created_at=created_at,
+            node_id=node_id,
+            used_traffic=0
+        )
+        steps.append((stmt, [{'uid': uid} for uid in uids_to_insert]))
+
+    # record
+    stmt = update(NodeUserUsage) \
+        .values(used_traffic=NodeUserUsage.used_traffic + bindparam('value') * consumption_factor) \
+        .where(and_(NodeUserUsage.user_id == bindparam('uid'),
+                    NodeUserUsage.node_id == node_id,
+                    NodeUserUsage.created_at == created_at))
+    steps.append((stmt, params))
+    return steps
 
 
 def record_node_stats(params: dict, node_id: Union[int, None]):
@@ -108,15 +190,39 @@ def record_node_stats(params: dict, node_id: Union[int, None]):
         safe_execute(db, stmt, params)
 
 
-def get_users_stats(api: XRayAPI):
+# email -> user id, emails are made of "{id}.{username}" and never change for a user id
+_email_uids = {}
+
+
+def _email_to_uid(email: str) -> Union[int, None]:
     try:
-        params = defaultdict(int)
-        for stat in filter(attrgetter('value'), api.get_users_stats(reset=True, timeout=300)):
-            params[stat.name.split('.', 1)[0]] += stat.value
-        params = list({"uid": uid, "value": value} for uid, value in params.items())
-        return params
+        return _email_uids[email]
+    except KeyError:
+        pass
+
+    try:
+        uid = int(email.split('.', 1)[0])
+    except ValueError:
+        uid = None
+
+    if len(_email_uids) > 1_000_000:
+        _email_uids.clear()
+    _email_uids[email] = uid
+    return uid
+
+
+def get_users_stats(api: XRayAPI, timeout: int = 300) -> Dict[int, int]:
+    try:
+        traffic = api.get_users_traffic(reset=True, timeout=timeout)
     except xray_exc.XrayError:
-        return []
+        return {}
+
+    usages = {}
+    for email, value in traffic.items():
+        uid = _email_to_uid(email)
+        if uid is not None:
+            usages[uid] = usages.get(uid, 0) + value
+    return usages
 
 
 def get_outbounds_stats(api: XRayAPI):
@@ -128,61 +234,166 @@ def get_outbounds_stats(api: XRayAPI):
         return []
 
 
-def record_user_usages():
-    api_instances = {None: xray.api}
-    usage_coefficient = {None: 1}  # default usage coefficient for the main api instance
+def read_users_remaining_quota():
+    with GetDB() as db:
+        return get_users_remaining_quota(db)
 
-    for node_id, node in list(xray.nodes.items()):
-        if node.connected and node.started:
-            api_instances[node_id] = node.api
-            usage_coefficient[node_id] = node.usage_coefficient  # fetch the usage coefficient
 
-    max_workers = JOB_RECORD_USAGES_MAX_WORKERS
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {node_id: executor.submit(get_users_stats, api) for node_id, api in api_instances.items()}
-    api_params = {node_id: future.result() for node_id, future in futures.items()}
+def write_user_usages(users_usage: dict, online_at: dict, node_users_usage: dict):
+    with GetDB() as db:
+        user_admin_map = dict(db.query(User.id, User.admin_id).all())
+        on_hold_uids = {uid for uid, in db.query(User.id).filter(User.status == UserStatus.on_hold)}
 
-    users_usage = defaultdict(int)
-    for node_id, params in api_params.items():
-        coefficient = usage_coefficient.get(node_id, 1)  # get the usage coefficient for the node
-        for param in params:
-            users_usage[param['uid']] += int(param['value'] * coefficient)  # apply the usage coefficient
-    users_usage = list({"uid": uid, "value": value} for uid, value in users_usage.items())
+    # deltas of deleted users have nowhere to go
+    users_usage = {uid: value for uid, value in users_usage.items() if uid in user_admin_map}
     if not users_usage:
         return
 
-    with GetDB() as db:
-        user_admin_map = dict(db.query(User.id, User.admin_id).all())
-
     admin_usage = defaultdict(int)
-    for user_usage in users_usage:
-        admin_id = user_admin_map.get(int(user_usage["uid"]))
+    for uid, value in users_usage.items():
+        admin_id = user_admin_map[uid]
         if admin_id:
-            admin_usage[admin_id] += user_usage["value"]
+            admin_usage[admin_id] += value
 
-    # record users usage
+    # users, admins and nodes usage are written in one transaction, a failed flush
+    # is put back by the accumulator and retried without counting any of it twice
     with GetDB() as db:
+        # sorted to keep the lock order the same between transactions
         stmt = update(User). \
             where(User.id == bindparam('uid')). \
             values(
                 used_traffic=User.used_traffic + bindparam('value'),
-                online_at=datetime.utcnow()
+                lifetime_used_traffic=User.lifetime_used_traffic + bindparam('value'),
+                online_at=bindparam('online_at')
         )
+        steps = [(stmt, [
+            {"uid": uid, "value": value, "online_at": online_at[uid]}
+            for uid, value in sorted(users_usage.items())
+        ])]
 
-        safe_execute(db, stmt, users_usage)
-
-        admin_data = [{"admin_id": admin_id, "value": value} for admin_id, value in admin_usage.items()]
+        admin_data = [{"admin_id": admin_id, "value": value} for admin_id, value in sorted(admin_usage.items())]
         if admin_data:
             admin_update_stmt = update(Admin). \
                 where(Admin.id == bindparam('admin_id')). \
                 values(users_usage=Admin.users_usage + bindparam('value'))
-            safe_execute(db, admin_update_stmt, admin_data)
+            steps.append((admin_update_stmt, admin_data))
 
-    if DISABLE_RECORDING_NODE_USAGE:
-        return
+        if not DISABLE_RECORDING_NODE_USAGE:
+            for (node_id, created_at), usages in node_users_usage.items():
+                params = [{"uid": uid, "value": value} for uid, value in sorted(usages.items())
+                          if uid in user_admin_map]
+                steps += user_stats_steps(db, params, node_id, created_at=created_at)
 
-    for node_id, params in api_params.items():
-        record_user_stats(params, node_id, usage_coefficient[node_id])
+        safe_execute_many(db, steps, batch_size=USER_USAGES_FLUSH_BATCH_SIZE)
+
+    # quotas changed by anything but the usages (resets, modifications, new users) are picked up here
+    try:
+        crossed = quota_index.load(read_users_remaining_quota, usage_accumulator.pending_users_usage())
+        if crossed:
+            review_limited_users(crossed)
+    except Exception as err:
+        # users' usage is already written, retrying the whole flush would count it twice
+        logger.error(f"Failed to limit users out of quota: {err}")
+
+    # on-hold users are activated once they come online
+    online_on_hold_uids = [uid for uid in users_usage if uid in on_hold_uids]
+    try:
+        if online_on_hold_uids:
+            review_onhold_users(datetime.utcnow(), online_on_hold_uids)
+    except Exception as err:
+        logger.error(f"Failed to review on-hold users: {err}")
+
+
+usage_accumulator = UsageAccumulator(write_user_usages, journal_path=USER_USAGES_JOURNAL_PATH)
+
+
+class UserUsagesPoller:
+    """
+    Long-lived worker polling users' stats of a single core (node_id None is
+    the main core) on its own schedule and feeding them into the accumulator,
+    so a slow or dead node only delays its own usages.
+    """
+
+    def __init__(self, node_id: Union[int, None]):
+        self.node_id = node_id
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def alive(self):
+        return self._thread.is_alive() and not self._stop_event.is_set()
+
+    def _get_api(self):
+        if self.node_id is None:
+            return xray.api, 1
+
+        node = xray.nodes.get(self.node_id)
+        if node is None:
+            self.stop()
+            return None, 1
+
+        try:
+            # doesn't make a round trip unless the node api isn't created yet
+            return node.api, node.usage_coefficient
+        except ConnectionError:
+            return None, 1
+
+    def poll(self):
+        api, coefficient = self._get_api()
+        if api is None:
+            return
+
+        usages = get_users_stats(api, timeout=JOB_RECORD_USER_USAGES_TIMEOUT)
+        if coefficient != 1:
+            usages = {uid: int(value * coefficient) for uid, value in usages.items()}  # apply the usage coefficient
+        usage_accumulator.add(self.node_id, usages)
+
+        if quota_index.loaded:
+            crossed = quota_index.consume(usages)
+        else:
+            crossed = quota_index.load(read_users_remaining_quota, usage_accumulator.pending_users_usage())
+        if crossed:
+            # users are limited by their flushed usage, the flush limits them in the same tick
+            usage_accumulator.flush()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started_at = time.monotonic()
+            try:
+                self.poll()
+            except Exception as err:
+                logger.error(f"Failed to poll users' usages of node {self.node_id}: {err}")
+            self._stop_event.wait(max(0, JOB_RECORD_USER_USAGES_INTERVAL - (time.monotonic() - started_at)))
+
+
+usages_pollers: Dict[Union[int, None], UserUsagesPoller] = {}
+
+
+def record_user_usages():
+    """
+    keeps one poller running for the main core and each node
+    """
+    node_ids = {None, *xray.nodes.keys()}
+
+    for node_id, poller in list(usages_pollers.items()):
+        if node_id not in node_ids or not poller.alive:
+            poller.stop()
+            del usages_pollers[node_id]
+
+    for node_id in node_ids:
+        if node_id not in usages_pollers:
+            usages_pollers[node_id] = UserUsagesPoller(node_id)
+            usages_pollers[node_id].start()
+
+
+def flush_user_usages():
+    usage_accumulator.flush()
 
 
 def record_node_usages():
@@ -226,3 +437,17 @@ scheduler.add_job(record_user_usages, 'interval',
 scheduler.add_job(record_node_usages, 'interval',
                   seconds=JOB_RECORD_NODE_USAGES_INTERVAL,
                   coalesce=True, max_instances=1)
+scheduler.add_job(flush_user_usages, 'interval',
+                  seconds=JOB_FLUSH_USER_USAGES_INTERVAL,
+                  coalesce=True, max_instances=1)
+
+
+@app.on_event("shutdown")
+def flush_usages_on_shutdown():
+    for poller in list(usages_pollers.values()):
+        poller.stop()
+
+    try:
+        usage_accumulator.flush()
+    finally:
+        usage_accumulator.close()
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import DateTime, and_, delete, exists, func, insert, literal, select, true, update
+from sqlalchemy.orm import Session
+
+from app import logger, scheduler
+from app.db import GetDB
+from app.db.crud import get_user_usages_rollup_cutoffs
+from app.db.models import NodeUserUsage, NodeUserUsageDaily, NodeUserUsageMonthly
+from config import JOB_ROLLUP_USER_USAGES_INTERVAL
+
+
+def _start_of_day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _start_of_month(dt: datetime) -> datetime:
+    return _start_of_day(dt).replace(day=1)
+
+
+def _next_day(day: datetime) -> datetime:
+    return day + timedelta(days=1)
+
+
+def _next_month(month: datetime) -> datetime:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def rollup_period(db: Session, source, target, start: datetime, end: datetime):
+    """
+    Moves the usages of source created in [start, end) into one usage of target
+    per user and node created at start, adding to the existing ones.
+    """
+    in_period = and_(source.created_at >= start, source.created_at < end)
+    same_usage = and_(target.created_at == start,
+                      target.user_id == source.user_id,
+                      target.node_id.is_not_distinct_from(source.node_id))
+    not_rolled_up = true()
+
+    # only late records of an already rolled up period need merging
+    if db.execute(select(target.id).where(target.created_at == start).limit(1)).first() is not None:
+        db.execute(
+            update(target)
+            .values(used_traffic=target.used_traffic + select(func.sum(source.used_traffic))
+                    .where(in_period, same_usage).scalar_subquery())
+            .where(target.created_at == start, exists().where(in_period, same_usage))
+            .execution_options(synchronize_session=False)
+        )
+        not_rolled_up = ~exists().where(same_usage)
+
+    db.execute(insert(target).from_select(
+        [target.created_at, target.user_id, target.node_id, target.used_traffic],
+        select(literal(start, DateTime), source.user_id, source.node_id, func.sum(source.used_traffic))
+        .where(in_period, not_rolled_up)
+        .group_by(source.user_id, source.node_id)
+    ))
+    db.execute(delete(source).where(in_period).execution_options(synchronize_session=False))
+    db.commit()
+
+
+def rollup(db: Session, source, target, cutoff: datetime,
+           start_of_period: Callable[[datetime], datetime],
+           next_period: Callable[[datetime], datetime]) -> int:
+    """
+    Rolls up the usages of source created before cutoff period by period, oldest first.
+    Returns the number of rolled up periods.
+    """
+    periods = 0
+    while True:
+        oldest = db.execute(select(func.min(source.created_at)).where(source.created_at < cutoff)).scalar()
+        if oldest is None:
+            return periods
+
+        start = start_of_period(oldest)
+        rollup_period(db, source, target, start, next_period(start))
+        periods += 1
+
+
+def rollup_user_usages():
+    hourly_cutoff, monthly_cutoff = get_user_usages_rollup_cutoffs(datetime.utcnow())
+
+    with GetDB() as db:
+        if hourly_cutoff is not None:
+            days = rollup(db, NodeUserUsage, NodeUserUsageDaily, hourly_cutoff, _start_of_day, _next_day)
+            if days:
+                logger.info(f"Hourly users' usages of {days} day(s) rolled up into daily usages")
+
+        if monthly_cutoff is not None:
+            months = rollup(db, NodeUserUsageDaily, NodeUserUsageMonthly, monthly_cutoff,
+                            _start_of_month, _next_month)
+            if months:
+                logger.info(f"Daily users' usages of {months} month(s) rolled up into monthly usages")
+
+
+scheduler.add_job(rollup_user_usages, 'interval',
+                  seconds=JOB_ROLLUP_USER_USAGES_INTERVAL,
+                  coalesce=True, max_instances=1,
+                  start_date=datetime.utcnow() + timedelta(minutes=1))
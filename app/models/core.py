@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -5,3 +7,16 @@ class CoreStats(BaseModel):
     version: str
     started: bool
     logs_websocket: str
+
+
+class CoreOperationsQueueStats(BaseModel):
+    node_id: Optional[int] = None
+    pending: int
+    in_flight: int
+    workers: int
+    processed: int
+    failed: int
+    undelivered: int
+    coalesced: int
+    avg_latency: float
+    max_latency: float
@@ -1,3 +1,4 @@
+from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
@@ -65,11 +66,18 @@ class NodeResponse(Node):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UsageGranularity(str, Enum):
+    hour = "hour"
+    day = "day"
+    month = "month"
+
+
 class NodeUsageResponse(BaseModel):
     node_id: Optional[int] = None
     node_name: str
     uplink: int
     downlink: int
+    period: Optional[datetime] = None  # start of the period, when usages are split by granularity
 
 
 class NodesUsageResponse(BaseModel):
@@ -2,9 +2,10 @@ import re
 import secrets
 from datetime import datetime
 from enum import Enum
+from functools import cached_property
 from typing import Dict, List, Optional, Union
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_validator, model_validator
 
 from app import xray
 from app.models.admin import Admin
@@ -13,6 +14,9 @@ from app.subscription.share import generate_v2ray_links
 from app.utils.jwt import create_subscription_token
 from config import XRAY_SUBSCRIPTION_PATH, XRAY_SUBSCRIPTION_URL_PREFIX
 
+# fields of UserResponse which are only generated when accessed
+LAZY_FIELDS = {"links", "subscription_url"}
+
 USERNAME_REGEXP = re.compile(r"^(?=\w{3,32}\b)[a-zA-Z0-9-_@.]+(?:_[a-zA-Z0-9-_@.]+)*$")
 
 
@@ -310,30 +314,28 @@ class UserResponse(User):
     used_traffic: int
     lifetime_used_traffic: int = 0
     created_at: datetime
-    links: List[str] = []
-    subscription_url: str = ""
     proxies: dict
     excluded_inbounds: Dict[ProxyTypes, List[str]] = {}
 
     admin: Optional[Admin] = None
     model_config = ConfigDict(from_attributes=True)
 
-    @model_validator(mode="after")
-    def validate_links(self):
-        if not self.links:
-            self.links = generate_v2ray_links(
-                self.proxies, self.inbounds, extra_data=self.model_dump(), reverse=False,
-            )
-        return self
-
-    @model_validator(mode="after")
-    def validate_subscription_url(self):
-        if not self.subscription_url:
-            salt = secrets.token_hex(8)
-            url_prefix = (XRAY_SUBSCRIPTION_URL_PREFIX).replace('*', salt)
-            token = create_subscription_token(self.username)
-            self.subscription_url = f"{url_prefix}/{XRAY_SUBSCRIPTION_PATH}/{token}"
-        return self
+    # links and subscription_url are generated on first access, e.g. when the
+    # response is serialized, so validating users which don't need them stays cheap
+    @computed_field
+    @cached_property
+    def links(self) -> List[str]:
+        return generate_v2ray_links(
+            self.proxies, self.inbounds, extra_data=self.model_dump(exclude=LAZY_FIELDS), reverse=False,
+        )
+
+    @computed_field
+    @cached_property
+    def subscription_url(self) -> str:
+        salt = secrets.token_hex(8)
+        url_prefix = (XRAY_SUBSCRIPTION_URL_PREFIX).replace('*', salt)
+        token = create_subscription_token(self.username)
+        return f"{url_prefix}/{XRAY_SUBSCRIPTION_PATH}/{token}"
 
     @field_validator("proxies", mode="before")
     def validate_proxies(cls, v, values, **kwargs):
@@ -364,12 +366,14 @@ class SubscriptionUserResponse(UserResponse):
 class UsersResponse(BaseModel):
     users: List[UserResponse]
     total: int
+    next_cursor: Optional[str] = None
 
 
 class UserUsageResponse(BaseModel):
     node_id: Union[int, None] = None
     node_name: str
     used_traffic: int
+    period: Optional[datetime] = None  # start of the period, when usages are split by granularity
 
     @field_validator("used_traffic",  mode='before')
     def cast_to_int(cls, v):
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import time
+from typing import List
 
 import commentjson
 from fastapi import APIRouter, Depends, HTTPException, WebSocket
@@ -9,7 +10,7 @@ from starlette.websockets import WebSocketDisconnect
 from app import xray
 from app.db import Session, get_db
 from app.models.admin import Admin
-from app.models.core import CoreStats
+from app.models.core import CoreOperationsQueueStats, CoreStats
 from app.utils import responses
 from app.xray import XRayConfig
 from config import XRAY_JSON
@@ -85,10 +86,19 @@ def get_core_stats(admin: Admin = Depends(Admin.get_current)):
     )
 
 
+@router.get("/core/operations", response_model=List[CoreOperationsQueueStats], responses={403: responses._403})
+def get_core_operations_stats(admin: Admin = Depends(Admin.check_sudo_admin)):
+    """Get the depth and latency of the pending user operations queue of each core."""
+    return [
+        CoreOperationsQueueStats(node_id=node_id, **stats)
+        for node_id, stats in xray.operations.get_queues_stats().items()
+    ]
+
+
 @router.post("/core/restart", responses={403: responses._403})
 def restart_core(admin: Admin = Depends(Admin.check_sudo_admin)):
     """Restart the core and all connected nodes."""
-    startup_config = xray.config.include_db_users()
+    startup_config = xray.config.include_db_users(reload=True)
     xray.core.restart(startup_config)
 
     for node_id, node in list(xray.nodes.items()):
@@ -121,7 +131,7 @@ def modify_core_config(
     with open(XRAY_JSON, "w") as f:
         f.write(json.dumps(payload, indent=4))
 
-    startup_config = xray.config.include_db_users()
+    startup_config = xray.config.include_db_users(reload=True)
     xray.core.restart(startup_config)
     for node_id, node in list(xray.nodes.items()):
         if node.connected:
@@ -17,6 +17,7 @@ from app.models.node import (
     NodeSettings,
     NodeStatus,
     NodesUsageResponse,
+    UsageGranularity,
 )
 from app.models.proxy import ProxyHost
 from app.utils import responses
@@ -203,11 +204,12 @@ def get_usage(
     db: Session = Depends(get_db),
     start: str = "",
     end: str = "",
+    granularity: UsageGranularity = None,
     _: Admin = Depends(Admin.check_sudo_admin),
 ):
-    """Retrieve usage statistics for nodes within a specified date range."""
+    """Retrieve usage statistics for nodes within a specified date range, split by `granularity` if given."""
     start, end = validate_dates(start, end)
 
-    usages = crud.get_nodes_usage(db, start, end)
+    usages = crud.get_nodes_usage(db, start, end, granularity)
 
     return {"usages": usages}
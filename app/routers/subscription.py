@@ -1,13 +1,14 @@
 import re
 from distutils.version import LooseVersion
 
-from fastapi import APIRouter, Depends, Header, Path, Request, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Path, Request, Response
 from fastapi.responses import HTMLResponse
 
-from app.db import Session, crud, get_db
+from app.db import GetDB, Session, crud, get_db
 from app.dependencies import get_validated_sub, validate_dates
+from app.models.node import UsageGranularity
 from app.models.user import SubscriptionUserResponse, UserResponse
-from app.subscription.share import encode_title, generate_subscription
+from app.subscription.share import encode_title, generate_cached_subscription
 from app.templates import render_template
 from config import (
     SUB_PROFILE_TITLE,
@@ -35,6 +36,38 @@ client_config = {
 router = APIRouter(tags=['Subscription'], prefix=f'/{XRAY_SUBSCRIPTION_PATH}')
 
 
+def subscription_response(
+    request: Request,
+    user: UserResponse,
+    user_id: int,
+    headers: dict,
+    config_format: str,
+    media_type: str,
+    as_base64: bool,
+    reverse: bool,
+) -> Response:
+    """Renders the subscription or reuses a cached one, answering 304 when the client already has it."""
+    conf, etag = generate_cached_subscription(user=user,
+                                              user_id=user_id,
+                                              config_format=config_format,
+                                              as_base64=as_base64,
+                                              reverse=reverse)
+    headers = {**headers, "etag": etag}
+
+    if_none_match = request.headers.get("If-None-Match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=conf, media_type=media_type, headers=headers)
+
+
+def update_user_sub(user_id: int, user_agent: str):
+    with GetDB() as db:
+        dbuser = crud.get_user_by_id(db, user_id)
+        if dbuser:
+            crud.update_user_sub(db, dbuser, user_agent)
+
+
 def get_subscription_user_info(user: UserResponse) -> dict:
     """Retrieve user subscription information including upload, download, total data, and expiry."""
     return {
@@ -49,6 +82,7 @@ def get_subscription_user_info(user: UserResponse) -> dict:
 @router.get("/{token}", include_in_schema=False)
 def user_subscription(
     request: Request,
+    bg: BackgroundTasks,
     db: Session = Depends(get_db),
     dbuser: UserResponse = Depends(get_validated_sub),
     user_agent: str = Header(default="")
@@ -65,7 +99,7 @@ def user_subscription(
             )
         )
 
-    crud.update_user_sub(db, dbuser, user_agent)
+    bg.add_task(update_user_sub, dbuser.id, user_agent)
     response_headers = {
         "content-disposition": f'attachment; filename="{user.username}"',
         "profile-web-page-url": str(request.url),
@@ -79,64 +113,64 @@ def user_subscription(
     }
 
     if re.match(r'^([Cc]lash-verge|[Cc]lash[-\.]?[Mm]eta|[Ff][Ll][Cc]lash|[Mm]ihomo)', user_agent):
-        conf = generate_subscription(user=user, config_format="clash-meta", as_base64=False, reverse=False)
-        return Response(content=conf, media_type="text/yaml", headers=response_headers)
+        return subscription_response(
+            request, user, dbuser.id, response_headers, "clash-meta", "text/yaml", False, False)
 
     elif re.match(r'^([Cc]lash|[Ss]tash)', user_agent):
-        conf = generate_subscription(user=user, config_format="clash", as_base64=False, reverse=False)
-        return Response(content=conf, media_type="text/yaml", headers=response_headers)
+        return subscription_response(
+            request, user, dbuser.id, response_headers, "clash", "text/yaml", False, False)
 
     elif re.match(r'^(SFA|SFI|SFM|SFT|[Kk]aring|[Hh]iddify[Nn]ext)', user_agent):
-        conf = generate_subscription(user=user, config_format="sing-box", as_base64=False, reverse=False)
-        return Response(content=conf, media_type="application/json", headers=response_headers)
+        return subscription_response(
+            request, user, dbuser.id, response_headers, "sing-box", "application/json", False, False)
 
     elif re.match(r'^(SS|SSR|SSD|SSS|Outline|Shadowsocks|SSconf)', user_agent):
-        conf = generate_subscription(user=user, config_format="outline", as_base64=False, reverse=False)
-        return Response(content=conf, media_type="application/json", headers=response_headers)
+        return subscription_response(
+            request, user, dbuser.id, response_headers, "outline", "application/json", False, False)
 
     elif (USE_CUSTOM_JSON_DEFAULT or USE_CUSTOM_JSON_FOR_V2RAYN) and re.match(r'^v2rayN/(\d+\.\d+)', user_agent):
         version_str = re.match(r'^v2rayN/(\d+\.\d+)', user_agent).group(1)
         if LooseVersion(version_str) >= LooseVersion("6.40"):
-            conf = generate_subscription(user=user, config_format="v2ray-json", as_base64=False, reverse=False)
-            return Response(content=conf, media_type="application/json", headers=response_headers)
+            return subscription_response(
+                request, user, dbuser.id, response_headers, "v2ray-json", "application/json", False, False)
         else:
-            conf = generate_subscription(user=user, config_format="v2ray", as_base64=True, reverse=False)
-            return Response(content=conf, media_type="text/plain", headers=response_headers)
+            return subscription_response(
+                request, user, dbuser.id, response_headers, "v2ray", "text/plain", True, False)
 
     elif (USE_CUSTOM_JSON_DEFAULT or USE_CUSTOM_JSON_FOR_V2RAYNG) and re.match(r'^v2rayNG/(\d+\.\d+\.\d+)', user_agent):
         version_str = re.match(r'^v2rayNG/(\d+\.\d+\.\d+)', user_agent).group(1)
         if LooseVersion(version_str) >= LooseVersion("1.8.29"):
-            conf = generate_subscription(user=user, config_format="v2ray-json", as_base64=False, reverse=False)
-            return Response(content=conf, media_type="application/json", headers=response_headers)
+            return subscription_response(
+                request, user, dbuser.id, response_headers, "v2ray-json", "application/json", False, False)
         elif LooseVersion(version_str) >= LooseVersion("1.8.18"):
-            conf = generate_subscription(user=user, config_format="v2ray-json", as_base64=False, reverse=True)
-            return Response(content=conf, media_type="application/json", headers=response_headers)
+            return subscription_response(
+                request, user, dbuser.id, response_headers, "v2ray-json", "application/json", False, True)
         else:
-            conf = generate_subscription(user=user, config_format="v2ray", as_base64=True, reverse=False)
-            return Response(content=conf, media_type="text/plain", headers=response_headers)
+            return subscription_response(
+                request, user, dbuser.id, response_headers, "v2ray", "text/plain", True, False)
 
     elif re.match(r'^[Ss]treisand', user_agent):
         if USE_CUSTOM_JSON_DEFAULT or USE_CUSTOM_JSON_FOR_STREISAND:
-            conf = generate_subscription(user=user, config_format="v2ray-json", as_base64=False, reverse=False)
-            return Response(content=conf, media_type="application/json", headers=response_headers)
+            return subscription_response(
+                request, user, dbuser.id, response_headers, "v2ray-json", "application/json", False, False)
         else:
-            conf = generate_subscription(user=user, config_format="v2ray", as_base64=True, reverse=False)
-            return Response(content=conf, media_type="text/plain", headers=response_headers)
+            return subscription_response(
+                request, user, dbuser.id, response_headers, "v2ray", "text/plain", True, False)
 
     elif (USE_CUSTOM_JSON_DEFAULT or USE_CUSTOM_JSON_FOR_HAPP) and re.match(r'^Happ/(\d+\.\d+\.\d+)', user_agent):
         version_str = re.match(r'^Happ/(\d+\.\d+\.\d+)', user_agent).group(1)
         if LooseVersion(version_str) >= LooseVersion("1.63.1"):
-            conf = generate_subscription(user=user, config_format="v2ray-json", as_base64=False, reverse=False)
-            return Response(content=conf, media_type="application/json", headers=response_headers)
+            return subscription_response(
+                request, user, dbuser.id, response_headers, "v2ray-json", "application/json", False, False)
         else:
-            conf = generate_subscription(user=user, config_format="v2ray", as_base64=True, reverse=False)
-            return Response(content=conf, media_type="text/plain", headers=response_headers)
+            return subscription_response(
+                request, user, dbuser.id, response_headers, "v2ray", "text/plain", True, False)
 
 
 
     else:
-        conf = generate_subscription(user=user, config_format="v2ray", as_base64=True, reverse=False)
-        return Response(content=conf, media_type="text/plain", headers=response_headers)
+        return subscription_response(
+            request, user, dbuser.id, response_headers, "v2ray", "text/plain", True, False)
 
 
 @router.get("/{token}/info", response_model=SubscriptionUserResponse)
@@ -152,12 +186,13 @@ def user_get_usage(
     dbuser: UserResponse = Depends(get_validated_sub),
     start: str = "",
     end: str = "",
+    granularity: UsageGranularity = None,
     db: Session = Depends(get_db)
 ):
     """Fetches the usage statistics for the user within a specified date range."""
     start, end = validate_dates(start, end)
 
-    usages = crud.get_user_usages(db, dbuser, start, end)
+    usages = crud.get_user_usages(db, dbuser, start, end, granularity)
 
     return {"usages": usages, "username": dbuser.username}
 
@@ -186,9 +221,4 @@ def user_subscription_with_client_type(
     }
 
     config = client_config.get(client_type)
-    conf = generate_subscription(user=user,
-                                 config_format=config["config_format"],
-                                 as_base64=config["as_base64"],
-                                 reverse=config["reverse"])
-
-    return Response(content=conf, media_type=config["media_type"], headers=response_headers)
+    return subscription_response(request, user, dbuser.id, response_headers, **config)
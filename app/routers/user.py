@@ -1,14 +1,17 @@
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
 
 from app import logger, xray
 from app.db import Session, crud, get_db
 from app.dependencies import get_expired_users_list, get_validated_user, validate_dates
 from app.models.admin import Admin
+from app.models.node import UsageGranularity
 from app.models.user import (
+    LAZY_FIELDS,
     UserCreate,
     UserModify,
     UserResponse,
@@ -18,6 +21,7 @@ from app.models.user import (
     UserUsagesResponse,
 )
 from app.utils import report, responses
+from app.utils.export import ExportFormat, export_users
 
 router = APIRouter(tags=["User"], prefix="/api", responses={401: responses._401})
 
@@ -208,10 +212,23 @@ def get_users(
     owner: Union[List[str], None] = Query(None, alias="admin"),
     status: UserStatus = None,
     sort: str = None,
+    include: Union[List[str], None] = Query(None),
+    cursor: Union[str, None] = None,
     db: Session = Depends(get_db),
     admin: Admin = Depends(Admin.get_current),
 ):
-    """Get all users"""
+    """
+    Get all users, `links` and `subscription_url` are only returned when requested with `include`
+
+    Passing `cursor` (empty for the first page) switches to cursor pagination, the next page is
+    requested with the returned `next_cursor` and `total` may be up to a few seconds old.
+    """
+    include = set(include or [])
+    if not include.issubset(LAZY_FIELDS):
+        raise HTTPException(
+            status_code=400, detail=f'"{", ".join(include - LAZY_FIELDS)}" is not a valid include option'
+        )
+
     if sort is not None:
         opts = sort.strip(",").split(",")
         sort = []
@@ -223,19 +240,46 @@ def get_users(
                     status_code=400, detail=f'"{opt}" is not a valid sort option'
                 )
 
-    users, count = crud.get_users(
-        db=db,
-        offset=offset,
-        limit=limit,
+    filters = dict(
         search=search,
         usernames=username,
         status=status,
-        sort=sort,
         admins=owner if admin.is_sudo else [admin.username],
-        return_with_count=True,
     )
 
-    return {"users": users, "total": count}
+    next_cursor = None
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status_code=400, detail="offset can't be used with cursor")
+        if sort and len(sort) > 1:
+            raise HTTPException(status_code=400, detail="only one sort option can be used with cursor")
+
+        try:
+            users, next_cursor = crud.get_users_page(
+                db=db, cursor=cursor, limit=limit, sort=sort[0] if sort else None, **filters
+            )
+        except ValueError as err:
+            raise HTTPException(status_code=400, detail=str(err))
+        count = crud.count_users(db, cached=True, **filters)
+
+    else:
+        users, count = crud.get_users(
+            db=db,
+            offset=offset,
+            limit=limit,
+            sort=sort,
+            return_with_count=True,
+            **filters,
+        )
+
+    response = UsersResponse.model_validate(
+        {"users": users, "total": count, "next_cursor": next_cursor}, from_attributes=True
+    )
+    # serialized here since the lazy fields which aren't included must not be generated
+    return Response(
+        content=response.model_dump_json(exclude={"users": {"__all__": LAZY_FIELDS - include}}),
+        media_type="application/json",
+    )
 
 
 @router.post("/users/reset", responses={403: responses._403, 404: responses._404})
@@ -245,7 +289,7 @@ def reset_users_data_usage(
     """Reset all users data usage"""
     dbadmin = crud.get_admin(db, admin.username)
     crud.reset_all_users_data_usage(db=db, admin=dbadmin)
-    startup_config = xray.config.include_db_users()
+    startup_config = xray.config.include_db_users(reload=True)
     xray.core.restart(startup_config)
     for node_id, node in list(xray.nodes.items()):
         if node.connected:
@@ -258,12 +302,13 @@ def get_user_usage(
     dbuser: UserResponse = Depends(get_validated_user),
     start: str = "",
     end: str = "",
+    granularity: UsageGranularity = None,
     db: Session = Depends(get_db),
 ):
-    """Get users usage"""
+    """Get users usage, split into hours, days or months when `granularity` is given"""
     start, end = validate_dates(start, end)
 
-    usages = crud.get_user_usages(db, dbuser, start, end)
+    usages = crud.get_user_usages(db, dbuser, start, end, granularity)
 
     return {"usages": usages, "username": dbuser.username}
 
@@ -299,20 +344,50 @@ def active_next_plan(
 def get_users_usage(
     start: str = "",
     end: str = "",
+    granularity: UsageGranularity = None,
     db: Session = Depends(get_db),
     owner: Union[List[str], None] = Query(None, alias="admin"),
     admin: Admin = Depends(Admin.get_current),
 ):
-    """Get all users usage"""
+    """Get all users usage, split into hours, days or months when `granularity` is given"""
     start, end = validate_dates(start, end)
 
     usages = crud.get_all_users_usages(
-        db=db, start=start, end=end, admin=owner if admin.is_sudo else [admin.username]
+        db=db, start=start, end=end, admin=owner if admin.is_sudo else [admin.username], granularity=granularity
     )
 
     return {"usages": usages}
 
 
+@router.get("/users/export", responses={403: responses._403})
+def export_users_list(
+    format: ExportFormat = ExportFormat.ndjson,
+    usage: bool = False,
+    username: List[str] = Query(None),
+    search: Union[str, None] = None,
+    owner: Union[List[str], None] = Query(None, alias="admin"),
+    status: UserStatus = None,
+    admin: Admin = Depends(Admin.get_current),
+):
+    """
+    Export all users as NDJSON or CSV, streamed while they're read from the database
+
+    - **usage**: Adds `used_traffic` and `lifetime_used_traffic` columns
+    """
+    return StreamingResponse(
+        export_users(
+            format=format,
+            usage=usage,
+            search=search,
+            usernames=username,
+            status=status,
+            admins=owner if admin.is_sudo else [admin.username],
+        ),
+        media_type=format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format.value}"'},
+    )
+
+
 @router.put("/user/{username}/set-owner", response_model=UserResponse)
 def set_owner(
     admin_username: str,
@@ -0,0 +1,87 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from config import SUB_CACHE_SIZE, SUB_CACHE_TTL
+
+
+class SubscriptionCache:
+    """
+    LRU cache of rendered subscriptions, entries expire `ttl` seconds after being set.
+
+    Keys start with the user's id, so all subscriptions of a user can be dropped at once.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[tuple, Tuple[str, str, float]]" = OrderedDict()
+        self._user_keys: Dict[int, Set[tuple]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Tuple[int, Hashable]) -> Optional[Tuple[str, str]]:
+        """
+        Returns the (content, etag) of the key or None
+        """
+        with self._lock:
+            try:
+                content, etag, set_at = self._data[key]
+            except KeyError:
+                return
+
+            if time.monotonic() - set_at > self.ttl:
+                self._delete(key)
+                return
+
+            self._data.move_to_end(key)
+            return content, etag
+
+    @staticmethod
+    def etag(content: str) -> str:
+        return f'"{hashlib.sha1(content.encode()).hexdigest()}"'
+
+    def set(self, key: Tuple[int, Hashable], content: str) -> str:
+        """
+        Stores the content and returns its etag
+        """
+        etag = self.etag(content)
+        if not self.enabled:
+            return etag
+
+        with self._lock:
+            self._data[key] = (content, etag, time.monotonic())
+            self._data.move_to_end(key)
+            self._user_keys[key[0]].add(key)
+            while len(self._data) > self.maxsize:
+                self._delete(next(iter(self._data)))
+
+        return etag
+
+    def _delete(self, key: tuple):
+        del self._data[key]
+        user_keys = self._user_keys[key[0]]
+        user_keys.discard(key)
+        if not user_keys:
+            del self._user_keys[key[0]]
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for key in self._user_keys.pop(user_id, ()):
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._user_keys.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+subscription_cache = SubscriptionCache(maxsize=SUB_CACHE_SIZE, ttl=SUB_CACHE_TTL)
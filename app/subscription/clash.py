@@ -1,13 +1,15 @@
 import copy
-import json
+import os
 from random import choice
+from typing import Union
 from uuid import UUID
 
 import yaml
+from jinja2 import nodes
 from jinja2.exceptions import TemplateNotFound
 
 from app.subscription.funcs import get_grpc_gun
-from app.templates import render_template
+from app.templates import DEFAULT_TEMPLATES_DIRECTORY, env, load_template, render_template, template_file_version
 from app.utils.helpers import yml_uuid_representer
 from config import (
     CLASH_SETTINGS_TEMPLATE,
@@ -16,6 +18,84 @@ from config import (
     USER_AGENT_TEMPLATE,
 )
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+DEFAULT_SUBSCRIPTION_TEMPLATE_FILE = os.path.join(DEFAULT_TEMPLATES_DIRECTORY, "clash/default.yml")
+
+_default_template_parts = {}
+_LINE_BREAKS = frozenset('\r\n\x85\u2028\u2029')
+
+
+def _as_reloaded(obj, memo: dict):
+    """
+    Returns what the `yaml` template filter would load back for the object,
+    dicts get sorted keys and UUIDs become strings. Raises TypeError for
+    anything which isn't dumped as a plain YAML type.
+    """
+    if type(obj) is str:
+        if _LINE_BREAKS.intersection(obj):
+            raise TypeError(obj)  # line breaks aren't kept as they are by the round trip
+        return obj
+    if obj is None or type(obj) in (int, float, bool):
+        return obj
+    if type(obj) is UUID:
+        return str(obj)
+
+    if id(obj) in memo:
+        return memo[id(obj)]  # shared objects are dumped as aliases and loaded back shared
+
+    if type(obj) is dict:
+        result = memo[id(obj)] = {}
+        for key, value in sorted(obj.items()):
+            if type(key) is not str:
+                raise TypeError(key)
+            result[key] = _as_reloaded(value, memo)
+        return result
+
+    if type(obj) is list:
+        result = memo[id(obj)] = []
+        result.extend(_as_reloaded(item, memo) for item in obj)
+        return result
+
+    raise TypeError(obj)
+
+
+def _excepted_conf_keys(template: str) -> frozenset:
+    """
+    Returns the keys the template leaves out of `conf` with the `except` filter
+    """
+    source, _, _ = env.loader.get_source(env, template)
+    keys = set()
+    for node in env.parse(source).find_all(nodes.Filter):
+        if node.name == 'except' and isinstance(node.node, nodes.Name) and node.node.name == 'conf':
+            keys.update(arg.value for arg in node.args if isinstance(arg, nodes.Const))
+    return frozenset(keys)
+
+
+def _get_default_template_parts():
+    """
+    Returns the static head of the default subscription template pre-serialized,
+    its url-test proxy group and the keys it leaves out of the conf, worked out
+    once per version of the file.
+    """
+    version = template_file_version(CLASH_SUBSCRIPTION_TEMPLATE)
+    if _default_template_parts.get('version') != version:
+        skeleton = yaml.load(
+            render_template(CLASH_SUBSCRIPTION_TEMPLATE, {"conf": {}, "proxy_remarks": []}),
+            Loader=SafeLoader
+        )
+        groups = skeleton.pop('proxy-groups')
+        _default_template_parts.update({
+            'version': version,
+            'head': yaml.dump(skeleton, sort_keys=False, allow_unicode=True),
+            'group': groups[0],
+            'excepted': _excepted_conf_keys(CLASH_SUBSCRIPTION_TEMPLATE),
+        })
+    return _default_template_parts['head'], _default_template_parts['group'], _default_template_parts['excepted']
+
 
 class ClashConfiguration(object):
     def __init__(self):
@@ -26,8 +106,10 @@ class ClashConfiguration(object):
             'rules': []
         }
         self.proxy_remarks = []
-        self.mux_template = render_template(MUX_TEMPLATE)
-        user_agent_data = json.loads(render_template(USER_AGENT_TEMPLATE))
+        self._remarks = set()
+        self._remark_counters = {}
+        self.mux_template = load_template(MUX_TEMPLATE)
+        user_agent_data = load_template(USER_AGENT_TEMPLATE)
 
         if 'list' in user_agent_data and isinstance(user_agent_data['list'], list):
             self.user_agent_list = user_agent_data['list']
@@ -35,7 +117,7 @@ class ClashConfiguration(object):
             self.user_agent_list = []
 
         try:
-            self.settings = yaml.load(render_template(CLASH_SETTINGS_TEMPLATE), Loader=yaml.SafeLoader)
+            self.settings = load_template(CLASH_SETTINGS_TEMPLATE, format="yaml")
         except TemplateNotFound:
             self.settings = {}
 
@@ -45,6 +127,16 @@ class ClashConfiguration(object):
         if reverse:
             self.data['proxies'].reverse()
 
+        try:
+            is_default = template_file_version(CLASH_SUBSCRIPTION_TEMPLATE)[0] == DEFAULT_SUBSCRIPTION_TEMPLATE_FILE
+        except TemplateNotFound:
+            is_default = False  # raised by the render below as before
+
+        if is_default:
+            rendered = self._render_default()
+            if rendered is not None:
+                return rendered
+
         yaml.add_representer(UUID, yml_uuid_representer)
         return yaml.dump(
             yaml.load(
@@ -52,13 +144,36 @@ class ClashConfiguration(object):
                     CLASH_SUBSCRIPTION_TEMPLATE,
                     {"conf": self.data, "proxy_remarks": self.proxy_remarks}
                 ),
-                Loader=yaml.SafeLoader
+                Loader=SafeLoader
 
             ),
             sort_keys=False,
             allow_unicode=True,
         )
 
+    def _render_default(self) -> Union[str, None]:
+        """
+        Emits what rendering the default template, loading and dumping it gives,
+        without the round trip. The pure python dumper is kept since libyaml
+        escapes emojis which are common in remarks.
+        Returns None if the data isn't kept as it is by the round trip.
+        """
+        head, group, excepted = _get_default_template_parts()
+
+        try:
+            conf = _as_reloaded({key: value for key, value in self.data.items() if key not in excepted}, {})
+            groups = [dict(group, proxies=_as_reloaded(self.proxy_remarks, {}) or None)]
+            if self.data.get("proxy-groups"):
+                groups.extend(_as_reloaded(self.data["proxy-groups"], {}))
+        except TypeError:
+            return
+
+        return (
+            head
+            + yaml.dump(conf, Dumper=yaml.SafeDumper, sort_keys=False, allow_unicode=True)
+            + yaml.dump({"proxy-groups": groups}, Dumper=yaml.SafeDumper, sort_keys=False, allow_unicode=True)
+        )
+
     def __str__(self) -> str:
         return self.render()
 
@@ -66,14 +181,18 @@ class ClashConfiguration(object):
         return self.render()
 
     def _remark_validation(self, remark):
-        if not remark in self.proxy_remarks:
+        if remark not in self._remarks:
             return remark
-        c = 2
-        while True:
-            new = f'{remark} ({c})'
-            if not new in self.proxy_remarks:
-                return new
+        # numbers below the last one tried for the remark are taken already
+        c = self._remark_counters.get(remark, 2)
+        while f'{remark} ({c})' in self._remarks:
             c += 1
+        self._remark_counters[remark] = c
+        return f'{remark} ({c})'
+
+    def _add_remark(self, remark):
+        self.proxy_remarks.append(remark)
+        self._remarks.add(remark)
 
     def http_config(
             self,
@@ -245,8 +364,7 @@ class ClashConfiguration(object):
 
         node[f'{network}-opts'] = net_opts
 
-        mux_json = json.loads(self.mux_template)
-        mux_config = mux_json["clash"]
+        mux_config = copy.deepcopy(self.mux_template["clash"])
 
         if mux_enable:
             node['smux'] = mux_config
@@ -295,7 +413,7 @@ class ClashConfiguration(object):
             return
 
         self.data['proxies'].append(node)
-        self.proxy_remarks.append(proxy_remark)
+        self._add_remark(proxy_remark)
 
 
 class ClashMetaConfiguration(ClashConfiguration):
@@ -395,4 +513,4 @@ class ClashMetaConfiguration(ClashConfiguration):
             return
 
         self.data['proxies'].append(node)
-        self.proxy_remarks.append(proxy_remark)
+        self._add_remark(proxy_remark)
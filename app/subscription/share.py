@@ -1,14 +1,20 @@
 import base64
+import hashlib
+import json
 import random
 import secrets
 from collections import defaultdict
 from datetime import datetime as dt
 from datetime import timedelta
-from typing import TYPE_CHECKING, List, Literal, Union
+from string import Formatter
+from typing import TYPE_CHECKING, List, Literal, Tuple, Union
 
 from jdatetime import date as jd
+from jinja2.exceptions import TemplateNotFound
 
 from app import xray
+from app.subscription.cache import subscription_cache
+from app.templates import template_file_version
 from app.utils.system import get_public_ip, get_public_ipv6, readable_size
 
 from . import *
@@ -18,10 +24,19 @@ if TYPE_CHECKING:
 
 from config import (
     ACTIVE_STATUS_TEXT,
+    CLASH_SETTINGS_TEMPLATE,
+    CLASH_SUBSCRIPTION_TEMPLATE,
     DISABLED_STATUS_TEXT,
     EXPIRED_STATUS_TEXT,
+    GRPC_USER_AGENT_TEMPLATE,
     LIMITED_STATUS_TEXT,
+    MUX_TEMPLATE,
     ONHOLD_STATUS_TEXT,
+    SINGBOX_SETTINGS_TEMPLATE,
+    SINGBOX_SUBSCRIPTION_TEMPLATE,
+    USER_AGENT_TEMPLATE,
+    V2RAY_SETTINGS_TEMPLATE,
+    V2RAY_SUBSCRIPTION_TEMPLATE,
 )
 
 SERVER_IP = get_public_ip()
@@ -131,6 +146,74 @@ def generate_subscription(
     return config
 
 
+def subscription_revision(user: "UserResponse") -> str:
+    """
+    Digest of everything of the user a subscription is rendered from,
+    including the format variables so that e.g. a changed DAYS_LEFT makes a new revision.
+    """
+    return hashlib.sha1(json.dumps([
+        user.username,
+        user.status,
+        {proxy_type: settings.model_dump_json() for proxy_type, settings in user.proxies.items()},
+        user.inbounds,
+        dict(setup_format_variables(user.__dict__)),
+    ], default=str).encode()).hexdigest()
+
+
+# templates each format is rendered from, a change to any of them makes new subscriptions
+_FORMAT_TEMPLATES = {
+    "clash": (CLASH_SUBSCRIPTION_TEMPLATE, CLASH_SETTINGS_TEMPLATE, MUX_TEMPLATE, USER_AGENT_TEMPLATE),
+    "clash-meta": (CLASH_SUBSCRIPTION_TEMPLATE, CLASH_SETTINGS_TEMPLATE, MUX_TEMPLATE, USER_AGENT_TEMPLATE),
+    "sing-box": (SINGBOX_SUBSCRIPTION_TEMPLATE, SINGBOX_SETTINGS_TEMPLATE, MUX_TEMPLATE, USER_AGENT_TEMPLATE),
+    "v2ray-json": (V2RAY_SUBSCRIPTION_TEMPLATE, V2RAY_SETTINGS_TEMPLATE, MUX_TEMPLATE, USER_AGENT_TEMPLATE,
+                   GRPC_USER_AGENT_TEMPLATE),
+}
+
+
+def templates_version(config_format: str) -> tuple:
+    """
+    Versions of the template files the format is rendered from, None for missing ones.
+    """
+    versions = []
+    for template in _FORMAT_TEMPLATES.get(config_format, ()):
+        try:
+            versions.append(template_file_version(template))
+        except TemplateNotFound:
+            versions.append(None)
+    return tuple(versions)
+
+
+def generate_cached_subscription(
+        user: "UserResponse",
+        user_id: int,
+        config_format: Literal["v2ray", "clash-meta", "clash", "sing-box", "outline", "v2ray-json"],
+        as_base64: bool,
+        reverse: bool,
+) -> Tuple[str, str]:
+    """
+    Same as generate_subscription but reuses the rendered config while neither the
+    user, the hosts, the core config nor the templates have changed, returns (config, etag).
+
+    Configs of users with an inbound whose hosts are picked at random (several
+    addresses, SNIs, hosts or short ids, or a `*` wildcard) aren't cached, so
+    every request gets a new pick as it does without the cache.
+    """
+    randomized_tags = get_host_plans()["randomized_tags"]
+    if any(tag in randomized_tags for tags in user.inbounds.values() for tag in tags):
+        config = generate_subscription(user=user, config_format=config_format, as_base64=as_base64, reverse=reverse)
+        return config, subscription_cache.etag(config)
+
+    key = (user_id, subscription_revision(user), xray.hosts.revision, xray.config.base_digest,
+           templates_version(config_format), config_format, as_base64, reverse)
+
+    cached = subscription_cache.get(key)
+    if cached:
+        return cached
+
+    config = generate_subscription(user=user, config_format=config_format, as_base64=as_base64, reverse=reverse)
+    return config, subscription_cache.set(key, config)
+
+
 def format_time_left(seconds_left: int) -> str:
     if not seconds_left or seconds_left <= 0:
         return "∞"
@@ -229,6 +312,118 @@ def setup_format_variables(extra_data: dict) -> dict:
     return format_variables
 
 
+class FormatTemplate:
+    """
+    A format string split once into its literal and field parts, filled like
+    `str.format_map`. Templates with format specs, conversions or indexed
+    fields are left to `str.format_map`.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self.parts = None
+        try:
+            parts = list(Formatter().parse(template))
+        except ValueError:
+            return  # invalid templates raise on format_map as before
+
+        if all(not spec and not conversion and (field is None or field.isidentifier())
+               for _, field, spec, conversion in parts):
+            self.parts = [(literal, field) for literal, field, _, _ in parts]
+
+    @property
+    def is_constant(self) -> bool:
+        return self.parts is not None and all(field is None for _, field in self.parts)
+
+    def format_map(self, variables: dict, wildcard_salt: str = None) -> str:
+        """
+        Fills the fields, `*` in the literal parts are replaced by the wildcard salt if given.
+        """
+        if self.parts is None:
+            template = self.template.replace('*', wildcard_salt) if wildcard_salt else self.template
+            return template.format_map(variables)
+
+        result = []
+        for literal, field in self.parts:
+            result.append(literal.replace('*', wildcard_salt) if wildcard_salt else literal)
+            if field is not None:
+                result.append(format(variables[field]))
+        return "".join(result)
+
+
+_host_plans = {"key": None}
+
+
+def _compile_host(host: dict, inbound: dict) -> dict:
+    return {
+        "remark": FormatTemplate(host["remark"]),
+        "address_list": [FormatTemplate(address) for address in host["address"]],
+        "sni_list": host["sni"] or inbound["sni"],
+        "req_host_list": host["host"] or inbound["host"],
+        "path": FormatTemplate(host["path"] if host["path"] is not None else inbound.get("path", "")),
+        "use_sni_as_host": host.get("use_sni_as_host", False),
+        "static": {
+            "port": host["port"] or inbound["port"],
+            "tls": inbound["tls"] if host["tls"] is None else host["tls"],
+            "alpn": host["alpn"] if host["alpn"] else None,
+            "fp": host["fingerprint"] or inbound.get("fp", ""),
+            "ais": host["allowinsecure"]
+            or inbound.get("allowinsecure", ""),
+            "mux_enable": host["mux_enable"],
+            "fragment_setting": host["fragment_setting"],
+            "noise_setting": host["noise_setting"],
+            "random_user_agent": host["random_user_agent"],
+        }
+    }
+
+
+def _is_randomized(host: dict, inbound: dict) -> bool:
+    """
+    Whether rendering the compiled host picks something at random
+    """
+    if len(inbound.get("sids") or []) > 1:
+        return True
+
+    templates = [address.template for address in host["address_list"]]
+    for choices in (templates, host["sni_list"], host["req_host_list"]):
+        if len(choices) > 1 or any("*" in choice for choice in choices):
+            return True
+
+    return False
+
+
+def get_host_plans() -> dict:
+    """
+    Returns the hosts of every inbound compiled into what's left to fill per
+    user, rebuilt when the hosts are updated or the core config is changed.
+    """
+    global _host_plans
+
+    xray.hosts.keys()  # loads the hosts if they aren't yet
+    key = (xray.hosts.revision, xray.config.base_digest)
+    if _host_plans["key"] == key:
+        return _host_plans
+
+    inbounds = xray.config.inbounds_by_tag
+    plans = {
+        "key": key,
+        "tag_index": {tag: index for index, tag in enumerate(inbounds)},
+        "inbounds": {
+            tag: {
+                "inbound": inbound,
+                "hosts": [_compile_host(host, inbound) for host in xray.hosts.get(tag, [])],
+            }
+            for tag, inbound in inbounds.items()
+        },
+    }
+    plans["randomized_tags"] = {
+        tag for tag, plan in plans["inbounds"].items()
+        if any(_is_randomized(host, plan["inbound"]) for host in plan["hosts"])
+    }
+    _host_plans = plans
+    return plans
+
+
 def process_inbounds_and_tags(
         inbounds: dict,
         proxies: dict,
@@ -243,82 +438,67 @@ def process_inbounds_and_tags(
         ],
         reverse=False,
 ) -> Union[List, str]:
-    _inbounds = []
-    for protocol, tags in inbounds.items():
-        for tag in tags:
-            _inbounds.append((protocol, [tag]))
-    index_dict = {proxy: index for index, proxy in enumerate(
-        xray.config.inbounds_by_tag.keys())}
+    plans = get_host_plans()
+    tag_index = plans["tag_index"]
     inbounds = sorted(
-        _inbounds, key=lambda x: index_dict.get(x[1][0], float('inf')))
+        ((protocol, tag) for protocol, tags in inbounds.items() for tag in tags),
+        key=lambda x: tag_index.get(x[1], float('inf')))
 
-    for protocol, tags in inbounds:
+    dumped_settings = {}
+    for protocol, tag in inbounds:
         settings = proxies.get(protocol)
         if not settings:
             continue
 
         format_variables.update({"PROTOCOL": protocol.name})
-        for tag in tags:
-            inbound = xray.config.inbounds_by_tag.get(tag)
-            if not inbound:
-                continue
-
-            format_variables.update({"TRANSPORT": inbound["network"]})
-            host_inbound = inbound.copy()
-            for host in xray.hosts.get(tag, []):
-                sni = ""
-                sni_list = host["sni"] or inbound["sni"]
-                if sni_list:
-                    salt = secrets.token_hex(8)
-                    sni = random.choice(sni_list).replace("*", salt)
-
-                if sids := inbound.get("sids"):
-                    inbound["sid"] = random.choice(sids)
-
-                req_host = ""
-                req_host_list = host["host"] or inbound["host"]
-                if req_host_list:
-                    salt = secrets.token_hex(8)
-                    req_host = random.choice(req_host_list).replace("*", salt)
-
-                address = ""
-                address_list = host['address']
-                if host['address']:
-                    salt = secrets.token_hex(8)
-                    address = random.choice(address_list).replace('*', salt)
-
-                if host["path"] is not None:
-                    path = host["path"].format_map(format_variables)
-                else:
-                    path = inbound.get("path", "").format_map(format_variables)
-
-                if host.get("use_sni_as_host", False) and sni:
-                    req_host = sni
-
-                host_inbound.update(
-                    {
-                        "port": host["port"] or inbound["port"],
-                        "sni": sni,
-                        "host": req_host,
-                        "tls": inbound["tls"] if host["tls"] is None else host["tls"],
-                        "alpn": host["alpn"] if host["alpn"] else None,
-                        "path": path,
-                        "fp": host["fingerprint"] or inbound.get("fp", ""),
-                        "ais": host["allowinsecure"]
-                        or inbound.get("allowinsecure", ""),
-                        "mux_enable": host["mux_enable"],
-                        "fragment_setting": host["fragment_setting"],
-                        "noise_setting": host["noise_setting"],
-                        "random_user_agent": host["random_user_agent"],
-                    }
-                )
-
-                conf.add(
-                    remark=host["remark"].format_map(format_variables),
-                    address=address.format_map(format_variables),
-                    inbound=host_inbound,
-                    settings=settings.model_dump()
-                )
+        inbound_plan = plans["inbounds"].get(tag)
+        if not inbound_plan:
+            continue
+
+        if protocol not in dumped_settings:
+            dumped_settings[protocol] = settings.model_dump()
+
+        inbound = inbound_plan["inbound"]
+        format_variables.update({"TRANSPORT": inbound["network"]})
+        host_inbound = inbound.copy()
+        sids = inbound.get("sids")
+        for host in inbound_plan["hosts"]:
+            sni = ""
+            if host["sni_list"]:
+                salt = secrets.token_hex(8)
+                sni = random.choice(host["sni_list"]).replace("*", salt)
+
+            if sids:
+                host_inbound["sid"] = random.choice(sids)
+
+            req_host = ""
+            if host["req_host_list"]:
+                salt = secrets.token_hex(8)
+                req_host = random.choice(host["req_host_list"]).replace("*", salt)
+
+            address = ""
+            if host["address_list"]:
+                salt = secrets.token_hex(8)
+                address = random.choice(host["address_list"]).format_map(format_variables, wildcard_salt=salt)
+
+            if host["use_sni_as_host"] and sni:
+                req_host = sni
+
+            host_inbound.update(host["static"])
+            host_inbound.update(
+                {
+                    "sni": sni,
+                    "host": req_host,
+                    "path": host["path"].format_map(format_variables),
+                }
+            )
+
+            conf.add(
+                remark=host["remark"].format_map(format_variables),
+                address=address,
+                inbound=host_inbound,
+                settings=dumped_settings[protocol]
+            )
 
     return conf.render(reverse=reverse)
 
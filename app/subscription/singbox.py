@@ -6,7 +6,7 @@ from app.utils.helpers import UUIDEncoder
 from jinja2.exceptions import TemplateNotFound
 
 from app.subscription.funcs import get_grpc_gun
-from app.templates import render_template
+from app.templates import load_template
 from config import (
     MUX_TEMPLATE,
     SINGBOX_SETTINGS_TEMPLATE,
@@ -19,9 +19,13 @@ class SingBoxConfiguration(str):
 
     def __init__(self):
         self.proxy_remarks = []
-        self.config = json.loads(render_template(SINGBOX_SUBSCRIPTION_TEMPLATE))
-        self.mux_template = render_template(MUX_TEMPLATE)
-        user_agent_data = json.loads(render_template(USER_AGENT_TEMPLATE))
+        self._remarks = set()
+        self._remark_counters = {}
+        template = load_template(SINGBOX_SUBSCRIPTION_TEMPLATE)
+        # outbounds are modified by render, the rest of the template is shared
+        self.config = {**template, "outbounds": [dict(outbound) for outbound in template["outbounds"]]}
+        self.mux_template = load_template(MUX_TEMPLATE)
+        user_agent_data = load_template(USER_AGENT_TEMPLATE)
 
         if 'list' in user_agent_data and isinstance(user_agent_data['list'], list):
             self.user_agent_list = user_agent_data['list']
@@ -29,21 +33,25 @@ class SingBoxConfiguration(str):
             self.user_agent_list = []
 
         try:
-            self.settings = json.loads(render_template(SINGBOX_SETTINGS_TEMPLATE))
+            self.settings = load_template(SINGBOX_SETTINGS_TEMPLATE)
         except TemplateNotFound:
             self.settings = {}
 
         del user_agent_data
 
     def _remark_validation(self, remark):
-        if not remark in self.proxy_remarks:
+        if remark not in self._remarks:
             return remark
-        c = 2
-        while True:
-            new = f'{remark} ({c})'
-            if not new in self.proxy_remarks:
-                return new
+        # numbers below the last one tried for the remark are taken already
+        c = self._remark_counters.get(remark, 2)
+        while f'{remark} ({c})' in self._remarks:
             c += 1
+        self._remark_counters[remark] = c
+        return f'{remark} ({c})'
+
+    def _add_remark(self, remark):
+        self.proxy_remarks.append(remark)
+        self._remarks.add(remark)
 
     def add_outbound(self, outbound_data):
         self.config["outbounds"].append(outbound_data)
@@ -274,8 +282,7 @@ class SingBoxConfiguration(str):
                                             pbk=pbk, sid=sid, alpn=alpn,
                                             ais=ais)
 
-        mux_json = json.loads(self.mux_template)
-        mux_config = mux_json["sing-box"]
+        mux_config = dict(self.mux_template["sing-box"])
 
         config['multiplex'] = mux_config
         if config['multiplex']["enabled"]:
@@ -298,7 +305,7 @@ class SingBoxConfiguration(str):
         alpn = inbound.get('alpn', None)
 
         remark = self._remark_validation(remark)
-        self.proxy_remarks.append(remark)
+        self._add_remark(remark)
 
         outbound = self.make_outbound(
             remark=remark,
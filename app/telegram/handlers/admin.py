@@ -1591,7 +1591,7 @@ def confirm_user_command(call: types.CallbackQuery):
     elif data == 'restart':
         m = bot.edit_message_text(
             '🔄 Restarting XRay core...', call.message.chat.id, call.message.message_id)
-        config = xray.config.include_db_users()
+        config = xray.config.include_db_users(reload=True)
         xray.core.restart(config)
         for node_id, node in list(xray.nodes.items()):
             if node.connected:
@@ -1,13 +1,19 @@
+import json
+import os
+import threading
 from datetime import datetime
-from typing import Union
+from typing import Any, Dict, Literal, Union
 
 import jinja2
+import yaml
 
 from config import CUSTOM_TEMPLATES_DIRECTORY
 
 from .filters import CUSTOM_FILTERS
 
-template_directories = ["app/templates"]
+DEFAULT_TEMPLATES_DIRECTORY = "app/templates"
+
+template_directories = [DEFAULT_TEMPLATES_DIRECTORY]
 if CUSTOM_TEMPLATES_DIRECTORY:
     # User's templates have priority over default templates
     template_directories.insert(0, CUSTOM_TEMPLATES_DIRECTORY)
@@ -16,6 +22,50 @@ env = jinja2.Environment(loader=jinja2.FileSystemLoader(template_directories))
 env.filters.update(CUSTOM_FILTERS)
 env.globals['now'] = datetime.utcnow
 
+_parsers = {
+    "json": json.loads,
+    "yaml": lambda source: yaml.load(source, Loader=yaml.SafeLoader),
+}
+_loaded_templates: Dict[tuple, tuple] = {}
+_loaded_templates_lock = threading.Lock()
+
 
 def render_template(template: str, context: Union[dict, None] = None) -> str:
     return env.get_template(template).render(context or {})
+
+
+def template_file_version(template: str) -> tuple:
+    """
+    Returns the (path, mtime) of the file the template is loaded from.
+    """
+    for directory in template_directories:
+        path = os.path.join(directory, template)
+        try:
+            return path, os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+    raise jinja2.TemplateNotFound(template)
+
+
+def load_template(template: str, format: Literal["json", "yaml"] = "json") -> Any:
+    """
+    Renders a template which takes no context and parses it, the result is
+    cached until the template's file is replaced or modified.
+
+    The returned object is shared by all callers and must not be modified,
+    copy the parts which are going to be changed.
+    """
+    version = template_file_version(template)
+    key = (template, format)
+
+    try:
+        loaded_version, loaded = _loaded_templates[key]
+        if loaded_version == version:
+            return loaded
+    except KeyError:
+        pass
+
+    with _loaded_templates_lock:
+        loaded = _parsers[format](render_template(template))
+        _loaded_templates[key] = (version, loaded)
+    return loaded
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from app import logger
+
+NodeHourKey = Tuple[Optional[int], datetime]
+
+
+class UsageAccumulator:
+    """
+    Write-behind buffer for users' traffic.
+
+    Deltas from every node are merged in memory by `add` and handed to
+    `flush_func(users_usage, online_at, node_users_usage)` on `flush`.
+    Every `add` is appended to a journal file, so deltas which are not
+    flushed yet are replayed on the next startup instead of being lost.
+
+    `flush_func` must write all of the deltas or none of them, a failed flush
+    is put back and retried as a whole. The journal is only dropped after the
+    flush, so a crash in between replays that flush and counts it twice.
+    """
+
+    def __init__(self, flush_func: Callable, journal_path: str = None):
+        self.flush_func = flush_func
+        self.journal_path = journal_path
+        self.pending_path = f"{journal_path}.pending" if journal_path else None
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._journal = None
+        self._reset()
+
+        if self.journal_path:
+            self._replay()
+            try:
+                os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+                self._journal = open(self.journal_path, 'a')
+            except OSError as err:
+                logger.warning(f"Unable to open usages journal, unflushed usages won't survive a restart: {err}")
+
+    def _reset(self):
+        self.users_usage: Dict[int, int] = defaultdict(int)
+        self.online_at: Dict[int, datetime] = {}
+        self.node_users_usage: Dict[NodeHourKey, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def _merge(self, node_id: Optional[int], created_at: datetime, usages: Dict[int, int], online_at: datetime):
+        node_usage = self.node_users_usage[(node_id, created_at)]
+        for uid, value in usages.items():
+            self.users_usage[uid] += value
+            node_usage[uid] += value
+            self.online_at[uid] = online_at
+
+    def _replay(self):
+        for path in (self.pending_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+
+            with open(path) as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # partially written record of a crash
+                    self._merge(
+                        record['node_id'],
+                        datetime.fromtimestamp(record['created_at']),
+                        {int(uid): value for uid, value in record['usages'].items()},
+                        datetime.fromtimestamp(record['online_at'])
+                    )
+
+    def _write_journal(self, node_id: Optional[int], created_at: datetime, usages: Dict[int, int], now: datetime):
+        if not self._journal:
+            return
+
+        self._journal.write(json.dumps({
+            "node_id": node_id,
+            "created_at": created_at.timestamp(),
+            "online_at": now.timestamp(),
+            "usages": usages
+        }) + '\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _rotate_journal(self):
+        """
+        moves the journal content into the pending file which is kept until
+        the flushed deltas are written into the database
+        """
+        if not self._journal:
+            return
+
+        self._journal.close()
+        if os.path.exists(self.pending_path):
+            with open(self.journal_path) as src, open(self.pending_path, 'a') as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.pending_path)
+        self._journal = open(self.journal_path, 'a')
+
+    def add(self, node_id: Optional[int], usages: Dict[int, int]):
+        if not usages:
+            return
+
+        now = datetime.utcnow()
+        created_at = now.replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            self._merge(node_id, created_at, usages, now)
+            try:
+                self._write_journal(node_id, created_at, usages, now)
+            except OSError as err:
+                logger.warning(f"Unable to write usages journal: {err}")
+
+    def __len__(self):
+        return len(self.users_usage)
+
+    def pending_users_usage(self) -> Dict[int, int]:
+        """
+        Copy of the users' deltas added since the last flush.
+        """
+        with self._lock:
+            return dict(self.users_usage)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self.users_usage:
+                    return
+
+                users_usage, online_at, node_users_usage = \
+                    self.users_usage, self.online_at, self.node_users_usage
+                self._reset()
+                self._rotate_journal()
+
+            try:
+                self.flush_func(users_usage, online_at, node_users_usage)
+            except Exception:
+                # put the deltas back, they are still in the pending file
+                with self._lock:
+                    for (node_id, created_at), usages in node_users_usage.items():
+                        node_usage = self.node_users_usage[(node_id, created_at)]
+                        for uid, value in usages.items():
+                            node_usage[uid] += value
+                    for uid, value in users_usage.items():
+                        self.users_usage[uid] += value
+                        self.online_at[uid] = max(online_at[uid], self.online_at.get(uid, online_at[uid]))
+                raise
+
+            if self.pending_path and os.path.exists(self.pending_path):
+                os.remove(self.pending_path)
+
+    def close(self):
+        if self._journal:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,143 @@
+import heapq
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app import logger
+from app.models.user import UserStatus
+
+if TYPE_CHECKING:
+    from app.db.models import User
+
+EXPIRE = "expire"
+ON_HOLD_TIMEOUT = "on_hold_timeout"
+
+# failed reviews are fired again after this many seconds
+EXPIRY_RETRY_DELAY = 10
+# longest wait for the earliest entry, far entries overflow the wait timeout
+EXPIRY_MAX_WAIT = 3600
+
+
+def _now() -> float:
+    # the same clock the reviews compare expire and on_hold_timeout against
+    return datetime.utcnow().timestamp()
+
+
+class ExpiryScheduler:
+    """
+    Min-heap of the times active users expire and on-hold users time out,
+    calling `handler(kind, user_ids)` from its own thread once they are due.
+
+    A user has at most one live entry of each kind, entries replaced by
+    a later `schedule` stay in the heap and are skipped once popped.
+    The handler is expected to check the users again, so a stale entry
+    costs a review which changes nothing.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, str, int]] = []
+        self._due: Dict[Tuple[str, int], float] = {}
+        self._cond = threading.Condition()
+        self._handler: Optional[Callable[[str, List[int]], None]] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def __len__(self):
+        return len(self._due)
+
+    def _set(self, kind: str, user_id: int, due: Optional[float]):
+        key = (kind, user_id)
+        if due is None:
+            self._due.pop(key, None)
+            return
+
+        if self._due.get(key) == due:
+            return
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, kind, user_id))
+
+    def _schedule(self, user_id: int, status: UserStatus, expire: Optional[int],
+                  on_hold_timeout: Optional[datetime]):
+        self._set(EXPIRE, user_id, expire if status == UserStatus.active and expire else None)
+        self._set(ON_HOLD_TIMEOUT, user_id,
+                  on_hold_timeout.timestamp() if status == UserStatus.on_hold and on_hold_timeout else None)
+
+        # drop the replaced entries once they outnumber the live ones
+        if len(self._heap) > 2 * len(self._due) + 1024:
+            self._heap = [(due, kind, user_id) for (kind, user_id), due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def schedule(self, user_id: int, status: UserStatus, expire: Optional[int],
+                 on_hold_timeout: Optional[datetime]):
+        """
+        Replaces the entries of the user by its current state, a no-op until started.
+        """
+        with self._cond:
+            if not self.started:
+                return
+            self._schedule(user_id, status, expire, on_hold_timeout)
+            self._cond.notify()
+
+    def schedule_user(self, dbuser: "User"):
+        self.schedule(dbuser.id, dbuser.status, dbuser.expire, dbuser.on_hold_timeout)
+
+    def start(self, handler: Callable[[str, List[int]], None],
+              load: Callable[[], Iterable[Tuple[int, UserStatus, Optional[int], Optional[datetime]]]]):
+        """
+        Fills the heap with the (id, status, expire, on_hold_timeout) of the users
+        returned by `load` and starts firing them.
+        """
+        with self._cond:
+            if self.started:
+                return
+
+            self._handler = handler
+            # loaded while holding the lock, so changes made meanwhile are scheduled after it
+            for row in load():
+                self._schedule(*row)
+
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _pop_due(self, now: float) -> Dict[str, List[int]]:
+        due_users = {}
+        while self._heap and self._heap[0][0] <= now:
+            due, kind, user_id = heapq.heappop(self._heap)
+            if self._due.get((kind, user_id)) == due:
+                del self._due[(kind, user_id)]
+                due_users.setdefault(kind, []).append(user_id)
+        return due_users
+
+    def _fire(self, due_users: Dict[str, List[int]]):
+        for kind, user_ids in due_users.items():
+            try:
+                self._handler(kind, user_ids)
+            except Exception as err:
+                logger.error(f"Failed to review {len(user_ids)} user(s) due for {kind}: {err}")
+                with self._cond:
+                    for user_id in user_ids:
+                        if (kind, user_id) not in self._due:
+                            self._set(kind, user_id, _now() + EXPIRY_RETRY_DELAY)
+
+    def _run(self):
+        while True:
+            try:
+                with self._cond:
+                    due_users = self._pop_due(_now())
+                    if not due_users:
+                        delay = self._heap[0][0] - _now() if self._heap else EXPIRY_MAX_WAIT
+                        self._cond.wait(max(0, min(delay, EXPIRY_MAX_WAIT)))
+                        continue
+
+                self._fire(due_users)
+            except Exception as err:
+                # a bad entry mustn't stop the expiry of everyone else
+                logger.exception(f"Expiry scheduler error: {err}")
+                with self._cond:
+                    self._cond.wait(EXPIRY_RETRY_DELAY)
+
+
+expiry_scheduler = ExpiryScheduler()
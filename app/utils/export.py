@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Iterable, Iterator
+
+from app.db import GetDB, crud
+
+# rows are written out in chunks of this size
+EXPORT_CHUNK_ROWS = 100
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+    @property
+    def media_type(self) -> str:
+        return {
+            ExportFormat.ndjson: "application/x-ndjson",
+            ExportFormat.csv: "text/csv",
+        }[self]
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_chunks(rows: Iterable[dict]) -> Iterator[str]:
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps({k: _plain(v) for k, v in row.items()}, ensure_ascii=False))
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk.clear()
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def _csv_chunks(rows: Iterable[dict], columns: Iterable[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # the header is sent before the first rows are fetched
+    yield buffer.getvalue()
+
+    buffer.seek(0)
+    buffer.truncate()
+    count = 0
+    for row in rows:
+        writer.writerow([_plain(v) for v in row.values()])
+        count += 1
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_users(format: ExportFormat = ExportFormat.ndjson, usage: bool = False, **filters) -> Iterator[str]:
+    """
+    Yields the users matching the filters of crud.get_users as NDJSON or CSV text chunks.
+
+    The database session is opened by the generator itself, so it can be consumed
+    after the caller's session is closed, e.g. by a streaming response.
+    """
+    columns = crud.USERS_EXPORT_COLUMNS + (crud.USERS_EXPORT_USAGE_COLUMNS if usage else ())
+
+    with GetDB() as db:
+        rows = crud.iter_users_export(db, usage=usage, **filters)
+        if format == ExportFormat.csv:
+            yield from _csv_chunks(rows, columns)
+        else:
+            yield from _ndjson_chunks(rows)
@@ -0,0 +1,96 @@
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Tuple
+
+from app.models.user import UserStatus
+
+if TYPE_CHECKING:
+    from app.db.models import User
+
+
+class QuotaIndex:
+    """
+    Remaining data quota (data_limit - used_traffic) of the active users with a data limit,
+    lowered by the deltas as they are added so the users crossing their limit are caught
+    before the deltas are flushed.
+
+    Users changed one by one are updated in place by `update_user`, bulk changes
+    `invalidate` the index and it's loaded again by the next poll.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._remaining: Dict[int, int] = {}
+        # deltas consumed but not flushed yet, left out of the quotas read from the database
+        self._unflushed: Dict[int, int] = {}
+        # bumped on every change, a load which raced with one doesn't count as loaded
+        self._version = 0
+        self.loaded = False
+
+    def load(self, read_quotas: Callable[[], Iterable[Tuple[int, int]]], pending: Dict[int, int] = None) -> List[int]:
+        """
+        Reloads the (id, remaining quota) rows returned by `read_quotas`, less the deltas
+        not flushed yet. Returns the users who are already out of quota.
+        """
+        with self._lock:
+            version = self._version
+
+        pending = dict(pending or {})
+        crossed = []
+        remaining = {}
+        for uid, quota in read_quotas():
+            quota -= pending.get(uid, 0)
+            if quota > 0:
+                remaining[uid] = quota
+            else:
+                crossed.append(uid)
+
+        with self._lock:
+            self._remaining = remaining
+            self._unflushed = pending
+            self.loaded = self._version == version
+        return crossed
+
+    def consume(self, usages: Dict[int, int]) -> List[int]:
+        """
+        Lowers the users' quotas by the deltas, returns the users who ran out of it.
+        They're dropped from the index until the next load.
+        """
+        crossed = []
+        with self._lock:
+            for uid, value in usages.items():
+                self._unflushed[uid] = self._unflushed.get(uid, 0) + value
+                try:
+                    remaining = self._remaining[uid] - value
+                except KeyError:
+                    continue
+
+                if remaining > 0:
+                    self._remaining[uid] = remaining
+                else:
+                    del self._remaining[uid]
+                    crossed.append(uid)
+        return crossed
+
+    def update_user(self, dbuser: "User"):
+        """
+        Replaces the quota of the user by its current state, a no-op until loaded.
+        """
+        with self._lock:
+            self._version += 1
+            if not self.loaded:
+                return
+
+            self._remaining.pop(dbuser.id, None)
+            if dbuser.status == UserStatus.active and dbuser.data_limit is not None:
+                remaining = dbuser.data_limit - (dbuser.used_traffic or 0) - self._unflushed.get(dbuser.id, 0)
+                # out of quota users are limited by the review of the next flush
+                if remaining > 0:
+                    self._remaining[dbuser.id] = remaining
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self.loaded = False
+
+
+quota_index = QuotaIndex()
@@ -0,0 +1,166 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Set
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import ObjectDeletedError
+
+from app import logger, xray
+from app.db import (GetDB, get_onhold_users_for_review, get_user_by_id,
+                    get_users_for_review, reset_user_by_next, review_users_status,
+                    start_user_expire, update_user_status)
+from app.db.crud import get_users_expiry
+from app.models.user import UserResponse, UserStatus
+from app.utils import report
+from app.utils.expiry import EXPIRE, ON_HOLD_TIMEOUT, expiry_scheduler
+
+if TYPE_CHECKING:
+    from app.db.models import User
+
+PROCESSING_USERS: Set[int] = set()
+
+
+def reset_user_by_next_report(db: Session, user: "User"):
+    user = reset_user_by_next(db, user)
+
+    xray.operations.update_user(user)
+
+    report.user_data_reset_by_next(user=UserResponse.model_validate(user), user_admin=user.admin)
+
+
+def process_single_user_review(user_id: int, now_ts: float) -> None:
+    
+    with GetDB() as db:
+        try:
+            user = get_user_by_id(db, user_id)
+            
+            if not user:
+                return
+            
+            limited = user.data_limit and user.used_traffic >= user.data_limit
+            expired = user.expire and user.expire <= now_ts
+            
+            logger.debug(f"Reviewing user \"{user.username}\": limited={limited}, expired={expired}, now={now_ts}, expire={user.expire}, used_traffic={user.used_traffic}, data_limit={user.data_limit}")
+
+            if (limited or expired) and user.next_plan is not None:
+                    if user.next_plan.fire_on_either:
+                        reset_user_by_next_report(db, user)
+                        return
+
+                    elif limited and expired:
+                        reset_user_by_next_report(db, user)
+                        return
+
+            if limited:
+                status = UserStatus.limited
+            elif expired:
+                status = UserStatus.expired
+            else:
+                return
+            
+            xray.operations.remove_user(user)
+
+            update_user_status(db, user, status)
+
+            report.status_change(username=user.username, status=status,
+                                 user=UserResponse.model_validate(user), user_admin=user.admin)
+
+            logger.info(f"User \"{user.username}\" status changed to {status}")
+        except ObjectDeletedError:
+            logger.warning(f"User {user_id} deleted during review, skipping.")
+        except SQLAlchemyError as e:
+            logger.exception(f"Database error review user {user_id}: {e}")
+        except Exception as e:
+            logger.exception(f"Unknown error review user {user_id}: {e}")
+        finally:
+            if user_id in PROCESSING_USERS:
+                PROCESSING_USERS.remove(user_id)
+
+
+def review_users(now_ts: float, statuses: List[UserStatus], user_ids: List[int] = None) -> None:
+    """
+    Changes the status of the active users due for one of the statuses,
+    all of them or only the ones among user_ids.
+    """
+    user_ids_to_review = []
+
+    with GetDB() as db:
+        # users without a next plan are limited or expired all at once
+        changed = review_users_status(db, now_ts, statuses, user_ids)
+        xray.operations.remove_users([user for users in changed.values() for user in users])
+
+        for status, users in changed.items():
+            for user in users:
+                report.status_change(username=user.username, status=status,
+                                     user=UserResponse.model_validate(user), user_admin=user.admin)
+
+                logger.info(f"User \"{user.username}\" status changed to {status}")
+
+        # users with a next plan might be reset by it instead, they're reviewed one by one
+        users = get_users_for_review(db, now_ts, next_plan=True, statuses=statuses, user_ids=user_ids)
+        for u in users:
+            if u.id not in PROCESSING_USERS:
+                user_ids_to_review.append(u.id)
+                PROCESSING_USERS.add(u.id)
+
+    if user_ids_to_review:
+        logger.debug(f"Reviewing {len(user_ids_to_review)} users for status change...")
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            for uid in user_ids_to_review:
+                executor.submit(process_single_user_review, uid, now_ts)
+
+
+def review_limited_users(user_ids: List[int]) -> None:
+    """
+    Limits the users among user_ids who reached their data limit, called by the usages recorder.
+    """
+    review_users(datetime.utcnow().timestamp(), [UserStatus.limited], user_ids)
+
+
+def review_onhold_users(now: datetime, user_ids: List[int] = None) -> None:
+    """
+    Activates the on-hold users who came online or timed out, all of them or only the ones among user_ids.
+    """
+    with GetDB() as db:
+        for user in get_onhold_users_for_review(db, now, user_ids):
+            try:
+                status = UserStatus.active
+
+                update_user_status(db, user, status)
+                start_user_expire(db, user)
+
+                report.status_change(
+                    username=user.username,
+                    status=status,
+                    user=UserResponse.model_validate(user),
+                    user_admin=user.admin,
+                )
+
+                logger.info(f"User \"{user.username}\" status changed to {status}")
+            except ObjectDeletedError:
+                logger.warning("User object deleted during on-hold review, skipping.")
+            except SQLAlchemyError:
+                logger.exception("Database error while reviewing on-hold users")
+            except Exception:
+                logger.exception("Unknown error while reviewing on-hold users")
+
+
+def review_due_users(kind: str, user_ids: List[int]) -> None:
+    """
+    Expires or activates the users fired by the expiry scheduler.
+    """
+    now = datetime.utcnow()
+    if kind == EXPIRE:
+        review_users(now.timestamp(), [UserStatus.expired], user_ids)
+    elif kind == ON_HOLD_TIMEOUT:
+        review_onhold_users(now, user_ids)
+
+
+def start_expiry_scheduler() -> None:
+    def load():
+        with GetDB() as db:
+            return get_users_expiry(db)
+
+    expiry_scheduler.start(review_due_users, load)
@@ -1,3 +1,6 @@
+import time
+
+
 class MemoryStorage:
     def __init__(self):
         self._data = {}
@@ -15,10 +18,37 @@ class MemoryStorage:
         self._data.clear()
 
 
+class TTLMemoryStorage(MemoryStorage):
+    """
+    MemoryStorage whose values are forgotten `ttl` seconds after being set
+    """
+
+    def __init__(self, ttl: float):
+        super().__init__()
+        self.ttl = ttl
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic())
+
+    def get(self, key, default=None):
+        try:
+            value, set_at = self._data[key]
+        except KeyError:
+            return default
+
+        if time.monotonic() - set_at > self.ttl:
+            self.delete(key)
+            return default
+
+        return value
+
+
 class ListStorage(list):
     def __init__(self, update_func):
         super().__init__()
         self.update_func = update_func
+        # bumped on every update, lets derived caches tell the content changed
+        self.revision = 0
 
     def __getitem__(self, index):
         if not self:
@@ -40,12 +70,15 @@ class ListStorage(list):
 
     def update(self):
         self.update_func(self)
+        self.revision += 1
 
 
 class DictStorage(dict):
     def __init__(self, update_func):
         super().__init__()
         self.update_func = update_func
+        # bumped on every update, lets derived caches tell the content changed
+        self.revision = 0
 
     def __getitem__(self, key):
         if not self:
@@ -85,3 +118,4 @@ class DictStorage(dict):
 
     def update(self):
         self.update_func(self)
+        self.revision += 1
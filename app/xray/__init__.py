@@ -2,6 +2,7 @@ from random import randint
 from typing import TYPE_CHECKING, Dict, Sequence
 
 from app.models.proxy import ProxyHostSecurity
+from app.subscription.cache import subscription_cache
 from app.utils.store import DictStorage
 from app.utils.system import check_port
 from app.xray import operations
@@ -38,6 +39,7 @@ def hosts(storage: dict):
     from app.db import GetDB, crud
 
     storage.clear()
+    subscription_cache.clear()
     with GetDB() as db:
         for inbound_tag in config.inbounds_by_tag:
             inbound_hosts: Sequence[ProxyHost] = crud.get_hosts(db, inbound_tag)
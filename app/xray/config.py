@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import hashlib
+import itertools
 import json
+import os
+import threading
 from collections import defaultdict
 from copy import deepcopy
 from pathlib import PosixPath
-from typing import Union
+from typing import Dict, List, Set, Union
 
 import commentjson
 from sqlalchemy import func
@@ -12,7 +16,7 @@ from sqlalchemy import func
 from app.db import GetDB
 from app.db import models as db_models
 from app.models.proxy import ProxyTypes
-from app.models.user import UserStatus
+from app.models.user import UserResponse, UserStatus
 from app.utils.crypto import get_cert_SANs
 from config import DEBUG, XRAY_EXCLUDE_INBOUND_TAGS, XRAY_FALLBACKS_INBOUND_TAG
 
@@ -26,6 +30,78 @@ def merge_dicts(a, b):  # B will override A dictionary key and values
     return a
 
 
+class ClientsIndex:
+    """
+    Clients of each inbound keyed by user id
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        # bumped on every change, generations of all indexes share one counter
+        self.generation = 0
+        # generation of the last load from the database, changes before it aren't known one by one
+        self.loaded_generation = 0
+        self._by_inbound: Dict[str, Dict[int, dict]] = defaultdict(dict)
+        self._user_inbounds: Dict[int, Set[str]] = defaultdict(set)
+
+    def __deepcopy__(self, memo):
+        # copies of the config are snapshots and don't carry the index
+        return ClientsIndex()
+
+    def clear(self):
+        self._by_inbound.clear()
+        self._user_inbounds.clear()
+        self.loaded = False
+
+    def set(self, inbound_tag: str, user_id: int, client: dict):
+        self._by_inbound[inbound_tag][user_id] = client
+        self._user_inbounds[user_id].add(inbound_tag)
+
+    def remove_user(self, user_id: int):
+        for inbound_tag in self._user_inbounds.pop(user_id, ()):
+            self._by_inbound[inbound_tag].pop(user_id, None)
+
+    def get(self, inbound_tag: str) -> List[dict]:
+        return list(self._by_inbound.get(inbound_tag, {}).values())
+
+
+_certificate_files: Dict[str, tuple] = {}
+_generations = itertools.count(1)
+
+
+def read_certificate_file(path: str) -> List[str]:
+    """
+    Returns the stripped lines of a certificate or key file, cached until the file changes.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    try:
+        cached_mtime, lines = _certificate_files[path]
+        if cached_mtime == mtime:
+            return lines
+    except KeyError:
+        pass
+
+    with open(path) as file:
+        lines = [line.strip() for line in file.readlines()]
+    _certificate_files[path] = (mtime, lines)
+    return lines
+
+
+class NodeConfigArtifact:
+    """
+    JSON of a config as it's sent to nodes, built once and shared between them
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.json: Union[str, None] = None
+        self.digest: Union[str, None] = None
+
+    def __deepcopy__(self, memo):
+        return NodeConfigArtifact()
+
+
 class XRayConfig(dict):
     def __init__(self,
                  config: Union[dict, str, PosixPath] = {},
@@ -49,6 +125,10 @@ class XRayConfig(dict):
 
         self.api_host = api_host
         self.api_port = api_port
+        self._clients = ClientsIndex()
+        self._node_artifact = NodeConfigArtifact()
+        # generation of the clients index a config with users was made of
+        self.generation = 0
 
         super().__init__(config)
         self._validate()
@@ -61,6 +141,9 @@ class XRayConfig(dict):
 
         self._apply_api()
 
+        # identifies the config without users, kept by the copies made by include_db_users
+        self.base_digest = hashlib.sha256(self.to_json(sort_keys=True).encode()).hexdigest()
+
     def _apply_api(self):
         api_inbound = self.get_inbound("API_INBOUND")
         if api_inbound:
@@ -355,12 +438,82 @@ class XRayConfig(dict):
     def to_json(self, **json_kwargs):
         return json.dumps(self, **json_kwargs)
 
+    def _embed_certificates(self) -> list:
+        """
+        Returns the inbounds with certificate files replaced by their content,
+        nodes can't read files of the panel's host. Only the changed parts are copied.
+        """
+        inbounds = []
+        for inbound in self.get("inbounds", []):
+            stream_settings = inbound.get("streamSettings") or {}
+            tls_settings = stream_settings.get("tlsSettings") or {}
+            certificates = tls_settings.get("certificates") or []
+
+            if any(c.get("certificateFile") or c.get("keyFile") for c in certificates):
+                embedded = []
+                for certificate in certificates:
+                    certificate = dict(certificate)
+                    if certificate.get("certificateFile"):
+                        certificate['certificate'] = read_certificate_file(certificate.pop('certificateFile'))
+                    if certificate.get("keyFile"):
+                        certificate['key'] = read_certificate_file(certificate.pop('keyFile'))
+                    embedded.append(certificate)
+
+                inbound = {
+                    **inbound,
+                    "streamSettings": {
+                        **stream_settings,
+                        "tlsSettings": {**tls_settings, "certificates": embedded}
+                    }
+                }
+
+            inbounds.append(inbound)
+
+        return inbounds
+
+    def to_node_json(self) -> str:
+        """
+        Serializes the config for nodes once, every node restarted with
+        the same config object gets the same string.
+        """
+        artifact = self._node_artifact
+        with artifact.lock:
+            if artifact.json is None:
+                artifact.json = json.dumps({**self, "inbounds": self._embed_certificates()})
+                artifact.digest = hashlib.sha256(artifact.json.encode()).hexdigest()
+            return artifact.json
+
+    @property
+    def node_json_digest(self) -> str:
+        self.to_node_json()
+        return self._node_artifact.digest
+
     def copy(self):
         return deepcopy(self)
 
-    def include_db_users(self) -> XRayConfig:
-        config = self.copy()
+    def _make_client(self, inbound: dict, user_id: int, username: str, settings: dict) -> dict:
+        client = {
+            "email": f"{user_id}.{username}",
+            **settings
+        }
 
+        # XTLS currently only supports transmission methods of TCP and mKCP
+        if client.get('flow') and (
+                inbound.get('network', 'tcp') not in ('tcp', 'raw', 'kcp')
+                or
+                (
+                    inbound.get('network', 'tcp') in ('tcp', 'raw', 'kcp')
+                    and
+                    inbound.get('tls') not in ('tls', 'reality')
+                )
+                or
+                inbound.get('header_type') == 'http'
+        ):
+            del client['flow']
+
+        return client
+
+    def _load_clients(self):
         with GetDB() as db:
             query = db.query(
                 db_models.User.id,
@@ -383,51 +536,83 @@ class XRayConfig(dict):
             )
             result = query.all()
 
-            grouped_data = defaultdict(list)
+        self._clients.clear()
+        for row in result:
+            excluded_inbound_tags = [i for i in row.excluded_inbound_tags.split(',') if i] \
+                if row.excluded_inbound_tags else []
 
-            for row in result:
-                grouped_data[row.type].append((
-                    row.id,
-                    row.username,
-                    row.settings,
-                    [i for i in row.excluded_inbound_tags.split(',') if i] if row.excluded_inbound_tags else None
-                ))
+            for inbound in self.inbounds_by_protocol.get(row.type, []):
+                if inbound['tag'] in excluded_inbound_tags:
+                    continue
+                self._clients.set(inbound['tag'], row.id, self._make_client(inbound, row.id, row.username, row.settings))
+
+        self._clients.loaded = True
+        self._clients.generation = self._clients.loaded_generation = next(_generations)
+
+    @property
+    def clients_generation(self) -> int:
+        return self._clients.generation
+
+    @property
+    def clients_loaded_generation(self) -> int:
+        return self._clients.loaded_generation
+
+    def update_user_clients(self, user: UserResponse, user_id: int) -> Union[int, None]:
+        """
+        Replaces the user's clients in the clients index and returns the new
+        generation of the index, a no-op returning None until the index is loaded.
+        """
+        with self._clients.lock:
+            if not self._clients.loaded:
+                return
+
+            self._clients.remove_user(user_id)
+            self._clients.generation = next(_generations)
+            if user.status not in (UserStatus.active, UserStatus.on_hold):
+                return self._clients.generation
+
+            for proxy_type, inbound_tags in user.inbounds.items():
+                try:
+                    settings = user.proxies[proxy_type].dict(no_obj=True)
+                except KeyError:
+                    continue
 
-            for proxy_type, rows in grouped_data.items():
+                for inbound_tag in inbound_tags:
+                    inbound = self.inbounds_by_tag.get(inbound_tag)
+                    if not inbound:
+                        continue
+                    self._clients.set(inbound_tag, user_id,
+                                      self._make_client(inbound, user_id, user.username, settings))
+
+            return self._clients.generation
+
+    def remove_user_clients(self, *user_ids: int) -> Union[int, None]:
+        with self._clients.lock:
+            if self._clients.loaded:
+                for user_id in user_ids:
+                    self._clients.remove_user(user_id)
+                self._clients.generation = next(_generations)
+                return self._clients.generation
+
+    def include_db_users(self, reload: bool = False) -> XRayConfig:
+        """
+        Returns a copy of the config with the clients of active users.
+        Clients are read from the index kept up to date by user operations,
+        the database is only scanned on first use or if `reload` is True.
+        Restarts should reload, users may be changed without the operations
+        (e.g. by marzban-cli) and the index doesn't know about it.
+        """
+        config = self.copy()
 
-                inbounds = self.inbounds_by_protocol.get(proxy_type)
-                if not inbounds:
-                    continue
+        with self._clients.lock:
+            if reload or not self._clients.loaded:
+                self._load_clients()
 
-                for inbound in inbounds:
-                    clients = config.get_inbound(inbound['tag'])['settings']['clients']
-
-                    for row in rows:
-                        user_id, username, settings, excluded_inbound_tags = row
-
-                        if excluded_inbound_tags and inbound['tag'] in excluded_inbound_tags:
-                            continue
-
-                        client = {
-                            "email": f"{user_id}.{username}",
-                            **settings
-                        }
-
-                        # XTLS currently only supports transmission methods of TCP and mKCP
-                        if client.get('flow') and (
-                                inbound.get('network', 'tcp') not in ('tcp', 'raw', 'kcp')
-                                or
-                                (
-                                    inbound.get('network', 'tcp') in ('tcp', 'raw', 'kcp')
-                                    and
-                                    inbound.get('tls') not in ('tls', 'reality')
-                                )
-                                or
-                                inbound.get('header_type') == 'http'
-                        ):
-                            del client['flow']
-
-                        clients.append(client)
+            for inbound_tag in self.inbounds_by_tag:
+                clients = self._clients.get(inbound_tag)
+                if clients:
+                    config.get_inbound(inbound_tag)['settings']['clients'].extend(clients)
+            config.generation = self._clients.generation
 
         if DEBUG:
             with open('generated_config-debug.json', 'w') as f:
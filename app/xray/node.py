@@ -15,7 +15,9 @@ from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.poolmanager import PoolManager
 from websocket import WebSocketConnectionClosedException, WebSocketTimeoutException, create_connection
 
+from app.utils.store import TTLMemoryStorage
 from app.xray.config import XRayConfig
+from config import NODE_STATE_CACHE_TTL
 from xray_api import XRay as XRayAPI
 
 
@@ -76,28 +78,7 @@ class ReSTXRayNode:
 
         self._api = None
         self._started = False
-
-    def _prepare_config(self, config: XRayConfig):
-        for inbound in config.get("inbounds", []):
-            streamSettings = inbound.get("streamSettings") or {}
-            tlsSettings = streamSettings.get("tlsSettings") or {}
-            certificates = tlsSettings.get("certificates") or []
-            for certificate in certificates:
-                if certificate.get("certificateFile"):
-                    with open(certificate['certificateFile']) as file:
-                        certificate['certificate'] = [
-                            line.strip() for line in file.readlines()
-                        ]
-                        del certificate['certificateFile']
-
-                if certificate.get("keyFile"):
-                    with open(certificate['keyFile']) as file:
-                        certificate['key'] = [
-                            line.strip() for line in file.readlines()
-                        ]
-                        del certificate['keyFile']
-
-        return config
+        self._state = TTLMemoryStorage(NODE_STATE_CACHE_TTL)
 
     def make_request(self, path: str, timeout: int, **params):
         try:
@@ -105,32 +86,53 @@ class ReSTXRayNode:
                                     json={"session_id": self._session_id, **params})
             data = res.json()
         except Exception as e:
+            self._state.clear()
             exc = NodeAPIError(0, str(e))
             raise exc
 
         if res.status_code == 200:
             return data
         else:
+            self._state.clear()
             exc = NodeAPIError(res.status_code, data['detail'])
             raise exc
 
+    def refresh_state(self):
+        """
+        probes the node and caches the result, called by the health check heartbeat
+        """
+        connected = started = False
+        if self._session_id:
+            try:
+                self.make_request("/ping", timeout=30)
+                connected = True
+                res = self.make_request("/", timeout=30)
+                started = res.get('started', False)
+            except NodeAPIError:
+                pass
+
+        # set after probing, a failed request clears the state and a dead node has to be cached too
+        self._state.set('connected', connected)
+        self._state.set('started', started)
+
+        return connected, started
+
     @property
     def connected(self):
         if not self._session_id:
             return False
-        try:
-            self.make_request("/ping", timeout=30)
-            return True
-        except NodeAPIError:
-            return False
+
+        connected = self._state.get('connected')
+        if connected is None:
+            connected, _ = self.refresh_state()
+        return connected
 
     @property
     def started(self):
-        try:
-            res = self.make_request("/", timeout=30)
-            return res.get('started', False)
-        except NodeAPIError:
-            return False
+        started = self._state.get('started')
+        if started is None:
+            _, started = self.refresh_state()
+        return started
 
     @property
     def api(self):
@@ -158,8 +160,10 @@ class ReSTXRayNode:
 
         res = self.make_request("/connect", timeout=30)
         self._session_id = res['session_id']
+        self._state.clear()
 
     def disconnect(self):
+        self._state.clear()
         self.make_request("/disconnect", timeout=30)
         self._session_id = None
 
@@ -168,11 +172,11 @@ class ReSTXRayNode:
         return res.get('core_version')
 
     def start(self, config: XRayConfig):
+        self._state.clear()
         if not self.connected:
             self.connect()
 
-        config = self._prepare_config(config)
-        json_config = config.to_json()
+        json_config = config.to_node_json()
 
         try:
             res = self.make_request("/start", timeout=100, config=json_config)
@@ -183,6 +187,7 @@ class ReSTXRayNode:
                 raise exc
 
         self._started = True
+        self._state.set('started', True)
 
         self._api = XRayAPI(
             address=self.address,
@@ -199,23 +204,26 @@ class ReSTXRayNode:
         return res
 
     def stop(self):
+        self._state.clear()
         if not self.connected:
             self.connect()
 
         self.make_request('/stop', timeout=50)
         self._api = None
         self._started = False
+        self._state.set('started', False)
 
     def restart(self, config: XRayConfig):
+        self._state.clear()
         if not self.connected:
             self.connect()
 
-        config = self._prepare_config(config)
-        json_config = config.to_json()
+        json_config = config.to_node_json()
 
         res = self.make_request("/restart", timeout=100, config=json_config)
 
         self._started = True
+        self._state.set('started', True)
 
         self._api = XRayAPI(
             address=self.address,
@@ -325,8 +333,10 @@ class RPyCXRayNode:
 
         self._service = Service()
         self._api = None
+        self._state = TTLMemoryStorage(NODE_STATE_CACHE_TTL)
 
     def disconnect(self):
+        self._state.clear()
         try:
             self.connection.close()
             del self.connection
@@ -351,24 +361,38 @@ class RPyCXRayNode:
             try:
                 conn.ping()
                 self.connection = conn
+                self._state.clear()
                 break
             except EOFError as exc:
                 if tries <= 3:
                     continue
                 raise exc
 
-    @property
-    def connected(self):
+    def refresh_state(self):
+        """
+        probes the node and caches the result, called by the health check heartbeat
+        """
         try:
             self.connection.ping()
-            return (not self.connection.closed)
+            connected = not self.connection.closed
         except (AttributeError, EOFError, TimeoutError):
             self.disconnect()
-            return False
+            connected = False
+        self._state.set('connected', connected)
+
+        return connected, self.started
+
+    @property
+    def connected(self):
+        connected = self._state.get('connected')
+        if connected is None:
+            connected, _ = self.refresh_state()
+        return connected
 
     @property
     def remote(self):
-        if not self.connected:
+        connected, _ = self.refresh_state()
+        if not connected:
             self.connect()
         return self.connection.root
 
@@ -385,31 +409,8 @@ class RPyCXRayNode:
     def get_version(self):
         return self.remote.fetch_xray_version()
 
-    def _prepare_config(self, config: XRayConfig):
-        for inbound in config.get("inbounds", []):
-            streamSettings = inbound.get("streamSettings") or {}
-            tlsSettings = streamSettings.get("tlsSettings") or {}
-            certificates = tlsSettings.get("certificates") or []
-            for certificate in certificates:
-                if certificate.get("certificateFile"):
-                    with open(certificate['certificateFile']) as file:
-                        certificate['certificate'] = [
-                            line.strip() for line in file.readlines()
-                        ]
-                        del certificate['certificateFile']
-
-                if certificate.get("keyFile"):
-                    with open(certificate['keyFile']) as file:
-                        certificate['key'] = [
-                            line.strip() for line in file.readlines()
-                        ]
-                        del certificate['keyFile']
-
-        return config
-
     def start(self, config: XRayConfig):
-        config = self._prepare_config(config)
-        json_config = config.to_json()
+        json_config = config.to_node_json()
         self.remote.start(json_config)
         self.started = True
 
@@ -447,8 +448,7 @@ class RPyCXRayNode:
 
     def restart(self, config: XRayConfig):
         self.started = False
-        config = self._prepare_config(config)
-        json_config = config.to_json()
+        json_config = config.to_node_json()
         self.remote.restart(json_config)
         self.started = True
 
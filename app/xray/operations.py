@@ -1,5 +1,7 @@
+from collections import deque
 from functools import lru_cache
-from typing import TYPE_CHECKING
+from threading import Lock, RLock
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -9,12 +11,15 @@ from app.models.node import NodeStatus
 from app.models.user import UserResponse
 from app.utils.concurrency import threaded_function
 from app.xray.node import XRayNode
+from app.xray.operations_queue import ADD, ALTER, REMOVE, OperationsQueue
+from config import XRAY_OPERATIONS_LOG_SIZE, XRAY_OPERATIONS_MAX_WORKERS
 from xray_api import XRay as XRayAPI
 from xray_api.types.account import Account, XTLSFlows
 
 if TYPE_CHECKING:
     from app.db import User as DBUser
     from app.db.models import Node as DBNode
+    from app.xray.config import XRayConfig
 
 
 @lru_cache(maxsize=None)
@@ -28,121 +33,257 @@ def get_tls():
         }
 
 
-@threaded_function
-def _add_user_to_inbound(api: XRayAPI, inbound_tag: str, account: Account):
-    try:
-        api.add_inbound_user(tag=inbound_tag, user=account, timeout=300)
-    except (xray.exc.EmailExistsError, xray.exc.ConnectionError, xray.exc.TimeoutError):
-        pass
+_queues: Dict[Optional[int], OperationsQueue] = {}
+_queues_lock = Lock()
 
+# recent user operations as (generation, kind, inbound_tag, email, account),
+# nodes which missed some of them get them replayed instead of a restart
+_oplog = deque(maxlen=XRAY_OPERATIONS_LOG_SIZE)
+_oplog_floor = 0  # highest generation dropped out of the log
+_last_generation = 0
+_operations_lock = RLock()
 
-@threaded_function
-def _remove_user_from_inbound(api: XRayAPI, inbound_tag: str, email: str):
-    try:
-        api.remove_inbound_user(tag=inbound_tag, email=email, timeout=300)
-    except (xray.exc.EmailNotFoundError, xray.exc.ConnectionError, xray.exc.TimeoutError):
-        pass
+# base config digest and clients generation each node is known to be in sync with
+_nodes_sync: Dict[int, dict] = {}
 
 
-@threaded_function
-def _alter_inbound_user(api: XRayAPI, inbound_tag: str, account: Account):
+def _get_api(node_id: Optional[int]) -> Optional[XRayAPI]:
+    if node_id is None:
+        return xray.api
+
+    node = xray.nodes.get(node_id)
+    if node and node.connected and node.started:
+        return node.api
+
+
+def _get_queue(node_id: Optional[int]) -> OperationsQueue:
     try:
-        api.remove_inbound_user(tag=inbound_tag, email=account.email, timeout=300)
-    except (xray.exc.EmailNotFoundError, xray.exc.ConnectionError, xray.exc.TimeoutError):
+        return _queues[node_id]
+    except KeyError:
         pass
+
+    with _queues_lock:
+        if node_id not in _queues:
+            _queues[node_id] = OperationsQueue(
+                lambda: _get_api(node_id),
+                max_workers=XRAY_OPERATIONS_MAX_WORKERS,
+                on_drop=None if node_id is None else lambda generation: _mark_node_behind(node_id, generation)
+            )
+        return _queues[node_id]
+
+
+def _mark_node_behind(node_id: int, generation: int):
+    with _operations_lock:
+        sync = _nodes_sync.get(node_id)
+        if sync:
+            sync['generation'] = min(sync['generation'], generation - 1)
+
+
+def _active_nodes():
+    return [node_id for node_id, node in list(xray.nodes.items()) if node.connected and node.started]
+
+
+def _enqueue(kind: str, inbound_tag: str, email: str, account: Account = None,
+             generation: int = None, node_ids: list = None):
+    global _oplog_floor, _last_generation
+
+    if node_ids is None:
+        node_ids = _active_nodes()
+
+    if generation is not None:
+        if len(_oplog) == _oplog.maxlen:
+            _oplog_floor = _oplog[0][0]
+        _oplog.append((generation, kind, inbound_tag, email, account))
+
+        previous = max(_last_generation, xray.config.clients_loaded_generation)
+        for node_id in node_ids:
+            sync = _nodes_sync.get(node_id)
+            # nodes which already missed an operation stay behind until they're synced
+            if sync and sync['generation'] >= previous:
+                sync['generation'] = generation
+
+    _get_queue(None).put(kind, inbound_tag, email, account)  # main core
+    for node_id in node_ids:
+        _get_queue(node_id).put(kind, inbound_tag, email, account, generation)
+
+
+def _commit_generation(generation: Optional[int]):
+    global _last_generation
+    if generation is not None:
+        _last_generation = generation
+
+
+def _record_node_sync(node_id: int, config: "XRayConfig"):
+    with _operations_lock:
+        _nodes_sync[node_id] = {
+            "base_digest": config.base_digest,
+            "generation": config.generation,
+        }
+
+
+def _can_replay(node_id: int) -> bool:
+    sync = _nodes_sync.get(node_id)
+    return bool(
+        sync
+        and sync['base_digest'] == xray.config.base_digest
+        and sync['generation'] >= max(_oplog_floor, xray.config.clients_loaded_generation)
+    )
+
+
+def _replay(node_id: int) -> int:
+    """
+    Queues the logged operations the node missed, returns their count.
+    """
+    with _operations_lock:
+        sync = _nodes_sync[node_id]
+        missed = [op for op in _oplog if op[0] > sync['generation']]
+        queue = _get_queue(node_id)
+        for generation, kind, inbound_tag, email, account in missed:
+            queue.put(kind, inbound_tag, email, account, generation)
+        sync['generation'] = max(sync['generation'], _last_generation)
+    return len(missed)
+
+
+def sync_node(node_id: int, config: "XRayConfig" = None):
+    """
+    Brings a started node up to date with the users' changes it missed,
+    replaying them if they are still logged or restarting it otherwise.
+    """
+    with _operations_lock:
+        sync = _nodes_sync.get(node_id)
+        if not sync or (sync['base_digest'] == xray.config.base_digest and sync['generation'] >= _last_generation):
+            return
+        can_replay = _can_replay(node_id)
+        if can_replay:
+            _replay(node_id)
+
+    if not can_replay:
+        restart_node(node_id, config)
+
+
+def get_queues_stats() -> Dict[Optional[int], dict]:
+    return {node_id: queue.stats() for node_id, queue in list(_queues.items())}
+
+
+def _get_account(user: UserResponse, proxy_type, inbound_tag: str, email: str) -> Account:
+    inbound = xray.config.inbounds_by_tag.get(inbound_tag, {})
+
     try:
-        api.add_inbound_user(tag=inbound_tag, user=account, timeout=300)
-    except (xray.exc.EmailExistsError, xray.exc.ConnectionError, xray.exc.TimeoutError):
+        proxy_settings = user.proxies[proxy_type].dict(no_obj=True)
+    except KeyError:
         pass
+    account = proxy_type.account_model(email=email, **proxy_settings)
+
+    # XTLS currently only supports transmission methods of TCP and mKCP
+    if getattr(account, 'flow', None) and (
+        inbound.get('network', 'tcp') not in ('tcp', 'kcp')
+        or
+        (
+            inbound.get('network', 'tcp') in ('tcp', 'kcp')
+            and
+            inbound.get('tls') not in ('tls', 'reality')
+        )
+        or
+        inbound.get('header_type') == 'http'
+    ):
+        account.flow = XTLSFlows.NONE
+
+    return account
 
 
 def add_user(dbuser: "DBUser"):
     user = UserResponse.model_validate(dbuser)
     email = f"{dbuser.id}.{dbuser.username}"
+    node_ids = _active_nodes()
 
-    for proxy_type, inbound_tags in user.inbounds.items():
-        for inbound_tag in inbound_tags:
-            inbound = xray.config.inbounds_by_tag.get(inbound_tag, {})
+    with _operations_lock:
+        generation = xray.config.update_user_clients(user, dbuser.id)
 
-            try:
-                proxy_settings = user.proxies[proxy_type].dict(no_obj=True)
-            except KeyError:
-                pass
-            account = proxy_type.account_model(email=email, **proxy_settings)
-
-            # XTLS currently only supports transmission methods of TCP and mKCP
-            if getattr(account, 'flow', None) and (
-                inbound.get('network', 'tcp') not in ('tcp', 'kcp')
-                or
-                (
-                    inbound.get('network', 'tcp') in ('tcp', 'kcp')
-                    and
-                    inbound.get('tls') not in ('tls', 'reality')
-                )
-                or
-                inbound.get('header_type') == 'http'
-            ):
-                account.flow = XTLSFlows.NONE
-
-            _add_user_to_inbound(xray.api, inbound_tag, account)  # main core
-            for node in list(xray.nodes.values()):
-                if node.connected and node.started:
-                    _add_user_to_inbound(node.api, inbound_tag, account)
+        for proxy_type, inbound_tags in user.inbounds.items():
+            for inbound_tag in inbound_tags:
+                account = _get_account(user, proxy_type, inbound_tag, email)
+                _enqueue(ADD, inbound_tag, email, account, generation, node_ids)
+
+        _commit_generation(generation)
+
+
+def add_users(dbusers: List["DBUser"]):
+    """
+    Adds the users to all the cores holding the operations lock once.
+    """
+    if not dbusers:
+        return
+    node_ids = _active_nodes()
+
+    with _operations_lock:
+        generation = None
+        for dbuser in dbusers:
+            user = UserResponse.model_validate(dbuser)
+            email = f"{dbuser.id}.{dbuser.username}"
+            generation = xray.config.update_user_clients(user, dbuser.id)
+
+            for proxy_type, inbound_tags in user.inbounds.items():
+                for inbound_tag in inbound_tags:
+                    account = _get_account(user, proxy_type, inbound_tag, email)
+                    _enqueue(ADD, inbound_tag, email, account, generation, node_ids)
+
+        _commit_generation(generation)
 
 
 def remove_user(dbuser: "DBUser"):
     email = f"{dbuser.id}.{dbuser.username}"
+    node_ids = _active_nodes()
+
+    with _operations_lock:
+        generation = xray.config.remove_user_clients(dbuser.id)
+
+        for inbound_tag in xray.config.inbounds_by_tag:
+            _enqueue(REMOVE, inbound_tag, email, None, generation, node_ids)
+
+        _commit_generation(generation)
+
+
+def remove_users(dbusers: List["DBUser"]):
+    """
+    Removes the users from all the cores as one change of the clients index.
+    """
+    if not dbusers:
+        return
+    node_ids = _active_nodes()
+
+    with _operations_lock:
+        generation = xray.config.remove_user_clients(*(dbuser.id for dbuser in dbusers))
 
-    for inbound_tag in xray.config.inbounds_by_tag:
-        _remove_user_from_inbound(xray.api, inbound_tag, email)
-        for node in list(xray.nodes.values()):
-            if node.connected and node.started:
-                _remove_user_from_inbound(node.api, inbound_tag, email)
+        for dbuser in dbusers:
+            email = f"{dbuser.id}.{dbuser.username}"
+            for inbound_tag in xray.config.inbounds_by_tag:
+                _enqueue(REMOVE, inbound_tag, email, None, generation, node_ids)
+
+        _commit_generation(generation)
 
 
 def update_user(dbuser: "DBUser"):
     user = UserResponse.model_validate(dbuser)
     email = f"{dbuser.id}.{dbuser.username}"
+    node_ids = _active_nodes()
 
-    active_inbounds = []
-    for proxy_type, inbound_tags in user.inbounds.items():
-        for inbound_tag in inbound_tags:
-            active_inbounds.append(inbound_tag)
-            inbound = xray.config.inbounds_by_tag.get(inbound_tag, {})
+    with _operations_lock:
+        generation = xray.config.update_user_clients(user, dbuser.id)
 
-            try:
-                proxy_settings = user.proxies[proxy_type].dict(no_obj=True)
-            except KeyError:
-                pass
-            account = proxy_type.account_model(email=email, **proxy_settings)
-
-            # XTLS currently only supports transmission methods of TCP and mKCP
-            if getattr(account, 'flow', None) and (
-                inbound.get('network', 'tcp') not in ('tcp', 'kcp')
-                or
-                (
-                    inbound.get('network', 'tcp') in ('tcp', 'kcp')
-                    and
-                    inbound.get('tls') not in ('tls', 'reality')
-                )
-                or
-                inbound.get('header_type') == 'http'
-            ):
-                account.flow = XTLSFlows.NONE
-
-            _alter_inbound_user(xray.api, inbound_tag, account)  # main core
-            for node in list(xray.nodes.values()):
-                if node.connected and node.started:
-                    _alter_inbound_user(node.api, inbound_tag, account)
-
-    for inbound_tag in xray.config.inbounds_by_tag:
-        if inbound_tag in active_inbounds:
-            continue
-        # remove disabled inbounds
-        _remove_user_from_inbound(xray.api, inbound_tag, email)
-        for node in list(xray.nodes.values()):
-            if node.connected and node.started:
-                _remove_user_from_inbound(node.api, inbound_tag, email)
+        active_inbounds = []
+        for proxy_type, inbound_tags in user.inbounds.items():
+            for inbound_tag in inbound_tags:
+                active_inbounds.append(inbound_tag)
+                account = _get_account(user, proxy_type, inbound_tag, email)
+                _enqueue(ALTER, inbound_tag, email, account, generation, node_ids)
+
+        for inbound_tag in xray.config.inbounds_by_tag:
+            if inbound_tag in active_inbounds:
+                continue
+            # remove disabled inbounds
+            _enqueue(REMOVE, inbound_tag, email, None, generation, node_ids)
+
+        _commit_generation(generation)
 
 
 def remove_node(node_id: int):
@@ -156,6 +297,9 @@ def remove_node(node_id: int):
                 del xray.nodes[node_id]
             except KeyError:
                 pass
+            _queues.pop(node_id, None)
+            with _operations_lock:
+                _nodes_sync.pop(node_id, None)
 
 
 def add_node(dbnode: "DBNode"):
@@ -217,10 +361,20 @@ def connect_node(node_id, config=None):
         _change_node_status(node_id, NodeStatus.connecting)
         logger.info(f"Connecting to \"{dbnode.name}\" node")
 
-        if config is None:
-            config = xray.config.include_db_users()
+        if _can_replay(node_id) and node.connected and node.started:
+            # the node kept running with the same base config, only the missed users' changes are sent
+            replayed = _replay(node_id)
+            logger.info(f"Replayed {replayed} missed operations to \"{dbnode.name}\" node")
+        else:
+            if config is None:
+                if not node.connected:
+                    node.connect()  # unreachable nodes fail here, before the users are read
+                config = xray.config.include_db_users(reload=True)
+
+            node.start(config)
+            _record_node_sync(node_id, config)
+            _replay(node_id)
 
-        node.start(config)
         version = node.get_version()
         _change_node_status(node_id, NodeStatus.connected, version=version)
         logger.info(f"Connected to \"{dbnode.name}\" node, xray run on v{version}")
@@ -256,9 +410,11 @@ def restart_node(node_id, config=None):
         logger.info(f"Restarting Xray core of \"{dbnode.name}\" node")
 
         if config is None:
-            config = xray.config.include_db_users()
+            config = xray.config.include_db_users(reload=True)
 
         node.restart(config)
+        _record_node_sync(node_id, config)
+        _replay(node_id)
         logger.info(f"Xray core of \"{dbnode.name}\" node restarted")
     except Exception as e:
         _change_node_status(node_id, NodeStatus.error, message=str(e))
@@ -272,6 +428,9 @@ def restart_node(node_id, config=None):
 __all__ = [
     "add_user",
     "remove_user",
+    "update_user",
+    "get_queues_stats",
+    "sync_node",
     "add_node",
     "remove_node",
     "connect_node",
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from app import logger
+from xray_api import XRay as XRayAPI
+from xray_api import exceptions as exc
+from xray_api.types.account import Account
+
+ADD = "add"
+REMOVE = "remove"
+ALTER = "alter"  # remove then add, replaces the account
+
+
+def _merge_kinds(pending: str, new: str) -> str:
+    if new == ADD and pending in (REMOVE, ALTER):
+        # the user might still be there from before the pending removal
+        return ALTER
+    return new
+
+
+class OperationsQueue:
+    """
+    Pending inbound user operations of a single core.
+
+    Operations on the same (inbound, email) are coalesced while they wait,
+    so an add followed by a remove only sends the removal, and they are
+    drained by at most `max_workers` threads.
+    """
+
+    def __init__(self,
+                 get_api: Callable[[], Optional[XRayAPI]],
+                 max_workers: int = 10,
+                 timeout: int = 300,
+                 on_drop: Callable[[int], None] = None):
+        self.get_api = get_api
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # called with the generation of operations which couldn't reach the core
+        self.on_drop = on_drop
+
+        self._pending: "OrderedDict[Tuple[str, str], Tuple[str, Optional[Account], float, Optional[int]]]" = \
+            OrderedDict()
+        self._in_flight = set()
+        self._workers = 0
+        self._lock = threading.Lock()
+
+        self.processed = 0
+        self.failed = 0
+        # operations dropped since they couldn't reach the core
+        self.undelivered = 0
+        self.coalesced = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def put(self, kind: str, inbound_tag: str, email: str, account: Account = None, generation: int = None):
+        key = (inbound_tag, email)
+        with self._lock:
+            try:
+                pending_kind, _, enqueued_at, pending_generation = self._pending[key]
+                kind = _merge_kinds(pending_kind, kind)
+                if pending_generation is not None:
+                    generation = pending_generation if generation is None else min(generation, pending_generation)
+                self.coalesced += 1
+            except KeyError:
+                enqueued_at = time.monotonic()
+            self._pending[key] = (kind, account, enqueued_at, generation)
+
+            if self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._work, daemon=True).start()
+
+    def _pop(self):
+        # keys which are being sent are skipped to keep operations of an email in order
+        for key in self._pending:
+            if key not in self._in_flight:
+                self._in_flight.add(key)
+                return key, self._pending.pop(key)
+
+    def _work(self):
+        while True:
+            with self._lock:
+                item = self._pop()
+                if item is None:
+                    self._workers -= 1
+                    return
+
+            (inbound_tag, email), (kind, account, enqueued_at, generation) = item
+            failed = False
+            try:
+                delivered = self._execute(kind, inbound_tag, email, account)
+            except Exception:
+                logger.exception(f"Failed to {kind} user \"{email}\" of inbound \"{inbound_tag}\"")
+                delivered = False
+                failed = True
+
+            if not delivered and self.on_drop and generation is not None:
+                try:
+                    self.on_drop(generation)
+                except Exception:
+                    logger.exception("Failed to handle a dropped user operation")
+
+            latency = time.monotonic() - enqueued_at
+            with self._lock:
+                self._in_flight.discard((inbound_tag, email))
+                self.processed += 1
+                self.failed += failed
+                self.undelivered += not delivered and not failed
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+
+    def _execute(self, kind: str, inbound_tag: str, email: str, account: Optional[Account]) -> bool:
+        """
+        Sends the operation, returns False if it couldn't reach the core.
+        """
+        api = self.get_api()
+        if api is None:
+            return False  # core is down, it's synced again on its next start
+
+        if kind in (REMOVE, ALTER):
+            try:
+                api.remove_inbound_user(tag=inbound_tag, email=email, timeout=self.timeout)
+            except exc.EmailNotFoundError:
+                pass
+            except (exc.ConnectionError, exc.TimeoutError):
+                return False
+
+        if kind in (ADD, ALTER):
+            try:
+                api.add_inbound_user(tag=inbound_tag, user=account, timeout=self.timeout)
+            except exc.EmailExistsError:
+                pass
+            except (exc.ConnectionError, exc.TimeoutError):
+                return False
+
+        return True
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "in_flight": len(self._in_flight),
+                "workers": self._workers,
+                "processed": self.processed,
+                "failed": self.failed,
+                "undelivered": self.undelivered,
+                "coalesced": self.coalesced,
+                "avg_latency": self.total_latency / self.processed if self.processed else 0.0,
+                "max_latency": self.max_latency,
+            }
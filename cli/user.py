@@ -1,3 +1,4 @@
+import sys
 from typing import Optional, List
 
 import typer
@@ -5,6 +6,8 @@ from rich.table import Table
 
 from app.db import GetDB, crud
 from app.db.models import User
+from app.utils import export
+from app.utils.export import ExportFormat
 from app.utils.system import readable_size
 
 from . import utils
@@ -19,19 +22,36 @@ def list_users(
     username: Optional[List[str]] = typer.Option(None, *utils.FLAGS["username"], help="Search by username(s)"),
     search: Optional[str] = typer.Option(None, *utils.FLAGS["search"], help="Search by username/note"),
     status: Optional[crud.UserStatus] = typer.Option(None, *utils.FLAGS["status"]),
-    admins: Optional[List[str]] = typer.Option(None, *utils.FLAGS["admin"], help="Search by owner admin's username(s)")
+    admins: Optional[List[str]] = typer.Option(None, *utils.FLAGS["admin"], help="Search by owner admin's username(s)"),
+    cursor: Optional[str] = typer.Option(None, "--cursor", help="Continue from the cursor printed with the previous page")
 ):
     """
     Displays a table of users
 
+    Users are listed by username in pages of `--limit` users, unless `--offset` is used.
+
     NOTE: Sorting is not currently available.
     """
+    if offset and cursor:
+        utils.error("--offset can't be used with --cursor")
+
+    next_cursor = None
     with GetDB() as db:
-        users: list[User] = crud.get_users(
-            db=db, offset=offset, limit=limit,
-            usernames=username, search=search, status=status,
-            admins=admins
-        )
+        if offset:
+            users: list[User] = crud.get_users(
+                db=db, offset=offset, limit=limit,
+                usernames=username, search=search, status=status,
+                admins=admins
+            )
+        else:
+            try:
+                users, next_cursor = crud.get_users_page(
+                    db=db, cursor=cursor, limit=limit,
+                    usernames=username, search=search, status=status,
+                    admins=admins
+                )
+            except ValueError as err:
+                utils.error(str(err))
 
         utils.print_table(
             table=Table(
@@ -53,6 +73,41 @@ def list_users(
             ]
         )
 
+    if next_cursor:
+        typer.echo(f"Next page: --cursor {next_cursor}")
+
+
+@app.command(name="export")
+def export_users(
+    export_format: ExportFormat = typer.Option(ExportFormat.ndjson, *utils.FLAGS["format"]),
+    output_file: Optional[str] = typer.Option(
+        None, *utils.FLAGS["output_file"], help="Writes the users in the file if provided"
+    ),
+    usage: bool = typer.Option(False, "--usage", is_flag=True, help="Adds used and lifetime used traffic columns"),
+    username: Optional[List[str]] = typer.Option(None, *utils.FLAGS["username"], help="Search by username(s)"),
+    search: Optional[str] = typer.Option(None, *utils.FLAGS["search"], help="Search by username/note"),
+    status: Optional[crud.UserStatus] = typer.Option(None, *utils.FLAGS["status"]),
+    admins: Optional[List[str]] = typer.Option(None, *utils.FLAGS["admin"], help="Search by owner admin's username(s)")
+):
+    """
+    Exports users as NDJSON or CSV
+
+    Users are written while they're read from the database, to the output file
+      when the `output-file` is present, otherwise to the standard output.
+    """
+    chunks = export.export_users(
+        format=export_format, usage=usage,
+        usernames=username, search=search, status=status, admins=admins
+    )
+
+    if output_file:
+        with open(output_file, "w", newline="") as out_file:
+            out_file.writelines(chunks)
+        utils.success(f'Users successfully exported to "{output_file}".')
+    else:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+
 
 @app.command(name="set-owner")
 def set_owner(
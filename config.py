@@ -34,6 +34,10 @@ XRAY_ASSETS_PATH = config("XRAY_ASSETS_PATH", default="/usr/local/share/xray")
 XRAY_EXCLUDE_INBOUND_TAGS = config("XRAY_EXCLUDE_INBOUND_TAGS", default='').split()
 XRAY_SUBSCRIPTION_URL_PREFIX = config("XRAY_SUBSCRIPTION_URL_PREFIX", default="").strip("/")
 XRAY_SUBSCRIPTION_PATH = config("XRAY_SUBSCRIPTION_PATH", default="sub").strip("/")
+# how many threads send users' add/remove operations to each core at the same time
+XRAY_OPERATIONS_MAX_WORKERS = config("XRAY_OPERATIONS_MAX_WORKERS", cast=int, default=10)
+# number of recent user operations kept to be replayed to nodes which missed them
+XRAY_OPERATIONS_LOG_SIZE = config("XRAY_OPERATIONS_LOG_SIZE", cast=int, default=100000)
 
 TELEGRAM_API_TOKEN = config("TELEGRAM_API_TOKEN", default="")
 TELEGRAM_ADMIN_ID = config(
@@ -93,6 +97,8 @@ ONHOLD_STATUS_TEXT = config("ONHOLD_STATUS_TEXT", default="On-Hold")
 
 USERS_AUTODELETE_DAYS = config("USERS_AUTODELETE_DAYS", default=-1, cast=int)
 USER_AUTODELETE_INCLUDE_LIMITED_ACCOUNTS = config("USER_AUTODELETE_INCLUDE_LIMITED_ACCOUNTS", default=False, cast=bool)
+# total of cursor paginated users listings is cached for this many seconds, 0 always counts
+USERS_COUNT_CACHE_TTL = config("USERS_COUNT_CACHE_TTL", default=30, cast=int)
 
 
 # USERNAME: PASSWORD
@@ -131,10 +137,21 @@ NOTIFY_DAYS_LEFT = config(
 
 DISABLE_RECORDING_NODE_USAGE = config("DISABLE_RECORDING_NODE_USAGE", cast=bool, default=False)
 
+# unflushed users' usages are kept in this file to survive crashes, empty value disables it
+USER_USAGES_JOURNAL_PATH = config("USER_USAGES_JOURNAL_PATH", default="/var/lib/marzban/usages-journal.log")
+USER_USAGES_FLUSH_BATCH_SIZE = config("USER_USAGES_FLUSH_BATCH_SIZE", cast=int, default=1000)
+# users' hourly usages older than this many days are rolled up into daily ones,
+# and daily ones older than USER_USAGES_DAILY_RETENTION_DAYS into monthly ones, 0 keeps them forever
+USER_USAGES_HOURLY_RETENTION_DAYS = config("USER_USAGES_HOURLY_RETENTION_DAYS", cast=int, default=7)
+USER_USAGES_DAILY_RETENTION_DAYS = config("USER_USAGES_DAILY_RETENTION_DAYS", cast=int, default=180)
+
 # headers: profile-update-interval, support-url, profile-title
 SUB_UPDATE_INTERVAL = config("SUB_UPDATE_INTERVAL", default="12")
 SUB_SUPPORT_URL = config("SUB_SUPPORT_URL", default="https://t.me/")
 SUB_PROFILE_TITLE = config("SUB_PROFILE_TITLE", default="Subscription")
+# number of rendered subscriptions kept in memory and for how many seconds, 0 disables the cache
+SUB_CACHE_SIZE = config("SUB_CACHE_SIZE", cast=int, default=10000)
+SUB_CACHE_TTL = config("SUB_CACHE_TTL", cast=int, default=3600)
 
 # discord webhook log
 DISCORD_WEBHOOK_URL = config("DISCORD_WEBHOOK_URL", default="")
@@ -142,8 +159,15 @@ DISCORD_WEBHOOK_URL = config("DISCORD_WEBHOOK_URL", default="")
 
 # Interval jobs, all values are in seconds
 JOB_CORE_HEALTH_CHECK_INTERVAL = config("JOB_CORE_HEALTH_CHECK_INTERVAL", cast=int, default=10)
+# nodes' connected/started state is probed by the health check and cached for this long
+NODE_STATE_CACHE_TTL = config("NODE_STATE_CACHE_TTL", cast=int, default=30)
 JOB_RECORD_NODE_USAGES_INTERVAL = config("JOB_RECORD_NODE_USAGES_INTERVAL", cast=int, default=30)
 JOB_RECORD_USER_USAGES_INTERVAL = config("JOB_RECORD_USER_USAGES_INTERVAL", cast=int, default=10)
+# deadline of fetching users' stats from each node, in seconds
+JOB_RECORD_USER_USAGES_TIMEOUT = config("JOB_RECORD_USER_USAGES_TIMEOUT", cast=int, default=30)
 JOB_RECORD_USAGES_MAX_WORKERS = config("JOB_RECORD_USAGES_MAX_WORKERS", cast=int, default=5)
+# users' usages are buffered in memory and written to the database on this interval
+JOB_FLUSH_USER_USAGES_INTERVAL = config("JOB_FLUSH_USER_USAGES_INTERVAL", cast=int, default=60)
+JOB_ROLLUP_USER_USAGES_INTERVAL = config("JOB_ROLLUP_USER_USAGES_INTERVAL", cast=int, default=3600)
 JOB_REVIEW_USERS_INTERVAL = config("JOB_REVIEW_USERS_INTERVAL", cast=int, default=10)
 JOB_SEND_NOTIFICATIONS_INTERVAL = config("JOB_SEND_NOTIFICATIONS_INTERVAL", cast=int, default=30)
@@ -0,0 +1,131 @@
+from uuid import UUID
+
+import pytest
+import yaml
+
+from app.subscription.clash import (
+    DEFAULT_SUBSCRIPTION_TEMPLATE_FILE,
+    ClashConfiguration,
+    ClashMetaConfiguration,
+    SafeLoader,
+)
+from app.templates import render_template, template_file_version
+from app.utils.helpers import yml_uuid_representer
+from config import CLASH_SUBSCRIPTION_TEMPLATE
+
+REMARKS = [
+    '"double" quotes',
+    "'single' quotes",
+    "# hash",
+    "mid # hash",
+    "key: value",
+    "trailing colon:",
+    "*star",
+    "&anchor",
+    "!tag",
+    "- dash",
+    "? question",
+    "| pipe",
+    "> folded",
+    "%percent",
+    "@at",
+    "`tick",
+    "{braces}",
+    "[brackets]",
+    "a, b",
+    " leading space",
+    "trailing space ",
+    "yes",
+    "null",
+    "~",
+    "123",
+    "1.0",
+    "2024-01-01",
+    "🇩🇪 Germany ♻️",
+    "é ü 中文 نام",
+    "tab\there",
+    "\ufeffbom",
+    "x" * 150,
+    "*star",  # duplicated remarks get a counter
+    "*star",
+]
+
+INBOUNDS = [
+    {"protocol": "vmess", "network": "ws", "tls": "tls", "path": "/ws?ed=2048", "header_type": ""},
+    {"protocol": "vless", "network": "tcp", "tls": "reality", "path": "", "header_type": "none",
+     "pbk": "pbk", "sid": "ab"},
+    {"protocol": "vless", "network": "grpc", "tls": "tls", "path": "service#name", "header_type": ""},
+    {"protocol": "trojan", "network": "tcp", "tls": "tls", "path": "/h", "header_type": "http",
+     "host": ["a.example.com", "b.example.com"]},
+    {"protocol": "trojan", "network": "h2", "tls": "tls", "path": "/h2", "header_type": ""},
+    {"protocol": "shadowsocks", "network": "tcp", "tls": "none", "path": "", "header_type": "none"},
+]
+
+SETTINGS = {
+    "vmess": {"id": UUID("a20ae3fd-0afa-409a-bd19-8c69bab9d1eb")},
+    "vless": {"id": UUID("b4ddcfaa-a251-446a-9f1e-0c4bd2a5e0e1"), "flow": "xtls-rprx-vision"},
+    "trojan": {"password": "p: #'\""},
+    "shadowsocks": {"password": "*secret", "method": "chacha20-ietf-poly1305"},
+}
+
+
+def _inbound(inbound: dict, index: int) -> dict:
+    return {
+        "port": 443 + index,
+        "sni": ["sni.example.com"] if index % 2 else [],
+        "host": [],
+        "alpn": "h2,http/1.1" if index % 2 else None,
+        "fp": "chrome",
+        "ais": bool(index % 3),
+        "mux_enable": bool(index % 2),
+        "random_user_agent": False,
+        **inbound,
+    }
+
+
+def _round_trip(conf: ClashConfiguration) -> str:
+    # the rendering done before the default template was emitted directly
+    yaml.add_representer(UUID, yml_uuid_representer)
+    return yaml.dump(
+        yaml.load(
+            render_template(CLASH_SUBSCRIPTION_TEMPLATE, {"conf": conf.data, "proxy_remarks": conf.proxy_remarks}),
+            Loader=SafeLoader
+        ),
+        sort_keys=False,
+        allow_unicode=True,
+    )
+
+
+def test_default_template_is_used():
+    assert template_file_version(CLASH_SUBSCRIPTION_TEMPLATE)[0] == DEFAULT_SUBSCRIPTION_TEMPLATE_FILE
+
+
+@pytest.mark.parametrize("configuration", [ClashConfiguration, ClashMetaConfiguration])
+@pytest.mark.parametrize("reverse", [False, True])
+def test_default_template_matches_round_trip(configuration, reverse):
+    conf = configuration()
+    for i, remark in enumerate(REMARKS):
+        inbound = _inbound(INBOUNDS[i % len(INBOUNDS)], i)
+        conf.add(remark=remark, address=f"{i}.example.com", inbound=inbound,
+                 settings=SETTINGS[inbound["protocol"]])
+    assert conf.data["proxies"]
+
+    rendered = conf.render(reverse=reverse)
+    assert conf._render_default() == rendered  # not a fallback to the round trip
+    assert rendered == _round_trip(conf)
+
+
+@pytest.mark.parametrize("configuration", [ClashConfiguration, ClashMetaConfiguration])
+def test_default_template_matches_round_trip_without_proxies(configuration):
+    conf = configuration()
+    assert conf.render() == _round_trip(conf)
+
+
+@pytest.mark.parametrize("configuration", [ClashConfiguration, ClashMetaConfiguration])
+def test_line_breaks_fall_back_to_round_trip(configuration):
+    conf = configuration()
+    conf.add(remark="line\nbreak", address="example.com", inbound=_inbound(INBOUNDS[0], 0),
+             settings=SETTINGS["vmess"])
+
+    assert conf._render_default() is None
+    assert conf.render() == _round_trip(conf)
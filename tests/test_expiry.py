@@ -0,0 +1,79 @@
+import threading
+from datetime import datetime
+
+from app.models.user import UserStatus
+from app.utils import expiry
+from app.utils.expiry import EXPIRE, ON_HOLD_TIMEOUT, ExpiryScheduler
+
+
+class Recorder:
+    def __init__(self, fail: int = 0):
+        self.calls = []
+        self.fail = fail
+        self.fired = threading.Event()
+
+    def __call__(self, kind, user_ids):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("review failed")
+        self.calls.append((kind, sorted(user_ids)))
+        self.fired.set()
+
+
+def _start(handler, rows=()):
+    scheduler = ExpiryScheduler()
+    scheduler.start(handler, lambda: rows)
+    return scheduler
+
+
+def test_far_future_entry_does_not_stop_the_thread():
+    far = datetime(3000, 1, 1)
+    handler = Recorder()
+    scheduler = _start(handler, [(1, UserStatus.active, int(far.timestamp()), None),
+                                 (2, UserStatus.on_hold, None, far)])
+
+    # once waiting on the far entries, the thread must still pick up due ones
+    for user_id in (3, 4):
+        handler.fired.clear()
+        scheduler.schedule(user_id, UserStatus.active, int(expiry._now()) - 1, None)
+        assert handler.fired.wait(5)
+
+    assert handler.calls == [(EXPIRE, [3]), (EXPIRE, [4])]
+    assert scheduler._thread.is_alive()
+    assert len(scheduler) == 2
+
+
+def test_replaced_and_cleared_entries_are_skipped():
+    handler = Recorder()
+    scheduler = _start(handler)
+    past = int(expiry._now()) - 1
+
+    with scheduler._cond:
+        scheduler._schedule(1, UserStatus.active, past - 10, None)
+        scheduler._schedule(1, UserStatus.active, past + 3600, None)
+        scheduler._schedule(2, UserStatus.active, past, None)
+        scheduler._schedule(2, UserStatus.disabled, past, None)
+        scheduler._schedule(3, UserStatus.on_hold, None, datetime.utcfromtimestamp(past))
+        scheduler._cond.notify()
+
+    assert handler.fired.wait(5)
+    assert handler.calls == [(ON_HOLD_TIMEOUT, [3])]
+    assert len(scheduler) == 1
+
+
+def test_failed_review_is_retried(monkeypatch):
+    monkeypatch.setattr(expiry, "EXPIRY_RETRY_DELAY", 0)
+    handler = Recorder(fail=1)
+    scheduler = _start(handler)
+
+    scheduler.schedule(1, UserStatus.active, int(expiry._now()) - 1, None)
+
+    assert handler.fired.wait(5)
+    assert handler.calls == [(EXPIRE, [1])]
+    assert scheduler._thread.is_alive()
+
+
+def test_schedule_is_noop_until_started():
+    scheduler = ExpiryScheduler()
+    scheduler.schedule(1, UserStatus.active, int(expiry._now()) + 60, None)
+    assert len(scheduler) == 0
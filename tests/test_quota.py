@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from app.models.user import UserStatus
+from app.utils.quota import QuotaIndex
+
+
+def _user(id, status=UserStatus.active, data_limit=100, used_traffic=0):
+    return SimpleNamespace(id=id, status=status, data_limit=data_limit, used_traffic=used_traffic)
+
+
+def test_load_leaves_out_pending_deltas():
+    index = QuotaIndex()
+    crossed = index.load(lambda: [(1, 100), (2, 50), (3, 0)], pending={1: 30, 2: 50})
+
+    assert index.loaded
+    assert sorted(crossed) == [2, 3]
+    assert index.consume({1: 69}) == []
+    assert index.consume({1: 1, 2: 10}) == [1]
+
+
+def test_update_user_is_noop_until_loaded():
+    index = QuotaIndex()
+    index.update_user(_user(1))
+    index.load(lambda: [])
+
+    assert index.consume({1: 1000}) == []
+
+
+def test_update_user_tracks_new_and_changed_users():
+    index = QuotaIndex()
+    index.load(lambda: [(1, 100)], pending={2: 5})
+    index.consume({2: 10})
+
+    # a created user, its unflushed usage counts against the new limit
+    index.update_user(_user(2, data_limit=20))
+    assert index.consume({2: 4}) == []
+    assert index.consume({2: 1}) == [2]
+
+    # a raised limit, then a disabled user
+    index.update_user(_user(1, data_limit=1000, used_traffic=0))
+    assert index.consume({1: 500}) == []
+    index.update_user(_user(1, status=UserStatus.disabled))
+    assert index.consume({1: 10000}) == []
+
+
+def test_invalidate_and_racing_changes_require_a_load():
+    index = QuotaIndex()
+    index.load(lambda: [(1, 100)])
+    index.invalidate()
+    assert not index.loaded
+
+    def read_quotas():
+        index.update_user(_user(2))  # changed while the quotas are read
+        return [(1, 100)]
+
+    index.load(read_quotas)
+    assert not index.loaded
+
+    index.load(lambda: [(1, 100)])
+    assert index.loaded
@@ -85,6 +85,30 @@ class Stats(XRayBase):
             type, name, _, link = stat.name.split('>>>')
             yield StatResponse(name, type, link, stat.value)
 
+    def get_users_traffic(self, reset: bool = False, timeout: int = None) -> typing.Dict[str, int]:
+        """
+        Returns the total traffic (uplink + downlink) of each user email,
+        decoded straight from the response without building a StatResponse per counter.
+        """
+        try:
+            stub = command_pb2_grpc.StatsServiceStub(self._channel)
+            r = stub.QueryStats(command_pb2.QueryStatsRequest(pattern="user>>>", reset=reset), timeout=timeout)
+
+        except grpc.RpcError as e:
+            raise RelatedError(e)
+
+        traffic = {}
+        prefix_len = len("user>>>")
+        for stat in r.stat:
+            value = stat.value
+            if not value:
+                continue
+            name = stat.name
+            email = name[prefix_len:name.find('>>>', prefix_len)]
+            traffic[email] = traffic.get(email, 0) + value
+
+        return traffic
+
     def get_users_stats(self, reset: bool = False, timeout: int = None) -> typing.Iterable[StatResponse]:
         return self.query_stats("user>>>", reset=reset, timeout=timeout)
 